@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark adding statements into import groups with growing number of groups
+
+Compares precomputed dispatch plan of ``ImportGroups`` with sorting
+groups by their priority for every added statement.
+
+Usage::
+
+    python benchmarks/bench_import_groups.py
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+import timeit
+import typing
+
+from importanize.config import Config, GroupConfig
+from importanize.groups import GROUPS, ImportGroups
+from importanize.plugins import deactivate_all_plugins
+from importanize.statements import ImportStatement
+
+
+STATEMENTS = [
+    ImportStatement(i)
+    for i in (
+        ["os", "sys", "os.path", "json", "typing", "collections.abc"]
+        + ["click", "pluggy", "pytest"]
+        + ["foo", "bar.baz", "company.core", "company.plugins"]
+        + [".", ".module", "..package.module"]
+    )
+] * 50
+
+
+def get_config(n: int) -> Config:
+    packages = [
+        GroupConfig(type="packages", packages=[f"package{i}"]) for i in range(n - 4)
+    ]
+    return Config(
+        groups=[
+            GroupConfig(type="stdlib"),
+            GroupConfig(type="sitepackages"),
+            *packages,
+            GroupConfig(type="remainder"),
+            GroupConfig(type="local"),
+        ]
+    )
+
+
+def add_sorted(groups: ImportGroups, statement: ImportStatement) -> bool:
+    for group in sorted(
+        groups.groups, key=lambda i: list(GROUPS.values()).index(type(i))
+    ):
+        if group.add_statement(statement):
+            return True
+    return False
+
+
+def run(
+    config: Config, add: typing.Callable[[ImportGroups, ImportStatement], bool]
+) -> None:
+    groups = ImportGroups.from_config(config)
+    for i in STATEMENTS:
+        add(groups, i)
+
+
+def main() -> None:
+    deactivate_all_plugins()
+
+    print(f"{len(STATEMENTS)} statements")
+    for n in (4, 8, 16, 32, 64):
+        config = get_config(n)
+        # warm up classification caches
+        run(config, ImportGroups.add_statement)
+
+        print(f"{n} groups")
+        for label, add in (
+            ("sorted", add_sorted),
+            ("dispatch plan", ImportGroups.add_statement),
+        ):
+            duration = min(timeit.repeat(lambda: run(config, add), number=10, repeat=5))
+            print(f"  {label:<15}{duration / 10 * 1e3:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
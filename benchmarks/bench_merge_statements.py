@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark merging statements with the same stem such as in generated
+``__init__.py`` files re-exporting many names from a single module
+
+Compares single pass ``merge_statements`` with adding all statements
+together and then deduplicating their leafs.
+
+Usage::
+
+    python benchmarks/bench_merge_statements.py
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+import operator
+import timeit
+import typing
+from functools import reduce
+
+from importanize.statements import ImportLeaf, ImportStatement, merge_statements
+
+
+def get_statements(n: int) -> typing.List[ImportStatement]:
+    # every tenth leaf repeats the previous one
+    return [
+        ImportStatement(
+            "package.module",
+            leafs=[ImportLeaf(f"name{i - i % 10 if i % 10 == 1 else i}")],
+            line_numbers=[i],
+            inline_comments=["noqa"],
+        )
+        for i in range(n)
+    ]
+
+
+def merge_add(statements: typing.List[ImportStatement]) -> None:
+    reduce(operator.add, statements).unique_leafs
+
+
+def merge_single_pass(statements: typing.List[ImportStatement]) -> None:
+    merge_statements(statements).unique_leafs
+
+
+def main() -> None:
+    for n in (100, 1000, 10000):
+        statements = get_statements(n)
+
+        print(f"{n} leafs")
+        for label, merge in (("add", merge_add), ("single pass", merge_single_pass)):
+            duration = min(timeit.repeat(lambda: merge(statements), number=1, repeat=3))
+            print(f"  {label:<15}{duration * 1e3:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark per statement overhead of plugin hooks when no active plugin
+implements them such as with ``--no-plugins``
+
+Compares dispatching all hooks via ``pluggy`` regardless whether they have
+any implementations with skipping hooks without implementations.
+
+Usage::
+
+    python benchmarks/bench_plugin_hooks.py
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+import timeit
+from unittest import mock
+
+from importanize.groups import RemainderGroup
+from importanize.plugins import ImportanizeSpec, deactivate_all_plugins
+from importanize.statements import ImportLeaf, ImportStatement
+
+
+STATEMENTS = [
+    ImportStatement(f"package{i}", leafs=[ImportLeaf("a"), ImportLeaf("b")])
+    for i in range(1000)
+]
+# statement_gt_overwrite switches to comparison sorting when implemented
+# hence it is excluded to only measure dispatch overhead
+DISPATCHED_HOOKS = {
+    i
+    for i in vars(ImportanizeSpec)
+    if not i.startswith("_") and i != "statement_gt_overwrite"
+}
+
+
+def run() -> None:
+    RemainderGroup(statements=list(STATEMENTS)).formatted()
+
+
+def main() -> None:
+    deactivate_all_plugins()
+
+    print(f"{len(STATEMENTS)} statements")
+    skip = min(timeit.repeat(run, number=5, repeat=5)) / 5
+    with mock.patch("importanize.plugins.IMPLEMENTED_HOOKS", DISPATCHED_HOOKS):
+        dispatch = min(timeit.repeat(run, number=5, repeat=5)) / 5
+
+    for label, duration in (("dispatch", dispatch), ("skip", skip)):
+        print(
+            f"  {label:<15}{duration * 1e3:>10.3f} ms"
+            f"{duration / len(STATEMENTS) * 1e6:>10.3f} us/statement"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark classifying stdlib modules with static table of stdlib module names
+compared to finding modules on the filesystem
+
+Classified modules are cleared before each run so that each run measures
+cold classification of all modules as in a fresh importanize process.
+Site packages index is built once before timing.
+
+Usage::
+
+    python benchmarks/bench_stdlib.py
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+import timeit
+
+from importanize.stdlib import STDLIB_MODULE_NAMES
+from importanize.utils import classify_module, module_classifier
+
+
+MODULES = sorted(i for i in STDLIB_MODULE_NAMES if not i.startswith("_")) + [
+    "click",
+    "pluggy",
+    "importanize",
+    "not_installed_module",
+]
+
+
+def classify_all(static_stdlib: bool) -> None:
+    module_classifier.modules.clear()
+    for i in MODULES:
+        classify_module(i, static_stdlib=static_stdlib)
+
+
+def main() -> None:
+    module_classifier.get_site_packages_index()
+    print(f"{len(MODULES)} modules")
+    for label, static_stdlib in (("find_spec", False), ("static", True)):
+        duration = min(
+            timeit.repeat(lambda: classify_all(static_stdlib), number=1, repeat=5)
+        )
+        print(f"  {label:<15}{duration * 1e3:>10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
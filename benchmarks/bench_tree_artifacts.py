@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark extracting artifacts from large parsed file trees
+
+Compares streaming ``get_tree_artifacts`` with materializing
+all tree leafs before looking for artifacts.
+
+Usage::
+
+    python benchmarks/bench_tree_artifacts.py [path ...]
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+import lib2to3.pgen2.token
+import lib2to3.pytree
+import sys
+import timeit
+import tracemalloc
+import typing
+
+from importanize.parser import get_first_line, get_tree_artifacts, parse_to_tree
+from importanize.plugins import deactivate_all_plugins
+
+
+def generate_text(n: int = 5000) -> str:
+    return (
+        '"""\nLarge module\n"""\nimport os\nfrom foo import (\n    bar,\n    baz,\n)\n\n'
+        + "".join(
+            f"\n\ndef function_{i}(a, b):\n    return os.path.join(a, b, {i!r})\n"
+            for i in range(n)
+        )
+    )
+
+
+def materialized_artifacts(tree: lib2to3.pytree.Node) -> typing.Tuple[str, int]:
+    pre_order = list(tree.leaves())
+    sep = next(
+        (i.value for i in pre_order if i.type == lib2to3.pgen2.token.NEWLINE), "\n"
+    )
+    first_node = next(
+        i
+        for i in pre_order
+        if i.type not in {lib2to3.pgen2.token.NEWLINE, lib2to3.pgen2.token.STRING}
+    )
+    return sep, get_first_line(first_node.get_lineno(), first_node.prefix)
+
+
+def measure(
+    f: typing.Callable[[], typing.Any], number: int
+) -> typing.Tuple[float, int]:
+    duration = min(timeit.repeat(f, number=number, repeat=5)) / number
+    tracemalloc.start()
+    f()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return duration, peak
+
+
+def main(paths: typing.List[str]) -> None:
+    deactivate_all_plugins()
+
+    texts = {"<generated>": generate_text()}
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as fid:
+            texts[path] = fid.read()
+
+    for name, text in texts.items():
+        tree = parse_to_tree(text)
+        artifacts = get_tree_artifacts(tree, text)
+        assert materialized_artifacts(tree) == (artifacts.sep, artifacts.first_line)
+
+        print(f"{name} ({len(text.splitlines())} lines)")
+        for label, f in (
+            ("materialized", lambda: materialized_artifacts(tree)),
+            ("streaming", lambda: get_tree_artifacts(tree, text)),
+        ):
+            duration, peak = measure(f, number=20)
+            print(f"  {label:<15}{duration * 1e3:>10.3f} ms{peak / 1024:>12.1f} KiB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
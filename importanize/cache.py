@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+import hashlib
+import itertools
+import json
+import logging
+import os
+import pathlib
+import pickle
+import sys
+import tempfile
+import typing
+from collections import OrderedDict
+from contextlib import suppress
+
+from . import __version__
+from .parser import Artifacts, Parser
+from .plugins import plugin_manager
+from .statements import ImportStatement
+from .utils import ModuleClassifier, module_classifier
+
+
+log = logging.getLogger(__name__)
+
+CacheValue = typing.Tuple[Artifacts, typing.List[ImportStatement]]
+
+
+def get_default_cache_dir() -> pathlib.Path:
+    """
+    Get directory where parse cache is stored on disk by default
+    """
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join("~", ".cache")
+    return pathlib.Path(root).expanduser() / "importanize"
+
+
+class ParseCache:
+    """
+    Content-addressed cache of imports and artifacts parsed from code text
+
+    Values are kept pickled in memory LRU cache and optionally
+    in cache directory on disk. Each hit is unpickled so that
+    cached values cannot be changed by callers.
+
+    Total size of disk cache is estimated in index file so that
+    cache directory is only scanned when estimate exceeds its size limit.
+    """
+
+    MAX_MEMORY_SIZE = 64 * 1024 * 1024
+    MAX_DISK_SIZE = 256 * 1024 * 1024
+    INDEX_NAME = "index.json"
+
+    def __init__(
+        self,
+        path: pathlib.Path = None,
+        max_memory_size: int = MAX_MEMORY_SIZE,
+        max_disk_size: int = MAX_DISK_SIZE,
+    ):
+        self.path = path
+        self.max_memory_size = max_memory_size
+        self.max_disk_size = max_disk_size
+
+        self.memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self.memory_size = 0
+        # bytes written to disk cache since it was last pruned
+        self.written_size = 0
+
+    def get_key(self, text: str, parser: typing.Type[Parser]) -> str:
+        """
+        Get cache key for code text parsed by given parser engine
+
+        Key accounts for everything which can change parsed values
+        such as importanize version and activated plugins.
+        """
+        plugins = sorted(
+            f"{name}=={getattr(plugin, 'version', '')}"
+            for name, plugin in plugin_manager.list_name_plugin()
+        )
+        version = "{}|{}|{}.{}|{}".format(
+            __version__, parser.name, *sys.version_info[:2], ",".join(plugins)
+        )
+
+        digest = hashlib.sha256(version.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8", "surrogateescape"))
+        return digest.hexdigest()
+
+    def get_disk_path(self, key: str) -> pathlib.Path:
+        assert self.path is not None
+        return self.path / f"{key}.pickle"
+
+    def get(self, key: str) -> typing.Optional[CacheValue]:
+        data = self.memory.get(key)
+
+        if data is not None:
+            self.memory.move_to_end(key)
+
+        elif self.path is not None:
+            path = self.get_disk_path(key)
+            with suppress(OSError):
+                data = path.read_bytes()
+                # mark as recently used for pruning
+                os.utime(str(path))
+            if data is not None:
+                self.set_memory(key, data)
+
+        if data is None:
+            return None
+
+        try:
+            return typing.cast(CacheValue, pickle.loads(data))
+        except Exception as e:
+            log.debug(f"Could not load cached {key} {e}")
+            return None
+
+    def set(
+        self, key: str, artifacts: Artifacts, imports: typing.List[ImportStatement]
+    ) -> None:
+        data = pickle.dumps((artifacts, imports), protocol=pickle.HIGHEST_PROTOCOL)
+        self.set_memory(key, data)
+
+        if self.path is None:
+            return
+
+        try:
+            # cached values are unpickled hence only owner can write them
+            self.path.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(self.path), suffix=".tmp")
+        except OSError as e:
+            log.debug(f"Could not write cache {key} {e}")
+            return
+
+        # write atomically so concurrent runs never read partial files
+        try:
+            with os.fdopen(fd, "wb") as fid:
+                fid.write(data)
+            os.replace(tmp_path, str(self.get_disk_path(key)))
+        except OSError as e:
+            log.debug(f"Could not write cache {key} {e}")
+            with suppress(OSError):
+                os.remove(tmp_path)
+        else:
+            self.written_size += len(data)
+
+    def set_memory(self, key: str, data: bytes) -> None:
+        if key in self.memory:
+            self.memory_size -= len(self.memory.pop(key))
+        self.memory[key] = data
+        self.memory_size += len(data)
+
+        while self.memory_size > self.max_memory_size and self.memory:
+            _, evicted = self.memory.popitem(last=False)
+            self.memory_size -= len(evicted)
+
+    def get_index_path(self) -> pathlib.Path:
+        assert self.path is not None
+        return self.path / self.INDEX_NAME
+
+    def load_size(self) -> typing.Optional[int]:
+        """
+        Load estimated size of disk cache from its index file
+        """
+        try:
+            return int(json.loads(self.get_index_path().read_bytes())["size"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save_size(self, size: int) -> None:
+        with suppress(OSError):
+            self.get_index_path().write_text(json.dumps({"size": size}))
+
+    def prune(self) -> None:
+        """
+        Remove least recently used files until disk cache fits its size limit
+
+        Cache directory is only scanned when estimated size of disk cache
+        exceeds size limit or when estimate is missing.
+        """
+        if self.path is None or not self.written_size:
+            return
+
+        written_size, self.written_size = self.written_size, 0
+        estimated_size = self.load_size()
+        if estimated_size is not None:
+            estimated_size += written_size
+            if estimated_size <= self.max_disk_size:
+                self.save_size(estimated_size)
+                return
+
+        files = []
+        for i in self.path.glob("*.pickle"):
+            with suppress(OSError):
+                stat = i.stat()
+                files.append((stat.st_mtime, stat.st_size, i))
+
+        size = sum(i[1] for i in files)
+        for _, file_size, path in sorted(files, key=lambda i: i[0]):
+            if size <= self.max_disk_size:
+                break
+            with suppress(OSError):
+                path.unlink()
+                size -= file_size
+
+        self.save_size(size)
+
+
+def get_interpreter_fingerprint() -> str:
+    """
+    Get fingerprint of the running interpreter and of its installed packages
+
+    Fingerprint changes whenever any package is installed or removed
+    since that changes modification time of its site-packages directory.
+    """
+    site_packages_mtimes = []
+    for i in sys.path:
+        if "site-packages" not in pathlib.Path(i).parts:
+            continue
+        with suppress(OSError):
+            site_packages_mtimes.append(f"{i}={os.stat(i).st_mtime_ns}")
+
+    digest = hashlib.sha256(
+        "\0".join([__version__, sys.executable, sys.version]).encode("utf-8")
+    )
+    digest.update(b"\0")
+    digest.update(hashlib.sha256("\0".join(sys.path).encode("utf-8")).digest())
+    digest.update("\0".join(site_packages_mtimes).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ClassificationCache:
+    """
+    Cache of modules classification persisted on disk across runs
+
+    All classified modules are stored in a single file per interpreter
+    fingerprint so that whole cache is loaded in one read at startup.
+    Installing or removing packages changes fingerprint which invalidates
+    previously classified modules.
+    """
+
+    MAX_FILES = 16
+
+    def __init__(
+        self,
+        path: pathlib.Path = None,
+        classifier: ModuleClassifier = module_classifier,
+        max_files: int = MAX_FILES,
+    ):
+        self.path = path
+        self.classifier = classifier
+        self.max_files = max_files
+
+    def get_disk_path(self) -> pathlib.Path:
+        assert self.path is not None
+        return self.path / f"classify-{get_interpreter_fingerprint()}.json"
+
+    def load(self) -> None:
+        if self.path is None:
+            return
+
+        try:
+            data = json.loads(self.get_disk_path().read_bytes())
+            self.classifier.load(data)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.debug(f"Could not load classification cache {e}")
+
+    def save(self) -> None:
+        if self.path is None or not self.classifier.is_changed:
+            return
+
+        data = json.dumps(self.classifier.dump()).encode("utf-8")
+        path = self.get_disk_path()
+
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(self.path), suffix=".tmp")
+        except OSError as e:
+            log.debug(f"Could not write classification cache {e}")
+            return
+
+        # write atomically so concurrent runs never read partial files
+        try:
+            with os.fdopen(fd, "wb") as fid:
+                fid.write(data)
+            os.replace(tmp_path, str(path))
+        except OSError as e:
+            log.debug(f"Could not write classification cache {e}")
+            with suppress(OSError):
+                os.remove(tmp_path)
+            return
+
+        self.classifier.is_changed = False
+        self.prune()
+
+    def prune(self) -> None:
+        """
+        Remove oldest files of stale fingerprints beyond files limit
+        """
+        if self.path is None or not self.path.is_dir():
+            return
+
+        files = []
+        for i in self.path.glob("classify-*.json"):
+            with suppress(OSError):
+                files.append((i.stat().st_mtime, i))
+
+        files.sort(key=lambda i: i[0], reverse=True)
+        for _, path in itertools.islice(files, self.max_files, None):
+            with suppress(OSError):
+                path.unlink()
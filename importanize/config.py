@@ -12,10 +12,15 @@ from dataclasses import dataclass
 
 from . import formatters
 from .formatters import FORMATTERS
-from .groups import GROUPS
-from .parser import ParseError, parse_imports
+from .groups import GROUPS, DispatchPlan, PackagesTrie, PatternsMatcher
+from .parser import PARSERS, HeaderParser, ParseError, Parser, parse_imports
 from .plugins import DEFAULT_PLUGIN_NAMES, INSTALLED_PLUGIN_NAMES
 from .statements import ImportStatement
+from .utils import (
+    EnvironmentModuleClassifier,
+    get_module_classifier,
+    get_python_executable,
+)
 
 
 IMPORTANIZE_HIDDEN_CONFIG = ".importanizerc"
@@ -70,6 +75,9 @@ class Config:
     after_imports_new_lines: int = 2
     length: int = 80
     formatter: typing.Type[formatters.Formatter] = formatters.GroupedFormatter
+    parser: typing.Type[Parser] = HeaderParser
+    static_stdlib: bool = True
+    python_env: typing.Optional[str] = None
     groups: typing.Iterable[GroupConfig] = (
         GroupConfig(type="stdlib"),
         GroupConfig(type="sitepackages"),
@@ -85,6 +93,34 @@ class Config:
     def default(cls) -> "Config":
         return cls()
 
+    @property
+    def dispatch_plan(self) -> DispatchPlan:
+        try:
+            return self._dispatch_plan
+        except AttributeError:
+            self._dispatch_plan: DispatchPlan = DispatchPlan(
+                [GROUPS[i.type] for i in self.groups]
+            )
+            return self._dispatch_plan
+
+    @property
+    def packages_trie(self) -> PackagesTrie:
+        try:
+            return self._packages_trie
+        except AttributeError:
+            self._packages_trie: PackagesTrie = PackagesTrie.from_groups(self.groups)
+            return self._packages_trie
+
+    @property
+    def patterns_matcher(self) -> PatternsMatcher:
+        try:
+            return self._patterns_matcher
+        except AttributeError:
+            self._patterns_matcher: PatternsMatcher = PatternsMatcher.from_groups(
+                self.groups
+            )
+            return self._patterns_matcher
+
     @property
     def relpath(self) -> str:
         return os.path.relpath(self.path) if self.path else "<default pep8>"
@@ -136,6 +172,31 @@ class Config:
                 f"Only {', '.join(FORMATTERS.keys())} are supported."
             ) from e
 
+    @classmethod
+    def _parse_parser(cls, parser: typing.Optional[str]) -> typing.Type[Parser]:
+        try:
+            return PARSERS[parser] if parser else cls.parser
+        except KeyError as e:
+            raise InvalidConfig(
+                f"{parser!r} is unsupported parser. "
+                f"Only {', '.join(PARSERS.keys())} are supported."
+            ) from e
+
+    @classmethod
+    def _parse_python_env(
+        cls, python_env: typing.Optional[str], path: pathlib.Path = None
+    ) -> typing.Optional[str]:
+        if not python_env:
+            return None
+        # relative environments are relative to config file
+        python_path = pathlib.Path(python_env).expanduser()
+        if path is not None and not python_path.is_absolute():
+            python_path = path.parent / python_path
+        try:
+            return get_python_executable(str(python_path))
+        except ValueError as e:
+            raise InvalidConfig(f"{e}") from e
+
     @classmethod
     def _parse_length(cls, length: str) -> int:
         try:
@@ -199,6 +260,9 @@ class Config:
             ),
             length=cls._parse_length(loaded_data.get("length", str(cls.length))),
             formatter=cls._parse_formatter(loaded_data.get("formatter", "")),
+            parser=cls._parse_parser(loaded_data.get("parser", "")),
+            static_stdlib=bool(loaded_data.get("static_stdlib", cls.static_stdlib)),
+            python_env=cls._parse_python_env(loaded_data.get("python_env"), path),
             groups=groups or cls.groups,
             exclude=loaded_data.get("exclude", cls.exclude),
             add_imports=cls._parse_add_imports(
@@ -257,6 +321,12 @@ class Config:
             ),
             length=cls._parse_length(loaded_data.get("length", str(cls.length))),
             formatter=cls._parse_formatter(loaded_data.get("formatter", "")),
+            parser=cls._parse_parser(loaded_data.get("parser", "")),
+            static_stdlib=(
+                str(loaded_data.get("static_stdlib", cls.static_stdlib)).lower()
+                == "true"
+            ),
+            python_env=cls._parse_python_env(loaded_data.get("python_env"), path),
             groups=groups or cls.groups,
             exclude=[
                 i.strip()
@@ -372,6 +442,8 @@ class Config:
     def merge(self, other: "Config") -> "Config":
         self.length = other.length
         self.formatter = other.formatter
+        self.parser = other.parser
+        self.python_env = other.python_env
         self.add_imports = other.add_imports
         self.are_plugins_allowed = (
             other.are_plugins_allowed
@@ -380,6 +452,18 @@ class Config:
         )
         return self
 
+    def check_python_env(self) -> None:
+        """
+        Check that python environment used to classify imports can be inspected
+        """
+        classifier = get_module_classifier(self.python_env)
+        if not isinstance(classifier, EnvironmentModuleClassifier):
+            return
+        try:
+            classifier.get_environment_index()
+        except ValueError as e:
+            raise InvalidConfig(f"{e}") from e
+
     def as_dict(self) -> typing.Dict[str, typing.Any]:
         return {
             "path": str(self.relpath or ""),
@@ -387,6 +471,9 @@ class Config:
             "after_imports_new_lines": self.after_imports_new_lines,
             "length": self.length,
             "formatter": self.formatter.name,
+            "parser": self.parser.name,
+            "static_stdlib": self.static_stdlib,
+            "python_env": self.python_env or "",
             "groups": [i.as_dict() for i in self.groups],
             "exclude": list(self.exclude),
             "add_imports": [str(i) for i in self.add_imports],
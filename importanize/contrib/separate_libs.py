@@ -22,17 +22,10 @@ class SeparateLibsPlugin(ImportanizePlugin):
     enabled_for_pipes = True
 
     @hookimpl
-    def statement_gt_overwrite(
-        self, a: "ImportStatement", b: "ImportStatement", result: bool
-    ) -> typing.Optional[bool]:
-        self_len = len(a.leafs)
-        other_len = len(b.leafs)
-        if any([not self_len and other_len, self_len and not other_len]):
-            if a.root_module == b.root_module:
-                return a._gt(b)
-            else:
-                return a.full_stem > b.full_stem
-        return None
+    def statement_sort_key(self, statement: "ImportStatement") -> str:
+        # libs are sorted together regardless whether
+        # they use ``import ..`` or ``from .. import ..``
+        return statement.root_module
 
     @hookimpl
     def group_append_to_statement(
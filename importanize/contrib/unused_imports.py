@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 import ast
-import lib2to3.pytree
 import logging
 import typing
 from dataclasses import dataclass
@@ -34,15 +33,14 @@ class UnusedImportsPlugin(ImportanizePlugin):
     enabled_for_pipes = False
 
     @hookimpl
-    def inject_tree_artifacts(
-        self, artifacts: "Artifacts", tree: lib2to3.pytree.Node, text: str
+    def inject_ast_artifacts(
+        self, artifacts: "Artifacts", tree: ast.Module, text: str
     ) -> "Artifacts":
         a = typing.cast(UnsusedImportsArtifacts, artifacts)
 
         a.unused_imports = []
 
-        ast_tree = ast.parse(text)
-        warnings = pyflakes.checker.Checker(ast_tree)
+        warnings = pyflakes.checker.Checker(tree)
         unused_imports = [
             i
             for i in warnings.messages
@@ -54,30 +52,55 @@ class UnusedImportsPlugin(ImportanizePlugin):
         return typing.cast("Artifacts", a)
 
     @hookimpl
+    def filter_statements(
+        self, group: "BaseImportGroup", statements: typing.List["ImportStatement"]
+    ) -> typing.List[bool]:
+        unused_imports = self._get_unused_imports(group)
+
+        return [
+            any("noqa" in i for i in statement.inline_comments)
+            or self._should_include_str(unused_imports, statement.full_stem)
+            for statement in statements
+        ]
+
+    @hookimpl
+    def filter_leafs(
+        self,
+        group: "BaseImportGroup",
+        statement: "ImportStatement",
+        leafs: typing.Sequence["ImportLeaf"],
+    ) -> typing.List[bool]:
+        unused_imports = self._get_unused_imports(group)
+
+        if any("noqa" in i for i in statement.inline_comments):
+            return [True] * len(leafs)
+
+        sep = "" if statement.stem.endswith(".") else "."
+        return [
+            any("noqa" in i for i in leaf.statement_comments)
+            or self._should_include_str(
+                unused_imports, f"{statement.stem}{sep}{leaf.full_name}"
+            )
+            for leaf in leafs
+        ]
+
     def should_include_statement(
         self, group: "BaseImportGroup", statement: "ImportStatement"
     ) -> bool:
-        if any("noqa" in i for i in statement.inline_comments):
-            return True
+        return self.filter_statements(group, [statement])[0]
 
-        return self._should_include_str(group, statement.full_stem)
-
-    @hookimpl
     def should_include_leaf(
         self, group: "BaseImportGroup", statement: "ImportStatement", leaf: "ImportLeaf"
     ) -> bool:
-        if any(
-            [
-                any("noqa" in i for i in statement.inline_comments),
-                any("noqa" in i for i in leaf.statement_comments),
-            ]
-        ):
-            return True
+        return self.filter_leafs(group, statement, [leaf])[0]
 
-        sep = "" if statement.stem.endswith(".") else "."
-        return self._should_include_str(group, f"{statement.stem}{sep}{leaf.full_name}")
+    def _get_unused_imports(self, group: "BaseImportGroup") -> typing.Set[str]:
+        return set(getattr(group.artifacts, "unused_imports", []))
+
+    def _should_include_str(self, unused_imports: typing.Set[str], data: str) -> bool:
+        if not unused_imports:
+            return True
 
-    def _should_include_str(self, group: "BaseImportGroup", data: str) -> bool:
         components = data.split(" as ")[-1].split(".")
         possibilities = (
             [data]
@@ -86,7 +109,7 @@ class UnusedImportsPlugin(ImportanizePlugin):
         )
 
         for p in possibilities:
-            if p in getattr(group.artifacts, "unused_imports", []):
+            if p in unused_imports:
                 log.debug(f"Removing {data!r} as it is unused")
                 return False
 
@@ -1,18 +1,59 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 import abc
+import io
 import itertools
 import typing
-from copy import deepcopy
+from collections import OrderedDict
 
 from .parser import Artifacts
 from .statements import ImportLeaf, ImportStatement
+from .utils import list_set
 
 
 if typing.TYPE_CHECKING:
     from .config import Config
 
 
+class StatementView(typing.NamedTuple):
+    """
+    Lightweight view of import statement as it is formatted
+
+    Formatters overwrite leafs and comments of the statement via the view
+    without copying the statement itself or any of its leafs.
+    """
+
+    statement: ImportStatement
+    leafs: typing.Sequence[ImportLeaf]
+    standalone_comments: typing.Sequence[str]
+    inline_comments: typing.Sequence[str]
+    # inline comments of leafs which are used instead of leafs own comments
+    leafs_inline_comments: typing.Mapping[ImportLeaf, typing.Sequence[str]] = {}
+
+    @classmethod
+    def from_statement(cls, statement: ImportStatement) -> "StatementView":
+        return cls(
+            statement=statement,
+            leafs=statement.unique_leafs,
+            standalone_comments=statement.standalone_comments,
+            inline_comments=statement.all_inline_comments,
+        )
+
+    @property
+    def stem(self) -> str:
+        return self.statement.stem
+
+    def get_leaf_inline_comments(self, leaf: ImportLeaf) -> typing.Sequence[str]:
+        return self.leafs_inline_comments.get(leaf, leaf.inline_comments)
+
+    def as_string(self) -> str:
+        if not self.leafs or self.leafs is self.statement.unique_leafs:
+            return self.statement.as_string()
+        return "from {} import {}".format(
+            self.stem, ", ".join(i.as_string() for i in self.leafs)
+        )
+
+
 class Formatter(metaclass=abc.ABCMeta):
     """
     Parent class for all formatters
@@ -21,18 +62,30 @@ class Formatter(metaclass=abc.ABCMeta):
     name: str
 
     def __init__(
-        self, statement: "ImportStatement", config: "Config", artifacts: "Artifacts"
+        self,
+        statement: "ImportStatement",
+        config: "Config",
+        artifacts: "Artifacts",
+        view: StatementView = None,
     ):
-        self.statement = self.normalize_statement(statement)
+        self.statement = statement
+        self.view = view if view is not None else self.get_view(statement)
         self.config = config
         self.artifacts = artifacts
 
-    def normalize_statement(self, statement: "ImportStatement") -> "ImportStatement":
-        return statement
+    def get_view(self, statement: "ImportStatement") -> StatementView:
+        return StatementView.from_statement(statement)
 
-    @abc.abstractmethod
     def format(self) -> str:
+        writer = io.StringIO()
+        self.write(writer)
+        return writer.getvalue()
+
+    @abc.abstractmethod
+    def write(self, writer: typing.TextIO) -> None:
         """
+        Write formatted statement fragments into the writer
+
         Subclasses must implement
         """
 
@@ -55,19 +108,29 @@ class GroupedFormatter(Formatter):
     name = "grouped"
 
     def __init__(
-        self, statement: ImportStatement, config: "Config", artifacts: "Artifacts"
+        self,
+        statement: ImportStatement,
+        config: "Config",
+        artifacts: "Artifacts",
+        view: StatementView = None,
     ):
-        super().__init__(statement=statement, config=config, artifacts=artifacts)
+        super().__init__(
+            statement=statement, config=config, artifacts=artifacts, view=view
+        )
 
-        self.leafs: typing.List[ImportLeaf] = self.statement.unique_leafs
-        self.stem: str = self.statement.stem
-        self.standalone_comments: typing.List[str] = self.statement.standalone_comments
-        self.all_inline_comments: typing.List[str] = self.statement.all_inline_comments
-        self.string: str = self.statement.as_string()
+        self.leafs: typing.Sequence[ImportLeaf] = self.view.leafs
+        self.stem: str = self.view.stem
+        self.standalone_comments: typing.Sequence[str] = self.view.standalone_comments
+        self.all_inline_comments: typing.Sequence[str] = self.view.inline_comments
+        self.string: str = self.view.as_string()
 
-        self.all_comments: typing.List[str] = self.all_inline_comments + list(
+        self.all_comments: typing.List[str] = list(
             itertools.chain(
-                *[i.standalone_comments + i.inline_comments for i in self.leafs]
+                self.all_inline_comments,
+                *[
+                    (*i.standalone_comments, *self.view.get_leaf_inline_comments(i))
+                    for i in self.leafs
+                ],
             )
         )
 
@@ -82,13 +145,20 @@ class GroupedFormatter(Formatter):
     def get_leaf_separator(self, stem: str) -> str:
         return f"{self.artifacts.sep}    "
 
-    def format_as_one_liner(self) -> str:
-        string = self.format_statement_standalone_comments() + self.string
-
+    def get_one_liner(self) -> str:
+        """
+        One liner statement without its standalone comments
+        """
         if self.all_comments:
-            string += "  # {}".format(" ".join(self.all_comments)).rstrip()
+            return self.string + "  # {}".format(" ".join(self.all_comments)).rstrip()
+        return self.string
 
-        return string
+    def format_as_one_liner(self) -> str:
+        return self.format_statement_standalone_comments() + self.get_one_liner()
+
+    def write_as_one_liner(self, writer: typing.TextIO) -> None:
+        writer.write(self.format_statement_standalone_comments())
+        writer.write(self.get_one_liner())
 
     def format_stem(self) -> str:
         return f"from {self.stem} import ("
@@ -130,8 +200,9 @@ class GroupedFormatter(Formatter):
     def format_leaf_inline_comments(self, leaf: "ImportLeaf", sep: str) -> str:
         string = ""
 
-        if leaf.inline_comments:
-            string += "  # {}".format(" ".join(leaf.inline_comments)).rstrip()
+        inline_comments = self.view.get_leaf_inline_comments(leaf)
+        if inline_comments:
+            string += "  # {}".format(" ".join(inline_comments)).rstrip()
 
         return string
 
@@ -139,29 +210,34 @@ class GroupedFormatter(Formatter):
         return f"{self.artifacts.sep})"
 
     def format_as_grouped(self) -> str:
-        string = self.format_statement_standalone_comments()
-        string += self.format_stem()
-        sep = self.get_leaf_separator(string.splitlines()[-1])
-        string += self.format_statement_inline_comments(sep)
+        writer = io.StringIO()
+        self.write_as_grouped(writer)
+        return writer.getvalue()
+
+    def write_as_grouped(self, writer: typing.TextIO) -> None:
+        writer.write(self.format_statement_standalone_comments())
+        stem = self.format_stem()
+        writer.write(stem)
+        sep = self.get_leaf_separator(stem)
+        writer.write(self.format_statement_inline_comments(sep))
 
         for leaf in self.leafs:
-            string += self.format_leaf_start(leaf, sep)
-            string += self.format_leaf_standalone_comments(leaf, sep)
-            string += self.format_leaf(leaf, sep)
-            string += self.format_leaf_inline_comments(leaf, sep)
-            string += self.format_leaf_end(leaf, sep)
+            writer.write(self.format_leaf_start(leaf, sep))
+            writer.write(self.format_leaf_standalone_comments(leaf, sep))
+            writer.write(self.format_leaf(leaf, sep))
+            writer.write(self.format_leaf_inline_comments(leaf, sep))
+            writer.write(self.format_leaf_end(leaf, sep))
 
-        string += self.format_wrap_up()
+        writer.write(self.format_wrap_up())
 
-        return string
+    def write(self, writer: typing.TextIO) -> None:
+        one_liner = self.get_one_liner()
 
-    def format(self) -> str:
-        one_liner = self.format_as_one_liner()
-
-        if self.do_grouped_formatting(one_liner.splitlines()[-1]):
-            return self.format_as_grouped()
+        if self.do_grouped_formatting(one_liner):
+            self.write_as_grouped(writer)
         else:
-            return one_liner
+            writer.write(self.format_statement_standalone_comments())
+            writer.write(one_liner)
 
 
 class GroupedInlineAlignedFormatter(GroupedFormatter):
@@ -213,8 +289,15 @@ class GroupedInlineAlignedFormatter(GroupedFormatter):
             return GroupedFormatter(statement, **kwargs)
         return typing.cast(GroupedInlineAlignedFormatter, super().__new__(cls))
 
-    def normalize_statement(self, statement: "ImportStatement") -> "ImportStatement":
-        if all(
+    def get_view(self, statement: "ImportStatement") -> StatementView:
+        """
+        Move statement inline comments to its first leaf
+
+        First leaf is aligned with the statement hence
+        its inline comments are the statement comments.
+        """
+        view = super().get_view(statement)
+        if not all(
             [
                 statement.all_inline_comments,
                 (
@@ -224,12 +307,19 @@ class GroupedInlineAlignedFormatter(GroupedFormatter):
                 ),
             ]
         ):
-            statement = deepcopy(statement)
-            statement.leafs[0].inline_comments.extend(statement.all_inline_comments)
-            statement.inline_comments = []
-            for i in statement.leafs:
-                i.statement_comments = []
-        return statement
+            return view
+
+        key = (statement.leafs[0].name, statement.leafs[0].as_name)
+        same = [i for i in statement.leafs if (i.name, i.as_name) == key]
+        leaf = next(i for i in view.leafs if (i.name, i.as_name) == key)
+        comments = statement.all_inline_comments + list(leaf.inline_comments)
+        return view._replace(
+            inline_comments=(),
+            # comments of duplicate leafs are merged as ordered sets
+            leafs_inline_comments={
+                leaf: list_set(comments) if len(same) > 1 else comments
+            },
+        )
 
     def format_leaf_start(self, leaf: "ImportLeaf", sep: str) -> str:
         return ""
@@ -269,35 +359,44 @@ class LinesFormatter(Formatter):
     name = "lines"
 
     def __init__(
-        self, statement: "ImportStatement", config: "Config", artifacts: "Artifacts"
+        self,
+        statement: "ImportStatement",
+        config: "Config",
+        artifacts: "Artifacts",
+        view: StatementView = None,
     ):
-        super().__init__(statement=statement, config=config, artifacts=artifacts)
-
-        self.statements = self.split_to_statements(self.statement)
+        super().__init__(
+            statement=statement, config=config, artifacts=artifacts, view=view
+        )
 
-    def split_to_statements(
-        self, statement: "ImportStatement"
-    ) -> typing.List["ImportStatement"]:
-        statements = []
+        self.views = self.split_to_views(self.view)
 
-        for i, leaf in enumerate(statement.unique_leafs):
-            s = deepcopy(statement)
-            s.leafs = [leaf]
-            if i:
-                s.standalone_comments = []
-            statements.append(s)
+    def split_to_views(self, view: StatementView) -> typing.List[StatementView]:
+        if not view.leafs:
+            return [view]
 
-        return statements or [statement]
+        return [
+            view._replace(
+                leafs=(leaf,),
+                standalone_comments=() if i else view.standalone_comments,
+                inline_comments=(
+                    list_set(leaf.statement_comments)
+                    + list(view.statement.inline_comments)
+                ),
+            )
+            for i, leaf in enumerate(view.leafs)
+        ]
 
-    def format(self) -> str:
-        return self.artifacts.sep.join(
-            [
-                GroupedFormatter(
-                    statement=statement, config=self.config, artifacts=self.artifacts
-                ).format_as_one_liner()
-                for statement in self.statements
-            ]
-        )
+    def write(self, writer: typing.TextIO) -> None:
+        for i, view in enumerate(self.views):
+            if i:
+                writer.write(self.artifacts.sep)
+            GroupedFormatter(
+                statement=self.statement,
+                config=self.config,
+                artifacts=self.artifacts,
+                view=view,
+            ).write_as_one_liner(writer)
 
 
 FORMATTERS: typing.Dict[str, typing.Type[Formatter]] = {
@@ -309,3 +408,89 @@ FORMATTERS: typing.Dict[str, typing.Type[Formatter]] = {
         and issubclass(formatter, Formatter)
     )
 }
+
+
+class FormattedMemo:
+    """
+    Run-wide LRU memo of formatted statements
+
+    Same import statements are formatted over and over again across files
+    hence formatted text is reused when the same statement, including all of
+    its comments, is formatted by the same formatter with the same settings.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.memo: "OrderedDict[typing.Hashable, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        self.memo.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(
+        self,
+        formatter: typing.Type[Formatter],
+        statement: ImportStatement,
+        config: "Config",
+        artifacts: Artifacts,
+    ) -> typing.Hashable:
+        return (
+            formatter,
+            config.length,
+            artifacts.sep,
+            statement.stem,
+            statement.as_name,
+            tuple(statement.standalone_comments),
+            tuple(statement.inline_comments),
+            # formatters look at original leafs order hence not unique leafs
+            tuple(
+                (
+                    i.name,
+                    i.as_name,
+                    tuple(i.standalone_comments),
+                    tuple(i.inline_comments),
+                    tuple(i.statement_comments),
+                )
+                for i in statement.leafs
+            ),
+        )
+
+    def format(
+        self,
+        formatter: typing.Type[Formatter],
+        statement: ImportStatement,
+        config: "Config",
+        artifacts: Artifacts,
+    ) -> str:
+        key = self.get_key(formatter, statement, config, artifacts)
+
+        try:
+            string = self.memo[key]
+        except KeyError:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.memo.move_to_end(key)
+            return string
+
+        string = formatter(statement, config=config, artifacts=artifacts).format()
+        self.memo[key] = string
+        if len(self.memo) > self.max_size:
+            self.memo.popitem(last=False)
+        return string
+
+    def write(
+        self,
+        formatter: typing.Type[Formatter],
+        statement: ImportStatement,
+        config: "Config",
+        artifacts: Artifacts,
+        writer: typing.TextIO,
+    ) -> None:
+        writer.write(self.format(formatter, statement, config, artifacts))
+
+
+formatted_memo = FormattedMemo()
@@ -1,24 +1,57 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 import abc
+import fnmatch
+import io
 import itertools
+import pathlib
+import re
 import typing
 from collections import OrderedDict, defaultdict
-from functools import reduce
 
+from .formatters import formatted_memo
 from .parser import Artifacts
-from .plugins import plugin_hooks
-from .statements import ImportStatement
-from .utils import is_site_package, is_std_lib
+from .plugins import is_hook_implemented, plugin_hooks
+from .statements import (
+    ImportLeaf,
+    ImportStatement,
+    merge_statements,
+    sort_statements,
+)
+from .utils import get_source_roots_index, is_site_package, is_std_lib
 
 
 if typing.TYPE_CHECKING:
     from .config import Config, GroupConfig
 
+T = typing.TypeVar("T")
+
+
+def filter_by_masks(
+    hook: str, items: typing.Sequence[T], masks: typing.List[typing.List[bool]]
+) -> typing.List[T]:
+    """
+    Filter items by keep masks returned by plugin hooks
+
+    Each mask must have a value for every item as otherwise
+    items would be silently dropped.
+    """
+    for mask in masks:
+        if len(mask) != len(items):
+            raise ValueError(
+                f"{hook!r} plugin hook returned mask with {len(mask)} values "
+                f"for {len(items)} items"
+            )
+    return [i for i, *keep in zip(items, *masks) if all(keep)]
+
 
 class BaseImportGroup(metaclass=abc.ABCMeta):
     name: str
     priority: int
+    # whether statements are added only by their module path
+    # so that decision can be memoized for each module path
+    # subclasses overriding should_add_statement should reconsider it
+    is_dispatch_memoizable: bool = False
 
     def __init__(
         self,
@@ -32,7 +65,8 @@ class BaseImportGroup(metaclass=abc.ABCMeta):
 
         self.statements = statements or []
         self.group_config = group_config or GroupConfig.default()
-        self.config = config or Config.default()
+        # config without path is falsy hence explicit None check
+        self.config = config if config is not None else Config.default()
         self.artifacts = artifacts or Artifacts.default()
 
     @classmethod
@@ -47,8 +81,8 @@ class BaseImportGroup(metaclass=abc.ABCMeta):
         try:
             return self._unique_statements
         except AttributeError:
-            self._unique_statements: typing.List[ImportStatement] = sorted(
-                list(set(self.merged_statements))
+            self._unique_statements: typing.List[ImportStatement] = sort_statements(
+                set(self.merged_statements)
             )
             return self._unique_statements
 
@@ -67,33 +101,16 @@ class BaseImportGroup(metaclass=abc.ABCMeta):
             else:
                 leafless_counter[statement.stem].append(statement)
 
-        merged_statements = list(
-            filter(
-                lambda s: not any(
-                    j is False
-                    for j in plugin_hooks.should_include_statement(
-                        group=self, statement=s
-                    )
-                ),
-                itertools.chain(
-                    *leafless_counter.values(),
-                ),
-            )
+        merged_statements = self.filter_statements(
+            list(itertools.chain(*leafless_counter.values()))
         )
 
         def filter_leafs(statement: ImportStatement) -> ImportStatement:
-            statement.leafs = list(
-                filter(
-                    lambda l: not any(
-                        j is False
-                        for j in plugin_hooks.should_include_leaf(
-                            group=self, statement=statement, leaf=l
-                        )
-                    ),
-                    statement.leafs,
-                )
-            )
-            return statement
+            leafs = self.filter_leafs(statement, statement.leafs)
+            # statements are immutable so filtered leafs need a copy
+            if len(leafs) == len(statement.leafs):
+                return statement
+            return statement.replace(leafs=leafs)
 
         def merge(
             statements: typing.List[ImportStatement],
@@ -109,7 +126,7 @@ class BaseImportGroup(metaclass=abc.ABCMeta):
                     _statements.append(i)
 
             if _statements:
-                merged = filter_leafs(reduce(lambda a, b: a + b, _statements))
+                merged = filter_leafs(merge_statements(_statements))
                 if merged.leafs:
                     _standard.append(merged)
 
@@ -123,6 +140,56 @@ class BaseImportGroup(metaclass=abc.ABCMeta):
     def all_line_numbers(self) -> typing.List[int]:
         return sorted(set(itertools.chain(*[i.line_numbers for i in self.statements])))
 
+    def filter_statements(
+        self, statements: typing.List[ImportStatement]
+    ) -> typing.List[ImportStatement]:
+        """
+        Filter statements by plugins with a single hook call for all statements
+        """
+        masks: typing.List[typing.List[bool]] = []
+        if is_hook_implemented("filter_statements"):
+            masks += plugin_hooks.filter_statements(group=self, statements=statements)
+        if is_hook_implemented("should_include_statement"):
+            # compatibility with plugins which filter statement by statement
+            masks.append(
+                [
+                    not any(
+                        j is False
+                        for j in plugin_hooks.should_include_statement(
+                            group=self, statement=i
+                        )
+                    )
+                    for i in statements
+                ]
+            )
+        return filter_by_masks("filter_statements", statements, masks)
+
+    def filter_leafs(
+        self, statement: ImportStatement, leafs: typing.Sequence[ImportLeaf]
+    ) -> typing.List[ImportLeaf]:
+        """
+        Filter statement leafs by plugins with a single hook call for all leafs
+        """
+        masks: typing.List[typing.List[bool]] = []
+        if is_hook_implemented("filter_leafs"):
+            masks += plugin_hooks.filter_leafs(
+                group=self, statement=statement, leafs=leafs
+            )
+        if is_hook_implemented("should_include_leaf"):
+            # compatibility with plugins which filter leaf by leaf
+            masks.append(
+                [
+                    not any(
+                        j is False
+                        for j in plugin_hooks.should_include_leaf(
+                            group=self, statement=statement, leaf=i
+                        )
+                    )
+                    for i in leafs
+                ]
+            )
+        return filter_by_masks("filter_leafs", leafs, masks)
+
     @abc.abstractmethod
     def should_add_statement(self, statement: ImportStatement) -> bool:
         """Subclass must implement"""
@@ -137,28 +204,42 @@ class BaseImportGroup(metaclass=abc.ABCMeta):
         return self.artifacts.sep.join([i.as_string() for i in self.unique_statements])
 
     def formatted(self) -> str:
-        lines: typing.List[str] = []
+        writer = io.StringIO()
+        self.write(writer)
+        return writer.getvalue()
+
+    def write(self, writer: typing.TextIO) -> None:
+        """
+        Write formatted statements into the writer separated by lines
+        """
+        sep = self.artifacts.sep
+        prepend = is_hook_implemented("group_prepend_to_statement")
+        append = is_hook_implemented("group_append_to_statement")
 
         for i, statement in enumerate(self.unique_statements):
-            lines += filter(
-                lambda x: x is not None,
-                plugin_hooks.group_prepend_to_statement(
+            if i:
+                writer.write(sep)
+            if prepend:
+                for line in plugin_hooks.group_prepend_to_statement(
                     group=self, index=i, statement=statement
-                ),
-            )
-            lines.append(
-                self.config.formatter(
-                    statement, config=self.config, artifacts=self.artifacts
-                ).format()
+                ):
+                    if line is not None:
+                        writer.write(line)
+                        writer.write(sep)
+            formatted_memo.write(
+                self.config.formatter,
+                statement,
+                config=self.config,
+                artifacts=self.artifacts,
+                writer=writer,
             )
-            lines += filter(
-                lambda x: x is not None,
-                plugin_hooks.group_append_to_statement(
+            if append:
+                for line in plugin_hooks.group_append_to_statement(
                     group=self, index=i, statement=statement
-                ),
-            )
-
-        return self.artifacts.sep.join(lines)
+                ):
+                    if line is not None:
+                        writer.write(sep)
+                        writer.write(line)
 
     def __str__(self) -> str:
         return self.as_string()
@@ -170,22 +251,74 @@ class BaseImportGroup(metaclass=abc.ABCMeta):
 class StdLibGroup(BaseImportGroup):
     name: str = "stdlib"
     priority: int = 0
+    is_dispatch_memoizable: bool = True
 
     def should_add_statement(self, statement: ImportStatement) -> bool:
-        return is_std_lib(statement.root_module)
+        return is_std_lib(
+            statement.root_module, self.config.static_stdlib, self.config.python_env
+        )
 
 
 class SitePackagesGroup(BaseImportGroup):
     name: str = "sitepackages"
     priority: int = 2
+    is_dispatch_memoizable: bool = True
 
     def should_add_statement(self, statement: ImportStatement) -> bool:
-        return is_site_package(statement.root_module)
+        return is_site_package(
+            statement.root_module, self.config.static_stdlib, self.config.python_env
+        )
+
+
+class PackagesTrie:
+    """
+    Prefix trie of dotted package paths of all packages groups
+
+    Module is matched to the group of its longest package prefix
+    hence ``foo.bar`` can be grouped separately from ``foo``.
+    Matching takes O(depth) of module path regardless of number of packages.
+    """
+
+    __slots__ = ("children", "group")
+
+    def __init__(self) -> None:
+        self.children: typing.Dict[str, "PackagesTrie"] = {}
+        self.group: typing.Optional["GroupConfig"] = None
+
+    @classmethod
+    def from_groups(cls, groups: typing.Iterable["GroupConfig"]) -> "PackagesTrie":
+        trie = cls()
+        for group in groups:
+            if group.type != PackagesGroup.name:
+                continue
+            for package in group.packages:
+                trie.add(package, group)
+        return trie
+
+    def add(self, package: str, group: "GroupConfig") -> None:
+        node = self
+        for part in package.strip().split("."):
+            node = node.children.setdefault(part, PackagesTrie())
+        # first group to list the package wins same as groups order
+        if node.group is None:
+            node.group = group
+
+    def match(self, module: str) -> typing.Optional["GroupConfig"]:
+        node = self
+        group = None
+        for part in module.split("."):
+            child = node.children.get(part)
+            if child is None:
+                break
+            node = child
+            group = node.group or group
+        return group
 
 
 class PackagesGroup(BaseImportGroup):
     name: str = "packages"
     priority: int = 1
+    is_dispatch_memoizable: bool = True
 
     @classmethod
     def validate_group_config(cls, group: "GroupConfig") -> "GroupConfig":
@@ -194,13 +327,134 @@ class PackagesGroup(BaseImportGroup):
             raise ValueError(msg)
         return super().validate_group_config(group)
 
+    @property
+    def packages_trie(self) -> PackagesTrie:
+        try:
+            return self._packages_trie
+        except AttributeError:
+            # group can be used standalone outside of its config
+            self._packages_trie: PackagesTrie = (
+                self.config.packages_trie
+                if any(i is self.group_config for i in self.config.groups)
+                else PackagesTrie.from_groups([self.group_config])
+            )
+            return self._packages_trie
+
+    def should_add_statement(self, statement: ImportStatement) -> bool:
+        return self.packages_trie.match(statement.stem) is self.group_config
+
+
+class PatternsMatcher:
+    """
+    Matcher of module glob patterns of all pattern groups
+
+    All patterns are compiled into a single regex alternation
+    with named group per import group so each module is matched
+    with a single match call regardless of number of patterns.
+    When multiple groups match, first configured group wins.
+    """
+
+    def __init__(self, groups: typing.List["GroupConfig"]) -> None:
+        self.groups = {f"group{i}": group for i, group in enumerate(groups)}
+        self.regex = re.compile(
+            "|".join(
+                "(?P<{}>{})".format(
+                    name,
+                    "|".join(fnmatch.translate(i.strip()) for i in group.packages),
+                )
+                for name, group in self.groups.items()
+            )
+        )
+
+    @classmethod
+    def from_groups(cls, groups: typing.Iterable["GroupConfig"]) -> "PatternsMatcher":
+        return cls([i for i in groups if i.type == PatternGroup.name and i.packages])
+
+    def match(self, module: str) -> typing.Optional["GroupConfig"]:
+        if not self.groups:
+            return None
+        match = self.regex.match(module)
+        if match is None:
+            return None
+        # translated patterns can have their own inner named groups
+        return next(v for k, v in self.groups.items() if match.group(k) is not None)
+
+
+class PatternGroup(BaseImportGroup):
+    """
+    Group of modules matching any of the group glob patterns
+
+    Patterns are matched against full module path
+    so ``*_pb2`` matches both ``foo_pb2`` and ``foo.bar_pb2``.
+    """
+
+    name: str = "pattern"
+    priority: int = 1
+    is_dispatch_memoizable: bool = True
+
+    @classmethod
+    def validate_group_config(cls, group: "GroupConfig") -> "GroupConfig":
+        if not group.packages:
+            msg = f'"{cls.name}" config group must define at least one pattern'
+            raise ValueError(msg)
+        return super().validate_group_config(group)
+
+    @property
+    def patterns_matcher(self) -> PatternsMatcher:
+        try:
+            return self._patterns_matcher
+        except AttributeError:
+            # group can be used standalone outside of its config
+            self._patterns_matcher: PatternsMatcher = (
+                self.config.patterns_matcher
+                if any(i is self.group_config for i in self.config.groups)
+                else PatternsMatcher.from_groups([self.group_config])
+            )
+            return self._patterns_matcher
+
     def should_add_statement(self, statement: ImportStatement) -> bool:
-        return statement.root_module in self.group_config.packages
+        return self.patterns_matcher.match(statement.stem) is self.group_config
+
+
+class FirstPartyGroup(BaseImportGroup):
+    """
+    Group of modules and packages found in project source roots
+
+    Source roots are given as group packages relative to config file.
+    When none are given, ``src`` folder next to config file is the only
+    source root. Project folder itself is not used by default since
+    it also contains modules such as ``setup.py`` or ``conftest.py``
+    which would otherwise shadow installed distributions.
+
+    Source roots are explicitly configured hence their modules take
+    precedence over installed distributions with the same names
+    such as when project itself is installed in its virtualenv.
+    """
+
+    name: str = "firstparty"
+    priority: int = 1
+    is_dispatch_memoizable: bool = True
+
+    @property
+    def source_roots(self) -> typing.Tuple[str, ...]:
+        try:
+            return self._source_roots
+        except AttributeError:
+            base = self.config.path.parent if self.config.path else pathlib.Path()
+            self._source_roots: typing.Tuple[str, ...] = tuple(
+                str((base / i.strip()).resolve())
+                for i in self.group_config.packages or ["src"]
+            )
+            return self._source_roots
+
+    def should_add_statement(self, statement: ImportStatement) -> bool:
+        return statement.root_module in get_source_roots_index(self.source_roots)
 
 
 class LocalGroup(BaseImportGroup):
     name: str = "local"
     priority: int = 3
+    is_dispatch_memoizable: bool = True
 
     def should_add_statement(self, statement: ImportStatement) -> bool:
         return statement.stem.startswith(".")
@@ -209,6 +463,7 @@ class LocalGroup(BaseImportGroup):
 class RemainderGroup(BaseImportGroup):
     name: str = "remainder"
     priority: int = 4
+    is_dispatch_memoizable: bool = True
 
     def should_add_statement(self, statement: ImportStatement) -> bool:
         return True
@@ -229,6 +484,73 @@ GROUPS: typing.Dict[str, typing.Type[BaseImportGroup]] = OrderedDict(
         key=lambda i: i[1].priority,
     )
 )
+GROUPS_ORDER: typing.Dict[typing.Type[BaseImportGroup], int] = {
+    v: i for i, v in enumerate(GROUPS.values())
+}
+
+
+class DispatchPlan:
+    """
+    Precomputed order in which import groups are tried for each statement
+
+    Groups are ordered by their priority once when plan is created.
+    Memoizable groups are only asked once for each module path
+    for the lifetime of the plan hence once per config in a run.
+    Groups overriding ``add_statement`` are never memoized so that
+    their ``add_statement`` is called for every statement.
+    """
+
+    __slots__ = ("order", "memoizable", "is_memoizable_before", "memo")
+
+    def __init__(self, group_types: typing.Sequence[typing.Type[BaseImportGroup]]):
+        self.order: typing.Tuple[int, ...] = tuple(
+            sorted(
+                range(len(group_types)),
+                key=lambda i: GROUPS_ORDER.get(group_types[i], len(GROUPS_ORDER)),
+            )
+        )
+        self.memoizable: typing.Tuple[bool, ...] = tuple(
+            group_types[i].is_dispatch_memoizable
+            and group_types[i].add_statement is BaseImportGroup.add_statement
+            for i in self.order
+        )
+        # memoized group can be used directly when no group before it
+        # needs to be asked again
+        self.is_memoizable_before: typing.Tuple[bool, ...] = tuple(
+            all(itertools.islice(self.memoizable, i)) for i in range(len(self.order))
+        )
+        self.memo: typing.Dict[str, int] = {}
+
+    def add_statement(
+        self, groups: typing.Sequence[BaseImportGroup], statement: ImportStatement
+    ) -> typing.Optional[BaseImportGroup]:
+        """
+        Add statement to first group by priority which accepts it
+
+        Memoized groups use default ``add_statement`` hence statement
+        is appended to them directly without asking them again.
+        """
+        key = statement.stem
+        memoized = self.memo.get(key)
+        if memoized is not None and self.is_memoizable_before[memoized]:
+            group = groups[self.order[memoized]]
+            group.statements.append(statement)
+            return group
+
+        for position, (index, memoizable) in enumerate(
+            zip(self.order, self.memoizable)
+        ):
+            group = groups[index]
+            if memoizable and memoized is not None:
+                if position == memoized:
+                    group.statements.append(statement)
+                    return group
+            elif group.add_statement(statement):
+                if memoizable:
+                    self.memo[key] = position
+                return group
+
+        return None
 
 
 class ImportGroups:
@@ -237,13 +559,18 @@ class ImportGroups:
         groups: typing.List[BaseImportGroup] = None,
         config: "Config" = None,
         artifacts: Artifacts = None,
+        plan: DispatchPlan = None,
     ):
         # avoid circular imports
         from .config import Config
 
         self.groups = groups or []
-        self.config = config or Config.default()
+        # config without path is falsy hence explicit None check
+        self.config = config if config is not None else Config.default()
         self.artifacts = artifacts or Artifacts.default()
+        self.plan = (
+            plan if plan is not None else DispatchPlan([type(i) for i in self.groups])
+        )
 
     @classmethod
     def from_config(
@@ -260,7 +587,12 @@ class ImportGroups:
             for g in config.groups
         ]
 
-        import_groups = cls(groups=groups, config=config, artifacts=artifacts)
+        import_groups = cls(
+            groups=groups,
+            config=config,
+            artifacts=artifacts,
+            plan=config.dispatch_plan,
+        )
         [import_groups.add_statement(s) for s in statements]
         [import_groups.add_statement(s) for s in config.add_imports]
         return import_groups
@@ -272,12 +604,11 @@ class ImportGroups:
 
     @property
     def sorted_groups(self) -> typing.List[BaseImportGroup]:
-        return sorted(self.groups, key=lambda i: list(GROUPS.values()).index(type(i)))
+        return [self.groups[i] for i in self.plan.order]
 
     def add_statement(self, statement: ImportStatement) -> bool:
-        for group in self.sorted_groups:
-            if group.add_statement(statement):
-                return True
+        if self.plan.add_statement(self.groups, statement) is not None:
+            return True
 
         msg = (
             "Import statement was not added into "
@@ -293,8 +624,19 @@ class ImportGroups:
         return sep.join(i.as_string() for i in self.groups if i)
 
     def formatted(self) -> str:
+        writer = io.StringIO()
+        self.write(writer)
+        return writer.getvalue()
+
+    def write(self, writer: typing.TextIO) -> None:
+        """
+        Write all formatted groups into the writer separated by blank lines
+        """
         sep = self.artifacts.sep * 2
-        return sep.join(i.formatted() for i in self.groups if i)
+        for i, group in enumerate(filter(None, self.groups)):
+            if i:
+                writer.write(sep)
+            group.write(writer)
 
     def __str__(self) -> str:
         return self.as_string()
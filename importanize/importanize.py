@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 import abc
+import io
 import logging
+import multiprocessing
 import os
 import re
 import sys
 import typing
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import suppress
 from dataclasses import dataclass, field
 from fnmatch import fnmatch
@@ -13,27 +16,32 @@ from pathlib import Path
 
 import click
 
+from .cache import ClassificationCache, ParseCache
 from .config import Config, InvalidConfig, NoImportanizeConfig
-from .formatters import FORMATTERS, Formatter
+from .formatters import FORMATTERS, Formatter, formatted_memo
 from .groups import ImportGroups
-from .parser import (
-    Artifacts,
-    ParseError,
-    get_tree_artifacts,
-    parse_imports_from_tree,
-    parse_to_tree,
-)
+from .parser import PARSERS, Artifacts, ParseError, Parser, ParseSession
 from .plugins import (
     NOT_PIPED_PLUGIN_NAMES,
     deactivate_all_plugins,
     ensure_activated_plugins,
+    plugin_manager,
 )
 from .statements import ImportStatement
-from .utils import StdPath, generate_diff, get_number_cluster_gaps, takeafter
+from .utils import (
+    StdPath,
+    generate_diff,
+    get_number_cluster_gaps,
+    module_classifier,
+    takeafter,
+)
 
 
 log = logging.getLogger(__name__)
 
+# number of files sent to worker process at once when running in parallel
+PARALLEL_CHUNK_SIZE = 16
+
 
 @dataclass
 class RuntimeConfig:
@@ -41,8 +49,14 @@ class RuntimeConfig:
     path_names: typing.Iterable[str] = ()
 
     formatter_name: typing.Union[str, None] = None
+    parser_name: typing.Union[str, None] = None
+    python_env: typing.Union[str, None] = None
     length: typing.Union[int, None] = Config.length
     should_add_last_line: bool = True
+    is_cache_enabled: bool = True
+    cache_dir: typing.Optional[Path] = None
+    parse_session: typing.Optional[ParseSession] = None
+    jobs: int = 1
 
     _config: typing.Optional[Config] = None
     root_config: Config = field(default_factory=lambda: Config.default())
@@ -90,6 +104,43 @@ class RuntimeConfig:
             else self.config.formatter
         )
 
+    @property
+    def parser(self) -> typing.Type[Parser]:
+        return PARSERS[self.parser_name] if self.parser_name else self.config.parser
+
+    @property
+    def parse_cache(self) -> typing.Optional[ParseCache]:
+        try:
+            return self._parse_cache
+        except AttributeError:
+            self._parse_cache: typing.Optional[ParseCache] = (
+                ParseCache(path=self.cache_dir) if self.is_cache_enabled else None
+            )
+            return self._parse_cache
+
+    @property
+    def classification_cache(self) -> typing.Optional[ClassificationCache]:
+        try:
+            return self._classification_cache
+        except AttributeError:
+            self._classification_cache: typing.Optional[ClassificationCache] = (
+                ClassificationCache(path=self.cache_dir)
+                if self.is_cache_enabled and self.cache_dir is not None
+                else None
+            )
+            return self._classification_cache
+
+    @property
+    def is_parallel(self) -> bool:
+        # stdin and parse session are bound to the running process
+        return (
+            self.jobs > 1
+            and self.parse_session is None
+            and not any(
+                isinstance(i, StdPath) and i.is_std_stream() for i in self.paths
+            )
+        )
+
     @property
     def add_imports(self) -> typing.Iterable[ImportStatement]:
         return [] if "-" in self.path_names else self.config.add_imports
@@ -98,6 +149,14 @@ class RuntimeConfig:
     def config_length(self) -> int:
         return self.length or self.config.length
 
+    @property
+    def config_python_env(self) -> typing.Optional[str]:
+        return (
+            Config._parse_python_env(self.python_env)
+            if self.python_env
+            else self.config.python_env
+        )
+
     @property
     def merged_config(self) -> Config:
         try:
@@ -107,6 +166,8 @@ class RuntimeConfig:
                 Config(
                     length=self.config_length,
                     formatter=self.formatter,
+                    parser=self.parser,
+                    python_env=self.config_python_env,
                     add_imports=self.add_imports,
                     are_plugins_allowed=self.are_plugins_allowed,
                 )
@@ -194,11 +255,20 @@ def replace_imports_in_text(
         else lines[first_import_line_number:]
     )
 
-    formatted_imports = groups.formatted()
+    # all formatted imports are written into a single buffer which is
+    # then joined with the rest of the lines as is without splitting it
+    writer = io.StringIO()
+    groups.write(writer)
+    formatted_imports = writer.getvalue()
+    # plugins might end imports with blank line which is ignored
+    # same as with any other trailing line separator
+    if formatted_imports.endswith(artifacts.sep):
+        end = len(formatted_imports) - len(artifacts.sep)
+        formatted_imports = formatted_imports[:end]
 
     organized = artifacts.sep.join(
         lines[:first_import_line_number]
-        + formatted_imports.splitlines()
+        + ([formatted_imports] if formatted_imports else [])
         + (
             [""] * config.after_imports_new_lines
             if lines_after
@@ -215,20 +285,49 @@ def replace_imports_in_text(
     return re.sub(f"({artifacts.sep}){{3,}}", artifacts.sep * 3, organized)
 
 
+def parse_text(
+    text: str, path: Path, config: Config, runtime_config: RuntimeConfig
+) -> typing.Tuple[Artifacts, typing.List[ImportStatement]]:
+    """
+    Parse artifacts and imports from the code text reusing cached values if present
+    """
+    cache = runtime_config.parse_cache
+    key = cache.get_key(text, config.parser) if cache is not None else ""
+
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        return cached
+
+    # grammar preferences are remembered per project configuration
+    parser = (
+        runtime_config.parse_session.get_parser(
+            path, text, parser=config.parser, project=config.path
+        )
+        if runtime_config.parse_session is not None
+        else config.parser(text, project=config.path)
+    )
+    artifacts = parser.get_artifacts()
+    imports = list(parser.parse_imports())
+
+    if cache is not None:
+        cache.set(key, artifacts, imports)
+
+    return artifacts, imports
+
+
 def run_importanize_on_text(
     text: str, path: Path, config: Config, runtime_config: RuntimeConfig
 ) -> typing.Iterator[Result]:
     try:
-        tree = parse_to_tree(text)
+        artifacts, imports = parse_text(
+            text, path=path, config=config, runtime_config=runtime_config
+        )
 
     except ParseError as e:
         log.error(f"Could not parse {path} {e}")
         yield Result(path=path, error=e)
 
     else:
-        artifacts = get_tree_artifacts(tree, text)
-        imports = list(parse_imports_from_tree(tree))
-
         log.debug(f"Found {len(imports)} imports in {path}")
 
         try:
@@ -259,25 +358,14 @@ def run_importanize_on_text(
             )
 
 
-def run_importanize_on_file(
+def run_importanize_on_found_file(
     source: Path, config: Config, runtime_config: RuntimeConfig
 ) -> typing.Iterator[Result]:
+    """
+    Importanize file with its config as found by ``find_sources``
+    """
     log.debug(f"About to importanize {source}")
 
-    if runtime_config.is_subconfig_allowed:
-        subconfig = Config.find(
-            cwd=source.parent,
-            root=getattr(config.path, "parent", None),
-            cache=runtime_config.found_configs,
-        )
-        if subconfig:
-            config = subconfig
-            log.info(f"Found subconfig {subconfig}")
-
-    if should_skip(source, config):
-        log.info(f"Skipping {source} as per {config}")
-        return
-
     try:
         text = source.read_text()
 
@@ -291,11 +379,14 @@ def run_importanize_on_file(
         )
 
 
-def run_importanize_on_dir(
-    source: Path,
-    config: Config,
-    runtime_config: RuntimeConfig,
-) -> typing.Iterator[Result]:
+def get_source_config(
+    source: Path, config: Config, runtime_config: RuntimeConfig
+) -> typing.Optional[Config]:
+    """
+    Get config of the source honoring sub-configurations
+
+    None is returned when the source should be skipped as per its config.
+    """
     if runtime_config.is_subconfig_allowed:
         subconfig = Config.find(
             cwd=source.parent,
@@ -308,33 +399,163 @@ def run_importanize_on_dir(
 
     if should_skip(source, config):
         log.info(f"Skipping {source} as per {config}")
-        return
+        return None
+
+    return config
 
-    items = (
-        f
-        for f in source.iterdir()
-        if not f.is_file() or f.is_file() and f.suffixes == [".py"]
-    )
 
-    for i in items:
-        yield from run_importanize_on_source(
-            i, config=config, runtime_config=runtime_config
+def find_sources(
+    source: Path, runtime_config: RuntimeConfig, config: Config = None
+) -> typing.Iterator[typing.Tuple[Path, Config]]:
+    """
+    Find all files to importanize within the source along with their configs
+    """
+    config = config if config is not None else runtime_config.merged_config
+
+    if source.is_file():
+        file_config = get_source_config(source, config, runtime_config)
+        if file_config is not None:
+            yield source, file_config
+
+    elif source.is_dir():
+        dir_config = get_source_config(source, config, runtime_config)
+        if dir_config is None:
+            return
+
+        items = (
+            f
+            for f in source.iterdir()
+            if not f.is_file() or f.is_file() and f.suffixes == [".py"]
         )
 
+        for i in items:
+            yield from find_sources(i, config=dir_config, runtime_config=runtime_config)
+
 
 def run_importanize_on_source(
     source: Path, runtime_config: RuntimeConfig, config: Config = None
 ) -> typing.Iterator[Result]:
-    config = config if config is not None else runtime_config.merged_config
+    for path, path_config in find_sources(
+        source, config=config, runtime_config=runtime_config
+    ):
+        yield from run_importanize_on_found_file(
+            path, config=path_config, runtime_config=runtime_config
+        )
 
-    if source.is_file():
-        yield from run_importanize_on_file(
-            source, config=config, runtime_config=runtime_config
+
+def run_importanize_on_file(
+    source: Path, config: Config, runtime_config: RuntimeConfig
+) -> typing.Iterator[Result]:
+    file_config = get_source_config(source, config, runtime_config)
+    if file_config is not None:
+        yield from run_importanize_on_found_file(
+            source, config=file_config, runtime_config=runtime_config
         )
-    elif source.is_dir():
-        yield from run_importanize_on_dir(
-            source, config=config, runtime_config=runtime_config
+
+
+def run_importanize_on_dir(
+    source: Path, config: Config, runtime_config: RuntimeConfig
+) -> typing.Iterator[Result]:
+    yield from run_importanize_on_source(
+        source, config=config, runtime_config=runtime_config
+    )
+
+
+# state of worker processes when importanizing files in parallel
+_worker_runtime_config: typing.Optional[RuntimeConfig] = None
+_worker_dumped_modules = 0
+
+
+def _init_worker(
+    runtime_config_kwargs: typing.Dict[str, typing.Any],
+    plugins: typing.List[typing.Tuple[str, typing.Any]],
+    classification_data: typing.Dict[str, typing.Any],
+    log_level: int,
+) -> None:
+    global _worker_runtime_config, _worker_dumped_modules
+
+    logging.getLogger("").setLevel(log_level)
+    # plugins are given as objects since plugins registered directly
+    # with plugin_manager cannot be activated by their names
+    for name, _plugin in plugin_manager.list_name_plugin():
+        plugin_manager.unregister(name=name)
+    for name, plugin in plugins:
+        plugin_manager.register(plugin, name=name)
+    module_classifier.load(classification_data)
+    _worker_runtime_config = RuntimeConfig(**runtime_config_kwargs)
+    _worker_dumped_modules = len(module_classifier.modules)
+
+
+def _run_importanize_in_worker(
+    item: typing.Tuple[Path, Config]
+) -> typing.Tuple[
+    typing.List[Result], typing.Optional[typing.Dict[str, typing.Any]], int
+]:
+    """
+    Importanize single file in worker process
+
+    Along with the results, modules newly classified by the worker and
+    size of parse cache written to disk are returned so that they can be
+    persisted and pruned by the main process.
+    """
+    global _worker_dumped_modules
+    assert _worker_runtime_config is not None
+
+    source, config = item
+    results = list(
+        run_importanize_on_found_file(
+            source, config=config, runtime_config=_worker_runtime_config
         )
+    )
+
+    classified = None
+    if len(module_classifier.modules) > _worker_dumped_modules:
+        classified = module_classifier.dump(start=_worker_dumped_modules)
+        _worker_dumped_modules = len(module_classifier.modules)
+
+    written_size = 0
+    parse_cache = _worker_runtime_config.parse_cache
+    if parse_cache is not None:
+        written_size, parse_cache.written_size = parse_cache.written_size, 0
+
+    return results, classified, written_size
+
+
+def run_importanize_in_parallel(
+    sources: typing.Iterable[typing.Tuple[Path, Config]],
+    runtime_config: RuntimeConfig,
+    jobs: int,
+    mp_context: multiprocessing.context.BaseContext = None,
+) -> typing.Iterator[Result]:
+    """
+    Importanize files in a pool of worker processes
+
+    Results are yielded in the same order as the sources are given
+    regardless in which order workers finish importanizing them.
+    """
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(
+            {
+                "should_add_last_line": runtime_config.should_add_last_line,
+                "is_cache_enabled": runtime_config.is_cache_enabled,
+                "cache_dir": runtime_config.cache_dir,
+            },
+            plugin_manager.list_name_plugin(),
+            module_classifier.dump(),
+            logging.getLogger("").level,
+        ),
+    ) as executor:
+        for results, classified, written_size in executor.map(
+            _run_importanize_in_worker, sources, chunksize=PARALLEL_CHUNK_SIZE
+        ):
+            if classified is not None:
+                module_classifier.update(classified)
+            if runtime_config.parse_cache is not None:
+                runtime_config.parse_cache.written_size += written_size
+            yield from results
 
 
 def should_skip(source: Path, config: Config) -> bool:
@@ -373,9 +594,32 @@ class BaseAggregator(metaclass=abc.ABCMeta):
     def finish(self) -> int:
         return 0
 
+    def run(self, config: Config) -> typing.Iterator[Result]:
+        sources = (
+            i
+            for source in self.runtime_config.paths
+            for i in find_sources(
+                source, config=config, runtime_config=self.runtime_config
+            )
+        )
+
+        if self.runtime_config.is_parallel:
+            log.info(f"Importanizing with {self.runtime_config.jobs} jobs")
+            yield from run_importanize_in_parallel(
+                sources,
+                runtime_config=self.runtime_config,
+                jobs=self.runtime_config.jobs,
+            )
+        else:
+            for path, path_config in sources:
+                yield from run_importanize_on_found_file(
+                    path, config=path_config, runtime_config=self.runtime_config
+                )
+
     def __call__(self) -> int:
         try:
             merged_config = self.runtime_config.merged_config
+            merged_config.check_python_env()
         except (NoImportanizeConfig, InvalidConfig) as e:
             log.error(f"{e}")
             return 1
@@ -392,14 +636,26 @@ class BaseAggregator(metaclass=abc.ABCMeta):
                 )
             )
 
-        for source in self.runtime_config.paths:
-            for result in run_importanize_on_source(
-                source=source, runtime_config=self.runtime_config, config=merged_config
-            ):
-                if result.is_success:
-                    self.update(result)
-                else:
-                    self.is_success = False
+        classification_cache = self.runtime_config.classification_cache
+        if classification_cache is not None:
+            classification_cache.load()
+
+        for result in self.run(merged_config):
+            if result.is_success:
+                self.update(result)
+            else:
+                self.is_success = False
+
+        # statements are formatted by worker processes when running in parallel
+        if not self.runtime_config.is_parallel:
+            log.info(
+                f"Formatted statements memo "
+                f"{formatted_memo.hits} hits {formatted_memo.misses} misses"
+            )
+        if self.runtime_config.parse_cache is not None:
+            self.runtime_config.parse_cache.prune()
+        if classification_cache is not None:
+            classification_cache.save()
 
         finished = self.finish()
         return int(not self.is_success) or finished
@@ -1,15 +1,19 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 import logging
+import os
 import sys
 import typing
+from pathlib import Path
 
 import click
 
 from . import __description__, __version__
+from .cache import get_default_cache_dir
 from .config import IMPORTANIZE_CONFIG, Config
 from .formatters import FORMATTERS
 from .importanize import RuntimeConfig
+from .parser import PARSERS
 from .plugins import ALL_PLUGINS, INSTALLED_PLUGIN_NAMES
 from .utils import is_piped
 
@@ -24,6 +28,18 @@ log = logging.getLogger(__name__)
 ROOT_CONFIG = Config.find(log_errors=False)
 
 
+def parse_jobs(ctx: click.Context, param: click.Parameter, value: str) -> int:
+    if value == "auto":
+        return os.cpu_count() or 1
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = 0
+    if jobs < 1:
+        raise click.BadParameter(f"{value!r} is neither a positive number nor 'auto'")
+    return jobs
+
+
 @click.command(help=__description__)
 @click.argument(
     "path",
@@ -74,12 +90,57 @@ ROOT_CONFIG = Config.find(log_errors=False)
     is_flag=True,
     help="If provided, no plugins will be activated.",
 )
+@click.option(
+    "--no-cache",
+    "is_cache_enabled",
+    default=True,
+    is_flag=True,
+    help=(
+        "If provided, parsed imports will not be cached. "
+        "By default they are cached in memory."
+    ),
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    help=(
+        "If provided, parsed imports and modules classification are also "
+        "cached on disk in the given directory across runs. "
+        f"For example {get_default_cache_dir()}."
+    ),
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default="1",
+    callback=parse_jobs,
+    help=(
+        "Number of processes used to importanize files in parallel. "
+        "'auto' uses all available CPUs. [default 1]"
+    ),
+)
 @click.option(
     "-f",
     "--formatter",
     type=click.Choice(sorted(FORMATTERS.keys())),
     help=(f"Formatter used. " f"[default {ROOT_CONFIG.formatter.name!r}]"),
 )
+@click.option(
+    "--parser",
+    type=click.Choice(sorted(PARSERS.keys())),
+    help=(f"Parser engine used to find imports. [default {ROOT_CONFIG.parser.name!r}]"),
+)
+@click.option(
+    "--python",
+    "python_env",
+    type=click.Path(exists=True, path_type=str),
+    help=(
+        "Python executable or virtualenv directory against which imports "
+        "are classified as stdlib or site-packages. "
+        "By default python running importanize is used."
+    ),
+)
 @click.option(
     "-l",
     "--length",
@@ -173,10 +234,15 @@ def cli(
     # config
     is_subconfig_allowed: bool,
     should_auto_detect_pipe: bool,
+    is_cache_enabled: bool,
+    jobs: int,
+    cache_dir: str = None,
     are_plugins_allowed: bool = None,
     config_path: str = None,
     # config overwrites
     formatter: str = None,
+    parser: str = None,
+    python_env: str = None,
     length: int = None,
 ) -> int:
     is_in_piped = is_piped(sys.stdin)
@@ -187,12 +253,17 @@ def cli(
             RuntimeConfig(
                 path_names=path or (["."] if not is_in_piped else []),
                 formatter_name=formatter,
+                parser_name=parser,
+                python_env=python_env,
                 length=length,
                 root_config=ROOT_CONFIG,
                 config_path=config_path,
                 is_subconfig_allowed=is_subconfig_allowed,
                 should_auto_detect_pipe=should_auto_detect_pipe,
                 are_plugins_allowed=are_plugins_allowed,
+                is_cache_enabled=is_cache_enabled,
+                cache_dir=Path(cache_dir).expanduser() if cache_dir else None,
+                jobs=jobs,
                 verbosity=verbosity,
                 is_version_mode=is_version_mode,
                 is_list_mode=is_list_mode,
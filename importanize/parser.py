@@ -1,16 +1,25 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
+import abc
+import ast
+import functools
+import io
 import itertools
 import lib2to3
 import lib2to3.pgen2.driver
 import lib2to3.pgen2.parse
 import lib2to3.pgen2.token
+import lib2to3.pgen2.tokenize
 import lib2to3.pygram
 import lib2to3.pytree
+import re
+import sys
+import tokenize
 import typing
+import warnings
 from dataclasses import dataclass
 
-from .plugins import plugin_hooks
+from .plugins import is_hook_implemented, plugin_hooks
 from .statements import ImportLeaf, ImportStatement
 
 
@@ -20,6 +29,16 @@ GRAMMARS = [
     lib2to3.pygram.python_grammar_no_print_statement,
     lib2to3.pygram.python_grammar,
 ]
+DRIVERS = [lib2to3.pgen2.driver.Driver(i, lib2to3.pytree.convert) for i in GRAMMARS]
+# index of the grammar which last parsed code successfully for each project
+# so that for example Python 2 projects do not parse every file twice
+PREFERRED_GRAMMARS: typing.Dict[typing.Hashable, int] = {}
+# top-level imports can only be at the beginning of the line
+# which allows to cheaply detect if there are any imports after
+# first code statement without tokenizing rest of the file
+TOP_LEVEL_IMPORT_RE = re.compile(r"^\f*(?:import|from)\b", re.MULTILINE)
+LONE_CARRIAGE_RETURN_RE = re.compile(r"\r(?!\n)")
+HEADER_SENTINEL = "pass"
 
 
 def normalize_comment(value: str) -> str:
@@ -65,21 +84,45 @@ class Artifacts:
         return cls()
 
 
-def parse_to_tree(text: str) -> lib2to3.pytree.Node:
+def can_other_grammar_parse(text: str, error: lib2to3.pgen2.parse.ParseError) -> bool:
+    """
+    Check if parse error could be resolved by parsing with other grammar
+
+    Grammars only differ in ``print`` statement so any error which happens
+    before first ``print`` in the text will happen with all grammars.
+    """
+    index = text.find("print")
+    if index < 0:
+        return False
+    error_lineno: int = error.context[1][0]
+    return error_lineno >= text.count("\n", 0, index) + 1
+
+
+def parse_to_tree(text: str, project: typing.Hashable = None) -> lib2to3.pytree.Node:
     """
     Parse given code text to lib2to3 ``Node`` tree
+
+    Grammar which successfully parsed previous file within the same
+    project is attempted first.
     """
     text = text.rstrip("\n") + "\n"
 
+    preferred = PREFERRED_GRAMMARS.get(project, 0)
+    order = [preferred] + [i for i in range(len(DRIVERS)) if i != preferred]
+
     error = None
-    for grammar in GRAMMARS:
+    for i in order:
         try:
-            node = lib2to3.pgen2.driver.Driver(
-                grammar, lib2to3.pytree.convert
-            ).parse_string(text)
+            node = DRIVERS[i].parse_string(text)
+        except (lib2to3.pgen2.tokenize.TokenError, IndentationError) as e:
+            # tokenizing is the same for all grammars
+            raise ParseError(str(e)) from e
         except lib2to3.pgen2.parse.ParseError as e:
             error = e
+            if not can_other_grammar_parse(text, e):
+                break
         else:
+            PREFERRED_GRAMMARS[project] = i
             if isinstance(node, lib2to3.pytree.Leaf):
                 return lib2to3.pytree.Node(
                     lib2to3.pygram.python_symbols.simple_stmt, [node]
@@ -88,26 +131,174 @@ def parse_to_tree(text: str) -> lib2to3.pytree.Node:
     raise ParseError(str(error)) from error
 
 
-def get_tree_artifacts(tree: lib2to3.pytree.Node, text: str) -> Artifacts:
+def get_header_text(text: str) -> typing.Optional[str]:
     """
-    Get artifacts for the given parsed file tree
+    Get leading header of the given code text
+
+    Header consists of leading comments, docstrings and import statements.
+    Scanning stops at the first real code statement which is replaced
+    with a ``pass`` statement so that parsed header tree has identical
+    artifacts as the complete tree would have.
+
+    Returns ``None`` when header cannot be reliably determined, for example
+    when text is not valid Python 3 or there are imports after code.
     """
-    pre_order = [i for i in tree.pre_order() if isinstance(i, lib2to3.pytree.Leaf)]
+    if LONE_CARRIAGE_RETURN_RE.search(text):
+        return None
 
-    sep = next(
-        filter(lambda i: i.type == lib2to3.pgen2.token.NEWLINE, pre_order),
-        lib2to3.pytree.Leaf(lib2to3.pgen2.token.NEWLINE, "\n"),
-    ).value
+    # ast is much faster than lib2to3 and makes sure
+    # invalid Python still fails parsing
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            ast.parse(text)
+        except (SyntaxError, ValueError):
+            return None
 
-    first_node = next(
-        filter(
-            lambda i: (
-                i.type not in {lib2to3.pgen2.token.NEWLINE, lib2to3.pgen2.token.STRING}
-            ),
-            pre_order,
-        )
-    )
+    lines: typing.List[str] = []
+    readline = io.StringIO(text).readline
 
+    def _readline() -> str:
+        line = readline()
+        lines.append(line)
+        return line
+
+    fstring_start = getattr(tokenize, "FSTRING_START", tokenize.STRING)
+    statement: typing.List[tokenize.TokenInfo] = []
+
+    try:
+        for token in tokenize.generate_tokens(_readline):
+            if token.type in {tokenize.COMMENT, tokenize.NL}:
+                continue
+            elif token.type == tokenize.ENDMARKER:
+                return text
+            elif token.type in {tokenize.INDENT, tokenize.DEDENT}:
+                return None
+            elif token.type != tokenize.NEWLINE:
+                statement.append(token)
+                continue
+            elif not statement:
+                continue
+
+            first = statement[0]
+            is_import = first.type == tokenize.NAME and first.string in {
+                "import",
+                "from",
+            }
+            has_semicolon = any(
+                i.type == tokenize.OP and i.string == ";" for i in statement
+            )
+
+            if is_import and not has_semicolon:
+                statement = []
+                continue
+            elif all(i.type == tokenize.STRING for i in statement):
+                statement = []
+                continue
+            elif is_import or first.type in {tokenize.STRING, fstring_start}:
+                return None
+
+            offset = sum(len(i) for i in lines[: first.start[0] - 1])
+            if first.start[1] or TOP_LEVEL_IMPORT_RE.search(text, offset):
+                return None
+
+            sep = "\r\n" if token.line.endswith("\r\n") else "\n"
+            return text[:offset] + HEADER_SENTINEL + sep
+
+    except (tokenize.TokenError, SyntaxError):
+        return None
+
+    return None
+
+
+def get_code_statement_sep(text: str, offset: int) -> typing.Optional[str]:
+    """
+    Get line separator of code statement which starts at given offset
+
+    Returns ``None`` when code at offset does not start with a top-level
+    code statement which would end the header.
+    """
+    tokens = tokenize.generate_tokens(io.StringIO(text[offset:]).readline)
+
+    try:
+        first = next(tokens)
+        if (
+            first.start != (1, 0)
+            or first.type not in {tokenize.NAME, tokenize.NUMBER, tokenize.OP}
+            or first.string in {"import", "from"}
+        ):
+            return None
+
+        for token in tokens:
+            if token.type == tokenize.NEWLINE:
+                return "\r\n" if token.line.endswith("\r\n") else "\n"
+
+    except (tokenize.TokenError, SyntaxError):
+        return None
+
+    return None
+
+
+def get_incremental_header_text(
+    text: str, previous_text: str, previous_header: typing.Optional[str]
+) -> typing.Optional[str]:
+    """
+    Get leading header of the given code text from the header
+    of previous version of the same text
+
+    When only the code after the header changed, header is reused as is.
+    When only the header changed, new header is validated on its own
+    without validating the rest of the code.
+    Note that in either case changed code is not validated as that is
+    the point of incremental parsing.
+
+    Returns ``None`` when header has to be determined from scratch.
+    """
+    if previous_header is None or previous_header == previous_text:
+        return None
+
+    sep = "\r\n" if previous_header.endswith("\r\n") else "\n"
+    offset = len(previous_header) - len(HEADER_SENTINEL) - len(sep)
+    prefix = previous_header[:offset]
+
+    if text.startswith(prefix):
+        if LONE_CARRIAGE_RETURN_RE.search(text) or TOP_LEVEL_IMPORT_RE.search(
+            text, offset
+        ):
+            return None
+        code_sep = get_code_statement_sep(text, offset)
+        return prefix + HEADER_SENTINEL + code_sep if code_sep else None
+
+    code = previous_text[offset:]
+    new_prefix = text[: len(text) - len(code)]
+    is_line_boundary = not new_prefix or new_prefix.endswith("\n")
+    if text.endswith(code) and is_line_boundary:
+        # new prefix must consist only of header statements
+        if get_header_text(new_prefix) == new_prefix:
+            return new_prefix + HEADER_SENTINEL + sep
+
+    return None
+
+
+def parse_header_to_tree(
+    text: str, project: typing.Hashable = None
+) -> lib2to3.pytree.Node:
+    """
+    Parse leading header of the given code text to lib2to3 ``Node`` tree
+
+    Imports are only parsed from the top of the file so there is
+    no need to parse the rest of the module.
+    Complete text is parsed when header cannot be determined.
+    """
+    header = get_header_text(text)
+    return parse_to_tree(header if header is not None else text, project=project)
+
+
+def get_first_line(lineno: int, prefix: str) -> int:
+    """
+    Get first line where imports should be placed given first code node
+    line number (1-index based) and its prefix
+    """
     # node prefix includes comments hence to calculate first line
     # we need to get node lineno and subtract number of
     # non-empty lines in the prefix
@@ -117,7 +308,7 @@ def get_tree_artifacts(tree: lib2to3.pytree.Node, text: str) -> Artifacts:
                 lambda i: i.strip()
                 and not any(c in i for c in ENCODING_COMMENTS)
                 and not i.strip().startswith("#!"),
-                reversed(first_node.prefix.splitlines()),
+                reversed(prefix.splitlines()),
             )
         )
     )
@@ -127,33 +318,90 @@ def get_tree_artifacts(tree: lib2to3.pytree.Node, text: str) -> Artifacts:
         list(
             itertools.takewhile(
                 lambda i: not i.strip(),
-                list(reversed(first_node.prefix.splitlines()))[non_empty_offset:],
+                list(reversed(prefix.splitlines()))[non_empty_offset:],
             )
         )
     )
 
-    first_line = (
-        first_node.get_lineno()
-        - 1  # lines are 1-index based
-        - non_empty_offset
-        - empty_offset
-    )
+    # lines are 1-index based
+    first_line = lineno - 1 - non_empty_offset - empty_offset
+
+    return max(first_line, 0)
+
+
+def inject_plugin_artifacts(
+    artifacts: Artifacts,
+    text: str,
+    tree: lib2to3.pytree.Node = None,
+    ast_tree: ast.Module = None,
+) -> Artifacts:
+    """
+    Inject plugin artifacts for the given complete file text
 
-    artifacts = Artifacts(sep=sep, first_line=max(first_line, 0))
-    plugin_hooks.inject_tree_artifacts(artifacts=artifacts, tree=tree, text=text)
+    Plugins always receive trees of the complete file regardless of
+    parser engine. Trees not already parsed by the engine are only parsed
+    when some plugin implements corresponding hook.
+    """
+    if is_hook_implemented("inject_tree_artifacts"):
+        plugin_hooks.inject_tree_artifacts(
+            artifacts=artifacts,
+            tree=tree if tree is not None else parse_to_tree(text),
+            text=text,
+        )
+    if is_hook_implemented("inject_ast_artifacts"):
+        plugin_hooks.inject_ast_artifacts(
+            artifacts=artifacts,
+            tree=ast_tree if ast_tree is not None else ast.parse(text),
+            text=text,
+        )
     return artifacts
 
 
+def get_tree_artifacts(
+    tree: lib2to3.pytree.Node, text: str, is_complete: bool = True
+) -> Artifacts:
+    """
+    Get artifacts for the given parsed file tree
+
+    ``is_complete`` tells whether tree is parsed from complete text
+    or only from its leading header.
+    """
+    sep: typing.Optional[str] = None
+    first_node: typing.Optional[lib2to3.pytree.Leaf] = None
+
+    # leafs are walked lazily since both artifacts are usually
+    # known after first few leafs of the tree
+    for leaf in tree.leaves():
+        if leaf.type == lib2to3.pgen2.token.NEWLINE:
+            if sep is None:
+                sep = leaf.value
+        elif first_node is None and leaf.type != lib2to3.pgen2.token.STRING:
+            first_node = leaf
+        if sep is not None and first_node is not None:
+            break
+
+    assert first_node is not None
+    if sep is None:
+        sep = "\n"
+
+    artifacts = Artifacts(
+        sep=sep,
+        first_line=get_first_line(first_node.get_lineno(), first_node.prefix),
+    )
+    return inject_plugin_artifacts(artifacts, text, tree=tree if is_complete else None)
+
+
 def get_text_artifacts(text: str) -> Artifacts:
     """
     Get artifacts for the given file.
     """
+    header = get_header_text(text)
     try:
-        tree = parse_to_tree(text)
+        tree = parse_to_tree(header if header is not None else text)
     except ParseError:
         return Artifacts(sep="\n", first_line=0)
     else:
-        return get_tree_artifacts(tree, text)
+        return get_tree_artifacts(tree, text, is_complete=header is None)
 
 
 class Leaf:
@@ -170,41 +418,84 @@ class Leaf:
         lib2to3.pgen2.token.COMMA
     }
 
+    __slots__ = (
+        "leaf",
+        "previous",
+        "next",
+        "type",
+        "prefix",
+        "value",
+        "combinable_types",
+        "_relevant_prefix_lines",
+        "_immediate_comments",
+        "_enumerated_comments",
+    )
+
     def __init__(
         self, leaf: lib2to3.pytree.Leaf, combinable_types: typing.Set[int] = None
     ):
         self.leaf: lib2to3.pytree.Leaf = leaf
-        self.previous: typing.Union["Leaf", None]
-        self.next: typing.Union["Leaf", None]
+        self.previous: typing.Union["Leaf", None] = None
+        self.next: typing.Union["Leaf", None] = None
 
-        self.type: int = self.leaf.type
-        self.prefix: str = self.leaf.prefix
-        self.value: str = self.leaf.value
+        self.type: int = leaf.type
+        self.prefix: str = leaf.prefix
+        self.value: str = leaf.value
 
         self.combinable_types: typing.Set[int] = (
             combinable_types or self.IMPORT_COMBINABLE_TYPES
         )
-        self.combinable_value: str = (
-            f" {self.leaf.value} " if self.leaf.value in {"as"} else self.leaf.value
-        )
 
-        self.prefix_lines: typing.List[str] = self.prefix.splitlines()
-        self.relevant_prefix_lines: typing.List[str] = list(
+    @property
+    def combinable_value(self) -> str:
+        return f" {self.value} " if self.value == "as" else self.value
+
+    @property
+    def prefix_lines(self) -> typing.List[str]:
+        return self.prefix.splitlines()
+
+    @property
+    def relevant_prefix_lines(self) -> typing.List[str]:
+        try:
+            return self._relevant_prefix_lines
+        except AttributeError:
+            pass
+
+        # most tokens do not have any prefix at all
+        if not self.prefix.strip():
+            self._relevant_prefix_lines: typing.List[str] = self.prefix_lines
+            return self._relevant_prefix_lines
+
+        self._relevant_prefix_lines = list(
             reversed(
-                [
-                    l
-                    for l in itertools.takewhile(
+                list(
+                    itertools.takewhile(
                         lambda k: not is_comment_encoding(k),
-                        reversed(self.prefix.splitlines()),
+                        reversed(self.prefix_lines),
                     )
-                ]
+                )
             )
         )
+        return self._relevant_prefix_lines
 
-        # literally immediate comments before node itself
-        # in other words consecutive comments without
-        # any blank lines in between them
-        self.immediate_comments: typing.List[str] = list(
+    @property
+    def immediate_comments(self) -> typing.List[str]:
+        """
+        Literally immediate comments before node itself
+
+        In other words consecutive comments without
+        any blank lines in between them
+        """
+        try:
+            return self._immediate_comments
+        except AttributeError:
+            pass
+
+        if "#" not in self.prefix:
+            self._immediate_comments: typing.List[str] = []
+            return self._immediate_comments
+
+        self._immediate_comments = list(
             reversed(
                 [
                     normalize_comment(l)
@@ -214,20 +505,29 @@ class Leaf:
                 ]
             )
         )
+        return self._immediate_comments
 
-        self.enumerated_comments: typing.List[typing.Tuple[int, str]] = list(
-            reversed(
-                [
-                    (i, normalize_comment(l))
-                    for i, l in itertools.takewhile(
-                        lambda k: not is_comment_encoding(k[1]),
-                        reversed(list(enumerate(self.relevant_prefix_lines))),
-                    )
-                    if is_comment(l)
-                ]
-            )
-        )
-        self.comments: typing.List[str] = [l for i, l in self.enumerated_comments]
+    @property
+    def enumerated_comments(self) -> typing.List[typing.Tuple[int, str]]:
+        try:
+            return self._enumerated_comments
+        except AttributeError:
+            pass
+
+        if "#" not in self.prefix:
+            self._enumerated_comments: typing.List[typing.Tuple[int, str]] = []
+            return self._enumerated_comments
+
+        self._enumerated_comments = [
+            (i, normalize_comment(l))
+            for i, l in enumerate(self.relevant_prefix_lines)
+            if is_comment(l)
+        ]
+        return self._enumerated_comments
+
+    @property
+    def comments(self) -> typing.List[str]:
+        return [l for i, l in self.enumerated_comments]
 
     def get_lineno(self) -> int:
         return self.leaf.get_lineno() - 1
@@ -281,10 +581,19 @@ class Statement:
         for k, v in vars(lib2to3.pygram.python_symbols).items()
         if k.startswith("import")
     }
+    COMBINABLE_TYPES = {
+        "from": Leaf.IMPORT_FROM_COMBINABLE_TYPES,
+        "import": Leaf.IMPORT_COMBINABLE_TYPES,
+    }
+
+    __slots__ = ("node", "_leafs")
 
     def __init__(self, node: lib2to3.pytree.Node):
         self.node: lib2to3.pytree.Node = node
 
+    def get_raw_leafs(self) -> typing.List[lib2to3.pytree.Leaf]:
+        return list(self.node.leaves())
+
     @property
     def is_import(self) -> bool:
         return (
@@ -301,21 +610,18 @@ class Statement:
         try:
             return self._leafs
         except AttributeError:
-            self._leafs: typing.List[Leaf] = []
-            _leafs = [
-                i for i in self.node.pre_order() if isinstance(i, lib2to3.pytree.Leaf)
-            ]
+            _leafs = self.get_raw_leafs()
 
-            combinable_types_mapping = {
-                "from": Leaf.IMPORT_FROM_COMBINABLE_TYPES,
-                "import": Leaf.IMPORT_COMBINABLE_TYPES,
-            }
-            combinable_types = combinable_types_mapping[_leafs[0].value]
+            combinable_types = self.COMBINABLE_TYPES[_leafs[0].value]
 
-            self._leafs = [Leaf(i, combinable_types=combinable_types) for i in _leafs]
-            for i, _leaf in enumerate(self._leafs):
-                _leaf.previous = self._leafs[i - 1] if i else None
-                _leaf.next = self._leafs[i + 1] if i < len(self._leafs) - 1 else None
+            self._leafs: typing.List[Leaf] = [
+                Leaf(i, combinable_types=combinable_types) for i in _leafs
+            ]
+            for previous, _leaf in zip(
+                self._leafs, itertools.islice(self._leafs, 1, None)
+            ):
+                previous.next = _leaf
+                _leaf.previous = previous
 
             return self._leafs
 
@@ -337,6 +643,80 @@ class Statement:
         return self.leafs[1:]
 
 
+class TokenLeaf(typing.NamedTuple):
+    """
+    Minimal stand-in for ``lib2to3.pytree.Leaf`` built from ``tokenize`` token
+    """
+
+    type: int
+    value: str
+    prefix: str
+    lineno: int
+
+    def get_lineno(self) -> int:
+        return self.lineno
+
+
+class TokenStatement(Statement):
+    """
+    Statement built from ``tokenize`` tokens instead of ``lib2to3`` node
+    """
+
+    __slots__ = ("raw_leafs",)
+
+    def __init__(self, leafs: typing.List[TokenLeaf]):
+        self.raw_leafs = leafs
+
+    def get_raw_leafs(self) -> typing.List[lib2to3.pytree.Leaf]:
+        return typing.cast(typing.List[lib2to3.pytree.Leaf], self.raw_leafs)
+
+
+def generate_prefixed_tokens(
+    lines: typing.List[str], lineno: int = 1
+) -> typing.Iterator[typing.Tuple[tokenize.TokenInfo, str]]:
+    """
+    Generate significant ``tokenize`` tokens starting at given line number
+    together with their prefix (whitespace and comments before the token)
+
+    Line numbers in generated tokens are relative to given line number.
+    Prefix is computed the same way as ``lib2to3`` driver does it
+    so that comments can be parsed identically.
+    """
+    readline = functools.partial(next, itertools.islice(lines, lineno - 1, None), "")
+    lineno, column = 1, 0
+    prefix = ""
+
+    for token in tokenize.generate_tokens(readline):
+        s_lineno, s_column = token.start
+        if lineno < s_lineno:
+            prefix += "\n" * (s_lineno - lineno)
+            lineno, column = s_lineno, 0
+        if column < s_column:
+            prefix += token.line[column:s_column]
+            column = s_column
+
+        if token.type not in {tokenize.COMMENT, tokenize.NL}:
+            yield token, prefix
+            prefix = ""
+        else:
+            prefix += token.string
+
+        lineno, column = token.end
+        if token.string.endswith("\n"):
+            lineno, column = lineno + 1, 0
+
+
+def get_lib2to3_token_type(token: tokenize.TokenInfo) -> int:
+    # lib2to3 tokenizes "..." as individual dots
+    if token.exact_type == tokenize.ELLIPSIS:
+        return lib2to3.pgen2.token.DOT
+    return getattr(
+        lib2to3.pgen2.token,
+        tokenize.tok_name[token.exact_type],
+        lib2to3.pgen2.token.OP,
+    )
+
+
 def parse_imports_from_import_statement(
     statement: Statement, strict: bool = False
 ) -> typing.Iterable[ImportStatement]:
@@ -391,7 +771,9 @@ def parse_imports_from_import_statement(
 def parse_imports_from_import_from_statement(
     statement: Statement, strict: bool = False
 ) -> typing.Iterable[ImportStatement]:
-    leafs: typing.List[ImportLeaf] = []
+    # leafs are immutable and comments can be added to previous leaf
+    # hence leafs are created only once all their comments are known
+    leafs: typing.List[typing.Dict[str, typing.Any]] = []
 
     # import statement standalone_comments are the only possibility
     standalone_comments = statement.standalone_comments
@@ -456,17 +838,19 @@ def parse_imports_from_import_from_statement(
                     and ci == 0
                     and comment_nodes[node] <= max(combinable_nodes.values())
                 ):
-                    target = leafs[-1].inline_comments if leafs else inline_comments
+                    target = leafs[-1]["inline_comments"] if leafs else inline_comments
 
                     if any(j in comment for j in STATEMENT_COMMENTS):
                         target = (
-                            leafs[-1].statement_comments if leafs else inline_comments
+                            leafs[-1]["statement_comments"]
+                            if leafs
+                            else inline_comments
                         )
 
                 target.append(comment)
 
         leafs.append(
-            ImportLeaf(
+            dict(
                 name=name,
                 as_name=as_name,
                 standalone_comments=imp_standalone_comments,
@@ -495,16 +879,16 @@ def parse_imports_from_import_from_statement(
             target = inline_comments
 
             if inode == 0 and ci == 0 and imp_rest_nodes[node] <= par_index:
-                target = leafs[-1].inline_comments
+                target = leafs[-1]["inline_comments"]
                 if any(j in comment for j in STATEMENT_COMMENTS):
-                    target = leafs[-1].statement_comments
+                    target = leafs[-1]["statement_comments"]
 
             target.append(comment)
 
     yield ImportStatement(
         stem=stem,
         as_name=None,
-        leafs=leafs,
+        leafs=[ImportLeaf(**i) for i in leafs],
         line_numbers=statement.line_numbers,
         standalone_comments=standalone_comments,
         inline_comments=inline_comments,
@@ -537,5 +921,266 @@ def parse_imports(text: str, strict: bool = False) -> typing.Iterable[ImportStat
     """
     Parse imports from given code text
     """
-    tree = parse_to_tree(text)
+    tree = parse_header_to_tree(text)
     return parse_imports_from_tree(tree, strict=strict)
+
+
+class Parser(metaclass=abc.ABCMeta):
+    """
+    Parent class for all parser engines
+    """
+
+    name: str
+
+    def __init__(
+        self,
+        text: str,
+        strict: bool = False,
+        project: typing.Hashable = None,
+        previous: "Parser" = None,
+    ):
+        self.text = text
+        self.strict = strict
+        self.project = project
+        # parser of previous version of the same text
+        # which engines can use to parse text incrementally
+        self.previous = previous
+        # only single previous version is kept in memory
+        if previous is not None:
+            previous.previous = None
+
+    @property
+    def tree(self) -> typing.Any:
+        try:
+            return self._tree
+        except AttributeError:
+            self._tree: typing.Any = self.parse_to_tree()
+            return self._tree
+
+    @abc.abstractmethod
+    def parse_to_tree(self) -> typing.Any:
+        """
+        Subclasses must implement and raise ``ParseError`` for invalid text
+        """
+
+    @abc.abstractmethod
+    def get_artifacts(self) -> Artifacts:
+        """
+        Subclasses must implement
+        """
+
+    @abc.abstractmethod
+    def parse_imports(self) -> typing.Iterable[ImportStatement]:
+        """
+        Subclasses must implement
+        """
+
+
+class Lib2to3Parser(Parser):
+    """
+    Parser engine which parses complete text with ``lib2to3``
+    """
+
+    name = "lib2to3"
+
+    def parse_to_tree(self) -> lib2to3.pytree.Node:
+        return parse_to_tree(self.text, project=self.project)
+
+    def get_artifacts(self) -> Artifacts:
+        return get_tree_artifacts(self.tree, self.text)
+
+    def parse_imports(self) -> typing.Iterable[ImportStatement]:
+        return parse_imports_from_tree(self.tree, strict=self.strict)
+
+
+class HeaderParser(Lib2to3Parser):
+    """
+    Default parser engine which parses only leading imports header
+    with ``lib2to3``
+    """
+
+    name = "header"
+
+    @property
+    def header(self) -> typing.Optional[str]:
+        try:
+            return self._header
+        except AttributeError:
+            self._header: typing.Optional[str] = None
+            if isinstance(self.previous, HeaderParser):
+                self._header = get_incremental_header_text(
+                    self.text, self.previous.text, self.previous.header
+                )
+            if self._header is None:
+                self._header = get_header_text(self.text)
+            return self._header
+
+    def parse_to_tree(self) -> lib2to3.pytree.Node:
+        if self.header is None:
+            return parse_to_tree(self.text, project=self.project)
+        elif (
+            isinstance(self.previous, HeaderParser)
+            and self.previous.header == self.header
+        ):
+            return typing.cast(lib2to3.pytree.Node, self.previous.tree)
+        return parse_to_tree(self.header, project=self.project)
+
+    def get_artifacts(self) -> Artifacts:
+        return get_tree_artifacts(self.tree, self.text, is_complete=self.header is None)
+
+
+class AstParser(Parser):
+    """
+    Parser engine which finds imports with C-accelerated ``ast`` module
+    and recovers comments around them with ``tokenize``
+    """
+
+    name = "ast"
+    # end_lineno is only available in Python 3.8+
+    is_supported = sys.version_info >= (3, 8)
+
+    STRING_TYPES = {
+        tokenize.STRING,
+        *(
+            getattr(tokenize, i)
+            for i in ("FSTRING_START", "FSTRING_MIDDLE", "FSTRING_END")
+            if hasattr(tokenize, i)
+        ),
+    }
+
+    def __init__(
+        self,
+        text: str,
+        strict: bool = False,
+        project: typing.Hashable = None,
+        previous: Parser = None,
+    ):
+        super().__init__(text=text, strict=strict, project=project, previous=previous)
+        self.lines = io.StringIO(text.rstrip("\n") + "\n").readlines()
+
+    def parse_to_tree(self) -> ast.Module:
+        if LONE_CARRIAGE_RETURN_RE.search(self.text):
+            raise ParseError("Lone carriage return line endings are not supported")
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            try:
+                return ast.parse(self.text)
+            except (SyntaxError, ValueError) as e:
+                raise ParseError(str(e)) from e
+
+    def get_artifacts(self) -> Artifacts:
+        tree = self.tree
+        sep: typing.Optional[str] = None
+        first_line: typing.Optional[int] = None
+
+        for token, prefix in generate_prefixed_tokens(self.lines):
+            if token.type == tokenize.NEWLINE:
+                sep = token.string if sep is None else sep
+            elif first_line is None and token.type not in self.STRING_TYPES:
+                first_line = get_first_line(token.start[0], prefix)
+            if sep is not None and first_line is not None:
+                break
+
+        artifacts = Artifacts(sep=sep or "\n", first_line=first_line or 0)
+        return inject_plugin_artifacts(artifacts, self.text, ast_tree=tree)
+
+    def ends_with_indented_block(self, node: ast.stmt) -> bool:
+        """
+        Check if statement ends with indented block which ``lib2to3``
+        closes with ``DEDENT`` token which takes over following comments
+        """
+        blocks = [
+            getattr(node, i, None) or []
+            for i in ("body", "orelse", "finalbody", "handlers", "cases")
+        ]
+        blocks += [
+            getattr(i, "body", None) or []
+            for i in itertools.chain(
+                getattr(node, "handlers", []), getattr(node, "cases", [])
+            )
+        ]
+        statements = [i for i in blocks if i and isinstance(i[0], ast.stmt)]
+        if not statements:
+            return False
+
+        last = max(statements, key=lambda i: i[-1].end_lineno)
+        return not self.lines[last[0].lineno - 1][: last[0].col_offset].strip()
+
+    def get_statement(
+        self, node: ast.stmt, previous: typing.Optional[ast.stmt]
+    ) -> TokenStatement:
+        lineno = previous.end_lineno + 1 if previous else 1
+        leafs: typing.List[TokenLeaf] = []
+
+        for token, prefix in generate_prefixed_tokens(self.lines, lineno):
+            if not leafs and previous and self.ends_with_indented_block(previous):
+                prefix = ""
+            leafs.append(
+                TokenLeaf(
+                    type=get_lib2to3_token_type(token),
+                    value=token.string,
+                    prefix=prefix,
+                    lineno=token.start[0] + lineno - 1,
+                )
+            )
+            if token.type == tokenize.NEWLINE:
+                break
+
+        return TokenStatement(leafs)
+
+    def parse_imports(self) -> typing.Iterable[ImportStatement]:
+        previous: typing.Optional[ast.stmt] = None
+
+        for node in self.tree.body:
+            # multiple statements on the same line separated by ";"
+            # are only imports when import is the first statement
+            is_first_on_line = not previous or previous.end_lineno < node.lineno
+
+            if isinstance(node, ast.Import) and is_first_on_line:
+                yield from parse_imports_from_import_statement(
+                    statement=self.get_statement(node, previous), strict=self.strict
+                )
+
+            elif isinstance(node, ast.ImportFrom) and is_first_on_line:
+                yield from parse_imports_from_import_from_statement(
+                    statement=self.get_statement(node, previous), strict=self.strict
+                )
+
+            previous = node
+
+
+class ParseSession:
+    """
+    Parsers of previously seen texts in long running sessions such as editors
+
+    Each text is parsed incrementally from the previous version of the text
+    at the same path so that only changed imports header is parsed again.
+    """
+
+    def __init__(self) -> None:
+        self.parsers: typing.Dict[typing.Hashable, Parser] = {}
+
+    def get_parser(
+        self,
+        path: typing.Hashable,
+        text: str,
+        parser: typing.Type[Parser],
+        project: typing.Hashable = None,
+    ) -> Parser:
+        self.parsers[path] = parser(
+            text, project=project, previous=self.parsers.get(path)
+        )
+        return self.parsers[path]
+
+
+PARSERS: typing.Dict[str, typing.Type[Parser]] = {
+    parser.name: parser
+    for parser in list(globals().values())
+    if (
+        isinstance(parser, type)
+        and parser is not Parser
+        and issubclass(parser, Parser)
+        and getattr(parser, "is_supported", True)
+    )
+}
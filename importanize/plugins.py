@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
+import ast
 import lib2to3.pytree
 import typing
 from contextlib import suppress
@@ -31,6 +32,9 @@ class ImportanizePlugin:
     ) -> typing.Optional[bool]:
         """ """
 
+    def statement_sort_key(self, statement: "ImportStatement") -> typing.Any:
+        """ """
+
     def group_prepend_to_statement(
         self, group: "BaseImportGroup", index: int, statement: "ImportStatement"
     ) -> str:
@@ -46,6 +50,11 @@ class ImportanizePlugin:
     ) -> "Artifacts":
         """ """
 
+    def inject_ast_artifacts(
+        self, artifacts: "Artifacts", tree: ast.Module, text: str
+    ) -> "Artifacts":
+        """ """
+
     def should_include_statement(
         self, group: "BaseImportGroup", statement: "ImportStatement"
     ) -> bool:
@@ -56,6 +65,19 @@ class ImportanizePlugin:
     ) -> bool:
         """ """
 
+    def filter_statements(
+        self, group: "BaseImportGroup", statements: typing.List["ImportStatement"]
+    ) -> typing.List[bool]:
+        """ """
+
+    def filter_leafs(
+        self,
+        group: "BaseImportGroup",
+        statement: "ImportStatement",
+        leafs: typing.Sequence["ImportLeaf"],
+    ) -> typing.List[bool]:
+        """ """
+
 
 class ImportanizeSpec:
     @hookspec
@@ -66,13 +88,48 @@ class ImportanizeSpec:
     def statement_gt_overwrite(
         self, a: "ImportStatement", b: "ImportStatement", result: bool
     ) -> typing.List[typing.Optional[bool]]:
-        """ """
+        """
+        Overwrite pairwise comparison of statements
+
+        Slow compatibility hook since all statements are compared
+        with python comparison operators when any plugin implements it.
+        Prefer ``statement_sort_key``.
+        """
+
+    @hookspec
+    def statement_sort_key(
+        self, statement: "ImportStatement"
+    ) -> typing.List[typing.Any]:
+        """
+        Extra component of statement sort key
+
+        Components of all plugins are placed in sort key after
+        ``__future__`` and local imports and before separating
+        ``import ..`` from ``from .. import ..`` statements.
+        """
 
     @hookspec
     def inject_tree_artifacts(
         self, artifacts: "Artifacts", tree: lib2to3.pytree.Node, text: str
     ) -> typing.List["Artifacts"]:
-        """ """
+        """
+        Inject artifacts from ``lib2to3`` tree of the complete file
+
+        Complete file is parsed with ``lib2to3`` for this hook
+        even when parser engine parses only leading header or uses ``ast``.
+        Prefer ``inject_ast_artifacts``.
+        """
+
+    @hookspec
+    def inject_ast_artifacts(
+        self, artifacts: "Artifacts", tree: ast.Module, text: str
+    ) -> typing.List["Artifacts"]:
+        """
+        Inject artifacts from ``ast`` tree of the complete file
+
+        ``ast`` parser engine passes its own tree. Other parser engines
+        parse the file with C-accelerated ``ast`` for this hook.
+        """
 
     @hookspec
     def group_prepend_to_statement(
@@ -90,13 +147,46 @@ class ImportanizeSpec:
     def should_include_statement(
         self, group: "BaseImportGroup", statement: "ImportStatement"
     ) -> typing.List[bool]:
-        """ """
+        """
+        Whether to include statement in the group
+
+        Slow compatibility hook since it is called for every statement.
+        Prefer ``filter_statements``.
+        """
 
     @hookspec
     def should_include_leaf(
         self, group: "BaseImportGroup", statement: "ImportStatement", leaf: "ImportLeaf"
     ) -> typing.List[bool]:
-        """ """
+        """
+        Whether to include leaf of the statement in the group
+
+        Slow compatibility hook since it is called for every leaf.
+        Prefer ``filter_leafs``.
+        """
+
+    @hookspec
+    def filter_statements(
+        self, group: "BaseImportGroup", statements: typing.List["ImportStatement"]
+    ) -> typing.List[typing.List[bool]]:
+        """
+        Which statements to include in the group
+
+        Returns mask with whether to keep each statement.
+        """
+
+    @hookspec
+    def filter_leafs(
+        self,
+        group: "BaseImportGroup",
+        statement: "ImportStatement",
+        leafs: typing.Sequence["ImportLeaf"],
+    ) -> typing.List[typing.List[bool]]:
+        """
+        Which leafs of the statement to include in the group
+
+        Returns mask with whether to keep each leaf.
+        """
 
 
 plugin_manager = pluggy.PluginManager("importanize")
@@ -124,6 +214,17 @@ NOT_PIPED_PLUGIN_NAMES = [
 ]
 
 
+def is_hook_implemented(name: str) -> bool:
+    """
+    Whether hook is implemented by at least one registered plugin
+
+    Hooks without implementations are not dispatched at all.
+    Registered implementations are looked up on every call
+    so plugins can be registered directly with ``plugin_manager``.
+    """
+    return bool(getattr(plugin_manager.hook, name).get_hookimpls())
+
+
 def deactivate_plugin(name: str) -> None:
     with suppress(Exception):
         plugin_manager.unregister(name=name, plugin=ALL_PLUGINS[name])
@@ -2,33 +2,88 @@
 from __future__ import absolute_import, print_function, unicode_literals
 import abc
 import itertools
+import operator
 import re
 import typing
 from functools import reduce, total_ordering
 
-from .plugins import plugin_hooks
+from .plugins import is_hook_implemented, plugin_hooks
 from .utils import list_set
 
 
 DOTS = re.compile(r"^(\.+)(.*)")
 
+T = typing.TypeVar("T", bound="BaseImport")
+# fields of immutable imports are only set via object.__setattr__
+_setattr = object.__setattr__
+# leafs are sorted by case of their name first
+# e.g. CONSTANT, then Class and then function or module
+LEAF_CASE_UPPER, LEAF_CASE_MIXED, LEAF_CASE_LOWER = range(3)
+
 
 class BaseImport(metaclass=abc.ABCMeta):
     """
     Base class for import classes
 
-    Adds common comment arguments and common representation
+    Adds common comment arguments and common representation.
+
+    Imports are immutable since their string, hash and such
+    are computed once and cached. Attributes can only be set once
+    and comments and leafs are stored as tuples hence use ``replace``
+    to get changed copy.
     """
 
+    __slots__ = ("standalone_comments", "inline_comments", "strict")
+    # public attributes which define import hence are copied and pickled
+    _fields: typing.Tuple[str, ...] = (
+        "standalone_comments",
+        "inline_comments",
+        "strict",
+    )
+    standalone_comments: typing.Tuple[str, ...]
+    inline_comments: typing.Tuple[str, ...]
+    strict: bool
+
     def __init__(
         self,
-        standalone_comments: typing.List[str] = None,
-        inline_comments: typing.List[str] = None,
+        standalone_comments: typing.Iterable[str] = None,
+        inline_comments: typing.Iterable[str] = None,
         strict: bool = False,
     ):
-        self.standalone_comments = standalone_comments or []
-        self.inline_comments = inline_comments or []
-        self.strict = strict
+        _setattr(self, "standalone_comments", tuple(standalone_comments or ()))
+        _setattr(self, "inline_comments", tuple(inline_comments or ()))
+        _setattr(self, "strict", strict)
+
+    def __setattr__(self, name: str, value: typing.Any) -> None:
+        # cached values would silently go stale if fields were reassigned
+        if name in self._fields:
+            raise AttributeError(
+                f"{self.__class__.__name__} is immutable. "
+                f"Use replace({name}=...) to get changed copy"
+            )
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        if name in self._fields:
+            raise AttributeError(
+                f"{self.__class__.__name__} is immutable. "
+                f"Use replace({name}=...) to get changed copy"
+            )
+        super().__delattr__(name)
+
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        # cached values such as hash are not valid in other processes
+        return {k: getattr(self, k) for k in self._fields}
+
+    def __setstate__(self, state: typing.Dict[str, typing.Any]) -> None:
+        for k in self._fields:
+            _setattr(self, k, state[k])
+
+    def replace(self: T, **kwargs: typing.Any) -> T:
+        """
+        Copy of the import with given attributes replaced
+        """
+        return type(self)(**{**self.__getstate__(), **kwargs})
 
     def __repr__(self) -> str:
         return str(
@@ -37,7 +92,9 @@ class BaseImport(metaclass=abc.ABCMeta):
                 self.__class__.__name__,
                 (
                     "\n    "
-                    + ",\n    ".join(f"{k}={v!r}" for k, v in vars(self).items())
+                    + ",\n    ".join(
+                        f"{k}={v!r}" for k, v in self.__getstate__().items()
+                    )
                     if self.strict
                     else repr(self.as_string())
                 ),
@@ -62,22 +119,41 @@ class ImportLeaf(BaseImport):
     Also aliased modules are supported (e.g. using ``a as b``).
     """
 
+    __slots__ = (
+        "name",
+        "as_name",
+        "statement_comments",
+        "_string",
+        "_hash",
+        "_sort_key",
+    )
+    _fields = (
+        "name",
+        "as_name",
+        "statement_comments",
+        "standalone_comments",
+        "inline_comments",
+        "strict",
+    )
+    name: str
+    as_name: typing.Optional[str]
+    statement_comments: typing.Tuple[str, ...]
+
     def __init__(
         self,
         name: str,
         as_name: str = None,
-        standalone_comments: typing.List[str] = None,
-        inline_comments: typing.List[str] = None,
-        statement_comments: typing.List[str] = None,
+        standalone_comments: typing.Iterable[str] = None,
+        inline_comments: typing.Iterable[str] = None,
+        statement_comments: typing.Iterable[str] = None,
         strict: bool = False,
     ):
         if name == as_name:
             as_name = None
 
-        self.name = name
-        self.as_name = as_name
-
-        self.statement_comments = statement_comments or []
+        _setattr(self, "name", name)
+        _setattr(self, "as_name", as_name)
+        _setattr(self, "statement_comments", tuple(statement_comments or ()))
 
         super().__init__(
             standalone_comments=standalone_comments,
@@ -90,16 +166,23 @@ class ImportLeaf(BaseImport):
         return f"{self.name}" if not self.as_name else f"{self.name} as {self.as_name}"
 
     def as_string(self) -> str:
-        string = self.name
-        if self.as_name:
-            string += f" as {self.as_name}"
-        return string
+        try:
+            return self._string
+        except AttributeError:
+            self._string: str = self.name
+            if self.as_name:
+                self._string += f" as {self.as_name}"
+            return self._string
 
     def __str__(self) -> str:
         return self.as_string()
 
     def __hash__(self) -> int:
-        return hash(self.as_string())
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash: int = hash(self.as_string())
+            return self._hash
 
     def __add__(self, other: "ImportLeaf") -> "ImportLeaf":
         return ImportLeaf(
@@ -125,24 +208,29 @@ class ImportLeaf(BaseImport):
             ]
         return all(params)
 
-    def __gt__(self, other: "ImportLeaf") -> bool:
-        def _type(obj: "ImportLeaf") -> str:
-            if obj.name.isupper():
-                return "upper"
-            elif obj.name.islower():
-                return "lower"
+    @property
+    def sort_key(self) -> typing.Tuple[int, str, str]:
+        try:
+            return self._sort_key
+        except AttributeError:
+            if self.name.isupper():
+                case = LEAF_CASE_UPPER
+            elif self.name.islower():
+                case = LEAF_CASE_LOWER
             else:
-                return "mixed"
-
-        self_type = _type(self)
-        other_type = _type(other)
-
-        priority = ("upper", "mixed", "lower")
+                case = LEAF_CASE_MIXED
+            self._sort_key: typing.Tuple[int, str, str] = (
+                case,
+                self.name,
+                self.as_name or "",
+            )
+            return self._sort_key
 
-        if self_type is not other_type:
-            return priority.index(self_type) > priority.index(other_type)
+    def __gt__(self, other: "ImportLeaf") -> bool:
+        return self.sort_key > other.sort_key
 
-        return (self.name, self.as_name or "") > (other.name, other.as_name or "")
+    def __lt__(self, other: "ImportLeaf") -> bool:
+        return self.sort_key < other.sort_key
 
 
 @total_ordering
@@ -165,23 +253,48 @@ class ImportStatement(BaseImport):
         List of ``ImportLeaf`` instances
     """
 
+    __slots__ = (
+        "line_numbers",
+        "stem",
+        "as_name",
+        "leafs",
+        "_unique_leafs",
+        "_string",
+        "_hash",
+        "_default_sort_key",
+    )
+    _fields = (
+        "line_numbers",
+        "stem",
+        "as_name",
+        "leafs",
+        "standalone_comments",
+        "inline_comments",
+        "strict",
+    )
+    line_numbers: typing.List[int]
+    stem: str
+    as_name: typing.Optional[str]
+    leafs: typing.Tuple[ImportLeaf, ...]
+
     def __init__(
         self,
         stem: str,
         as_name: str = None,
-        leafs: typing.List[ImportLeaf] = None,
+        leafs: typing.Iterable[ImportLeaf] = None,
         line_numbers: typing.List[int] = None,
-        standalone_comments: typing.List[str] = None,
-        inline_comments: typing.List[str] = None,
+        standalone_comments: typing.Iterable[str] = None,
+        inline_comments: typing.Iterable[str] = None,
         strict: bool = False,
     ):
+        leafs = tuple(leafs or ())
         if leafs or stem == as_name:
             as_name = None
 
-        self.line_numbers = line_numbers or []
-        self.stem = stem
-        self.as_name = as_name
-        self.leafs: typing.List[ImportLeaf] = leafs or []
+        _setattr(self, "line_numbers", line_numbers or [])
+        _setattr(self, "stem", stem)
+        _setattr(self, "as_name", as_name)
+        _setattr(self, "leafs", leafs)
 
         super().__init__(
             standalone_comments=standalone_comments,
@@ -195,19 +308,23 @@ class ImportStatement(BaseImport):
 
     @property
     def unique_leafs(self) -> typing.List[ImportLeaf]:
-        return [
-            reduce(lambda a, b: a + b, leafs)
-            for _, leafs in itertools.groupby(
-                sorted(self.leafs), key=lambda i: (i.name, i.as_name)
-            )
-        ]
+        try:
+            return self._unique_leafs
+        except AttributeError:
+            self._unique_leafs: typing.List[ImportLeaf] = [
+                reduce(lambda a, b: a + b, leafs)
+                for _, leafs in itertools.groupby(
+                    sorted(self.leafs, key=operator.attrgetter("sort_key")),
+                    key=lambda i: (i.name, i.as_name),
+                )
+            ]
+            return self._unique_leafs
 
     @property
     def all_inline_comments(self) -> typing.List[str]:
-        return (
-            list_set(itertools.chain(*[i.statement_comments for i in self.leafs]))
-            + self.inline_comments
-        )
+        return list_set(
+            itertools.chain(*[i.statement_comments for i in self.leafs])
+        ) + list(self.inline_comments)
 
     @property
     def root_module(self) -> str:
@@ -220,19 +337,27 @@ class ImportStatement(BaseImport):
         return self.stem.split(".", 1)[0]
 
     def with_line_numbers(self, line_numbers: typing.List[int]) -> "ImportStatement":
-        self.line_numbers = line_numbers
-        return self
+        return self.replace(line_numbers=line_numbers)
 
     def as_string(self) -> str:
-        if not self.leafs:
-            return f"import {self.full_stem}"
-        else:
-            return "from {} import {}".format(
-                self.stem, ", ".join(i.as_string() for i in self.unique_leafs)
+        try:
+            return self._string
+        except AttributeError:
+            self._string: str = (
+                f"import {self.full_stem}"
+                if not self.leafs
+                else "from {} import {}".format(
+                    self.stem, ", ".join(i.as_string() for i in self.unique_leafs)
+                )
             )
+            return self._string
 
     def __hash__(self) -> int:
-        return hash(self.as_string())
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash: int = hash(self.as_string())
+            return self._hash
 
     def __str__(self) -> str:
         return self.as_string()
@@ -266,8 +391,54 @@ class ImportStatement(BaseImport):
             ]
         return all(params)
 
+    @property
+    def default_sort_key(self) -> typing.Tuple[typing.Any, ...]:
+        """
+        Sort key without any components from plugins
+
+        Follows the following rules:
+
+        * ``__future__`` is always first
+        * local imports are below regular imports
+        * ``import ..a`` is ahead of ``import .a``
+        * ``import ..`` is ahead of ``from .. import ..`` imports
+        * otherwise full stem is alphabetically compared
+        * same stems are compared by their first sorted leafs
+        """
+        try:
+            return self._default_sort_key
+        except AttributeError:
+            is_local = self.stem.startswith(".")
+            self._default_sort_key: typing.Tuple[typing.Any, ...] = (
+                self.root_module != "__future__",
+                is_local,
+                # more dots go first hence negative
+                -len(DOTS.findall(self.stem)[0][0]) if is_local else 0,
+                (),
+                bool(self.leafs),
+                self.full_stem,
+                self.unique_leafs[0].sort_key if self.leafs else (),
+            )
+            return self._default_sort_key
+
+    @property
+    def sort_key(self) -> typing.Tuple[typing.Any, ...]:
+        """
+        Sort key with components from ``statement_sort_key`` plugin hook
+        """
+        key = self.default_sort_key
+        if not is_hook_implemented("statement_sort_key"):
+            return key
+        components = tuple(
+            i for i in plugin_hooks.statement_sort_key(statement=self) if i is not None
+        )
+        return key[:3] + (components,) + key[4:]
+
     def __gt__(self, other: "ImportStatement") -> bool:
-        result = self._gt(other)
+        result = self.sort_key > other.sort_key
+
+        if not is_hook_implemented("statement_gt_overwrite"):
+            return result
 
         return next(
             (
@@ -281,48 +452,72 @@ class ImportStatement(BaseImport):
         )
 
     def _gt(self, other: "ImportStatement") -> bool:
-        """
-        Follows the following rules:
+        return self.default_sort_key > other.default_sort_key
 
-        * ``__future__`` is always first
-        * ``import ..`` is ahead of ``from .. import ..`` imports
-        * ``import ..a`` is ahead of ``import .a``
-        * local imports are below regular imports
-        * otherwise root_module is alphabetically compared
-        """
-        # same stem so compare sorted first leafs, if there
-        if self.stem == other.stem and self.leafs and other.leafs:
-            return sorted(self.leafs)[0] > sorted(other.leafs)[0]
-
-        # check for __future__
-        if self.root_module == "__future__":
-            return False
-        elif other.root_module == "__future__":
-            return True
-
-        # local imports
-        if self.stem.startswith(".") and other.stem.startswith("."):
-            # double dot import should be ahead of single dot
-            # so only make comparison when different number of dots
-            self_local = DOTS.findall(self.stem)[0][0]
-            other_local = DOTS.findall(other.stem)[0][0]
-            if len(self_local) != len(other_local):
-                return len(self_local) < len(other_local)
-
-        # only one is local import
-        if any(
-            [
-                not self.stem.startswith(".") and other.stem.startswith("."),
-                self.stem.startswith(".") and not other.stem.startswith("."),
-            ]
-        ):
-            return self.stem.startswith(".")
 
-        # check for ``import ..`` vs ``from .. import ..``
-        self_len = len(self.leafs)
-        other_len = len(other.leafs)
-        if any([not self_len and other_len, self_len and not other_len]):
-            return self_len > other_len
+def sort_statements(
+    statements: typing.Iterable[ImportStatement],
+) -> typing.List[ImportStatement]:
+    """
+    Sort statements by their sort keys
+
+    When any plugin implements ``statement_gt_overwrite`` hook, statements
+    are compared pairwise instead which is much slower.
+    """
+    if is_hook_implemented("statement_gt_overwrite"):
+        return sorted(statements)
+    return sorted(statements, key=operator.attrgetter("sort_key"))
+
+
+def merge_statements(statements: typing.Sequence[ImportStatement]) -> ImportStatement:
+    """
+    Merge statements with the same stem into a single statement
+
+    Same as adding all statements together however done in a single pass.
+    Leafs with the same name are merged right away with their comments
+    merged as ordered sets hence merged statement has unique leafs.
+    """
+    if len(statements) == 1:
+        return statements[0]
+
+    first = statements[0]
+    line_numbers: typing.List[int] = []
+    standalone_comments: typing.List[str] = []
+    inline_comments: typing.List[str] = []
+    same_leafs: typing.Dict[
+        typing.Tuple[str, typing.Optional[str]], typing.List[ImportLeaf]
+    ] = {}
+
+    for statement in statements:
+        assert statement.stem == first.stem
+        assert statement.as_name == first.as_name
+        line_numbers.extend(statement.line_numbers)
+        standalone_comments.extend(statement.standalone_comments)
+        inline_comments.extend(statement.inline_comments)
+        for leaf in statement.leafs:
+            same_leafs.setdefault((leaf.name, leaf.as_name), []).append(leaf)
+
+    def merge_leafs(leafs: typing.List[ImportLeaf]) -> ImportLeaf:
+        if len(leafs) == 1:
+            return leafs[0]
+        return leafs[0].replace(
+            standalone_comments=list_set(
+                itertools.chain.from_iterable(i.standalone_comments for i in leafs)
+            ),
+            inline_comments=list_set(
+                itertools.chain.from_iterable(i.inline_comments for i in leafs)
+            ),
+            statement_comments=list_set(
+                itertools.chain.from_iterable(i.statement_comments for i in leafs)
+            ),
+        )
 
-        # alphabetical sort
-        return self.full_stem > other.full_stem
+    return ImportStatement(
+        stem=first.stem,
+        as_name=first.as_name,
+        leafs=[merge_leafs(i) for i in same_leafs.values()],
+        line_numbers=line_numbers,
+        standalone_comments=standalone_comments,
+        inline_comments=inline_comments,
+        strict=first.strict,
+    )
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Static table of standard library top-level module names
+
+``sys.stdlib_module_names`` is only available in Python 3.10+ so for older
+interpreters bundled table is used. It includes all modules from Python 3.11
+plus modules which were removed in earlier Python 3 versions. Modules which
+were added or removed after Python 3.6 are only included for Python versions
+which have them since for example ``dataclasses`` is a PyPI backport
+in Python 3.6.
+"""
+from __future__ import absolute_import, print_function, unicode_literals
+import sys
+import typing
+
+
+BUNDLED_STDLIB_MODULE_NAMES: typing.FrozenSet[str] = frozenset(
+    """
+    __future__ _abc _aix_support _ast _asyncio _bisect _blake2 _bootlocale
+    _bootsubprocess _bz2 _codecs _codecs_cn _codecs_hk _codecs_iso2022 _codecs_jp
+    _codecs_kr _codecs_tw _collections _collections_abc _compat_pickle _compression
+    _contextvars _crypt _csv _ctypes _curses _curses_panel _datetime _dbm _decimal
+    _dummy_thread _elementtree _frozen_importlib _frozen_importlib_external _functools
+    _gdbm _hashlib _heapq _imp _io _json _locale _lsprof _lzma _markupbase _md5 _msi
+    _multibytecodec _multiprocessing _opcode _operator _osx_support _overlapped _pickle
+    _posixshmem _posixsubprocess _py_abc _pydecimal _pyio _queue _random _scproxy _sha1
+    _sha256 _sha3 _sha512 _signal _sitebuiltins _socket _sqlite3 _sre _ssl _stat
+    _statistics _string _strptime _struct _symtable _thread _threading_local _tkinter
+    _tokenize _tracemalloc _typing _uuid _warnings _weakref _weakrefset _winapi
+    _zoneinfo abc aifc antigravity argparse array ast asynchat asyncio asyncore atexit
+    audioop base64 bdb binascii binhex bisect builtins bz2 cProfile calendar cgi cgitb
+    chunk cmath cmd code codecs codeop collections colorsys compileall concurrent
+    configparser contextlib contextvars copy copyreg crypt csv ctypes curses dataclasses
+    datetime dbm decimal difflib dis distutils doctest dummy_threading email encodings
+    ensurepip enum errno faulthandler fcntl filecmp fileinput fnmatch formatter
+    fractions ftplib functools gc genericpath getopt getpass gettext glob graphlib grp
+    gzip hashlib heapq hmac html http idlelib imaplib imghdr imp importlib inspect io
+    ipaddress itertools json keyword lib2to3 linecache locale logging lzma macpath
+    mailbox mailcap marshal math mimetypes mmap modulefinder msilib msvcrt
+    multiprocessing netrc nis nntplib nt ntpath nturl2path numbers opcode operator
+    optparse os ossaudiodev parser pathlib pdb pickle pickletools pipes pkgutil platform
+    plistlib poplib posix posixpath pprint profile pstats pty pwd py_compile pyclbr
+    pydoc pydoc_data pyexpat queue quopri random re readline reprlib resource
+    rlcompleter runpy sched secrets select selectors shelve shlex shutil signal site
+    smtpd smtplib sndhdr socket socketserver spwd sqlite3 sre_compile sre_constants
+    sre_parse ssl stat statistics string stringprep struct subprocess sunau symbol
+    symtable sys sysconfig syslog tabnanny tarfile telnetlib tempfile termios textwrap
+    this threading time timeit tkinter token tokenize tomllib trace traceback
+    tracemalloc tty turtle turtledemo types typing unicodedata unittest urllib uu uuid
+    venv warnings wave weakref webbrowser winreg winsound wsgiref xdrlib xml xmlrpc
+    zipapp zipfile zipimport zlib zoneinfo
+    """.split()
+)
+
+# Python version in which bundled modules were added after Python 3.6
+ADDED_STDLIB_MODULE_NAMES: typing.Dict[str, typing.Tuple[int, int]] = {
+    "_abc": (3, 7),
+    "_contextvars": (3, 7),
+    "_py_abc": (3, 7),
+    "_queue": (3, 7),
+    "_uuid": (3, 7),
+    "contextvars": (3, 7),
+    "dataclasses": (3, 7),
+    "_posixshmem": (3, 8),
+    "_aix_support": (3, 9),
+    "_bootsubprocess": (3, 9),
+    "_statistics": (3, 9),
+    "_zoneinfo": (3, 9),
+    "graphlib": (3, 9),
+    "zoneinfo": (3, 9),
+    "_typing": (3, 10),
+    "_tokenize": (3, 11),
+    "tomllib": (3, 11),
+}
+
+# Python version in which bundled modules were removed before Python 3.10
+REMOVED_STDLIB_MODULE_NAMES: typing.Dict[str, typing.Tuple[int, int]] = {
+    "macpath": (3, 8),
+    "_dummy_thread": (3, 9),
+    "dummy_threading": (3, 9),
+}
+
+
+def get_bundled_stdlib_module_names(
+    version: typing.Tuple[int, ...]
+) -> typing.FrozenSet[str]:
+    """
+    Get bundled standard library module names of the given Python version
+    """
+    return frozenset(
+        i
+        for i in BUNDLED_STDLIB_MODULE_NAMES
+        if ADDED_STDLIB_MODULE_NAMES.get(i, (3, 0)) <= version
+        and version < REMOVED_STDLIB_MODULE_NAMES.get(i, (4, 0))
+    )
+
+
+STDLIB_MODULE_NAMES: typing.FrozenSet[str] = frozenset(
+    getattr(sys, "stdlib_module_names", None)
+    or get_bundled_stdlib_module_names(sys.version_info[:2])
+)
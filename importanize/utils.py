@@ -2,15 +2,18 @@
 from __future__ import absolute_import, print_function, unicode_literals
 import contextlib
 import difflib
+import functools
 import importlib
 import importlib.util
 import io
 import itertools
+import json
 import logging
 import os
 import pathlib
 import re
 import stat
+import subprocess
 import sys
 import tokenize
 import typing
@@ -18,10 +21,20 @@ from contextlib import suppress
 
 import click
 
+from .stdlib import STDLIB_MODULE_NAMES
+
+
+try:
+    import importlib.metadata as importlib_metadata
+except ImportError:  # pragma: no cover
+    import importlib_metadata  # type: ignore
 
 log = logging.getLogger(__name__)
 PREFIX_RE = re.compile(r"^\s+")
 
+STDLIB = "stdlib"
+SITE_PACKAGES = "sitepackages"
+
 
 def _get_module_path(module_name: str) -> str:
     spec: typing.Optional[importlib.machinery.ModuleSpec] = None
@@ -34,7 +47,7 @@ def _get_module_path(module_name: str) -> str:
         return ""
 
 
-def _is_py_path(module_path: str) -> bool:
+def _get_py_path_prefixes() -> typing.Tuple[str, ...]:
     modules = [
         i
         for i in [
@@ -45,37 +58,350 @@ def _is_py_path(module_path: str) -> bool:
         ]
         if i not in sys.builtin_module_names
     ]
-    return any(
-        module_path.startswith(
-            str(pathlib.Path(importlib.import_module(i).__file__).parent)
-            .lower()
-            .split("site-packages")[0]
-        )
+    return tuple(
+        str(pathlib.Path(importlib.import_module(i).__file__).parent)
+        .lower()
+        .split("site-packages")[0]
         for i in modules
     )
 
 
+# reference paths of python installation do not change within interpreter
+PY_PATH_PREFIXES = _get_py_path_prefixes()
+
+
+def _is_py_path(module_path: str) -> bool:
+    return module_path.startswith(PY_PATH_PREFIXES)
+
+
 def _is_sitepackages_path(module_path: str) -> bool:
     return "site-packages" in module_path.split(os.sep)
 
 
-def is_std_lib(module_name: str) -> bool:
-    if not module_name:
-        return False
+def _is_stdlib_path(module_path: str) -> bool:
+    return _is_py_path(module_path) and not _is_sitepackages_path(module_path)
 
-    if module_name in sys.builtin_module_names:
-        return True
 
-    module_path = _get_module_path(module_name)
-    return not _is_sitepackages_path(module_path) and _is_py_path(module_path)
+def _get_distribution_top_level_names(
+    distribution: importlib_metadata.Distribution,
+) -> typing.Set[str]:
+    names = set()
 
+    # RECORD lists actually installed files
+    # whereas top_level.txt is not always accurate
+    for path in distribution.files or ():
+        top_level = path.parts[0]
+        if len(path.parts) > 1:
+            name = top_level
+        elif path.suffix in {".py", ".so", ".pyd"}:
+            name = top_level.split(".", 1)[0]
+        else:
+            continue
+        if name.isidentifier() and not name.startswith(("__pycache__", "__editable__")):
+            names.add(name)
+
+    if not distribution.files:
+        names.update((distribution.read_text("top_level.txt") or "").split())
+
+    return names
+
+
+def _build_site_packages_index() -> typing.Dict[str, str]:
+    index: typing.Dict[str, str] = {}
 
-def is_site_package(module_name: str) -> bool:
-    if not module_name:
-        return False
+    for distribution in importlib_metadata.distributions():
+        location = os.path.normpath(str(distribution.locate_file("")).lower())
+        if not (_is_sitepackages_path(location) and _is_py_path(location)):
+            continue
+        for name in _get_distribution_top_level_names(distribution):
+            index.setdefault(name, distribution.metadata["Name"])
 
-    module_path = _get_module_path(module_name)
-    return _is_sitepackages_path(module_path) and _is_py_path(module_path)
+    return index
+
+
+class ModuleClassifier:
+    """
+    Classifier of modules importable by the running interpreter
+
+    Finding modules is expensive hence classification is cached
+    for each module for the lifetime of the classifier.
+    Cached state can be dumped and loaded back which allows
+    to persist it across runs. See ``cache.ClassificationCache``.
+    """
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self) -> None:
+        self.site_packages_index: typing.Optional[typing.Dict[str, str]] = None
+        self.modules: typing.Dict[typing.Tuple[str, bool], typing.Optional[str]] = {}
+        self.is_changed = False
+
+    def dump(self, start: int = 0) -> typing.Dict[str, typing.Any]:
+        """
+        Dump classified modules
+
+        Modules are dumped in order they were classified hence ``start``
+        allows to only dump modules classified after previous dump.
+        """
+        return {
+            "site_packages_index": self.site_packages_index,
+            "modules": [
+                [k[0], k[1], v]
+                for k, v in itertools.islice(self.modules.items(), start, None)
+            ],
+        }
+
+    def load(self, data: typing.Dict[str, typing.Any]) -> None:
+        self.site_packages_index = data["site_packages_index"]
+        self.modules = {(name, bool(static)): v for name, static, v in data["modules"]}
+        self.is_changed = False
+
+    def update(self, data: typing.Dict[str, typing.Any]) -> None:
+        """
+        Merge dumped modules such as classified by another process
+        """
+        if self.site_packages_index is None and data["site_packages_index"]:
+            self.site_packages_index = data["site_packages_index"]
+            self.is_changed = True
+        for name, static, v in data["modules"]:
+            key = (name, bool(static))
+            if key not in self.modules:
+                self.modules[key] = v
+                self.is_changed = True
+
+    def get_site_packages_index(self) -> typing.Dict[str, str]:
+        if self.site_packages_index is None:
+            self.site_packages_index = _build_site_packages_index()
+            self.is_changed = True
+        return self.site_packages_index
+
+    def classify(
+        self, module_name: str, static_stdlib: bool = True
+    ) -> typing.Optional[str]:
+        key = (module_name, static_stdlib)
+        try:
+            return self.modules[key]
+        except KeyError:
+            category = self.modules[key] = self._classify(module_name, static_stdlib)
+            self.is_changed = True
+            return category
+
+    def _classify(self, module_name: str, static_stdlib: bool) -> typing.Optional[str]:
+        if not module_name:
+            return None
+
+        if module_name in sys.builtin_module_names:
+            return STDLIB
+
+        root_module = module_name.partition(".")[0]
+
+        if static_stdlib:
+            if root_module in STDLIB_MODULE_NAMES:
+                return STDLIB
+        # stdlib module found first on sys.path wins over installed
+        # distributions shadowing stdlib names such as stdlib backports
+        elif _is_stdlib_path(_get_module_path(module_name)):
+            return STDLIB
+
+        if root_module in self.get_site_packages_index():
+            return SITE_PACKAGES
+
+        if static_stdlib and _is_stdlib_path(_get_module_path(module_name)):
+            return STDLIB
+        return None
+
+
+module_classifier = ModuleClassifier()
+
+# seconds to wait for target interpreter to report its paths
+ENVIRONMENT_PATHS_TIMEOUT = 30
+# executed by target interpreter hence should run on any python version
+ENVIRONMENT_PATHS_SCRIPT = """
+import json, sys, sysconfig
+paths = sysconfig.get_paths()
+print(json.dumps({
+    "stdlib": [paths["stdlib"], paths["platstdlib"]],
+    "site_packages": [paths["purelib"], paths["platlib"]],
+    "builtin_module_names": list(sys.builtin_module_names),
+    "stdlib_module_names": list(getattr(sys, "stdlib_module_names", [])),
+}))
+"""
+
+
+def get_python_executable(python: str) -> str:
+    """
+    Get python executable either from its path or from virtualenv directory
+    """
+    path = pathlib.Path(python).expanduser()
+    candidates = (
+        [path / "bin" / "python", path / "Scripts" / "python.exe"]
+        if path.is_dir()
+        else [path]
+    )
+    for i in candidates:
+        if i.is_file() and os.access(str(i), os.X_OK):
+            return str(i.absolute())
+    raise ValueError(f"{python!r} is not a python executable or virtualenv")
+
+
+def _get_environment_paths(python: str) -> typing.Dict[str, typing.List[str]]:
+    try:
+        output = subprocess.run(
+            [python, "-I", "-c", ENVIRONMENT_PATHS_SCRIPT],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+            timeout=ENVIRONMENT_PATHS_TIMEOUT,
+        ).stdout
+        return typing.cast(typing.Dict[str, typing.List[str]], json.loads(output))
+    except (OSError, ValueError, subprocess.SubprocessError) as e:
+        raise ValueError(f"Could not inspect python environment {python!r} {e}") from e
+
+
+def _iter_importable_names(
+    path: str, packages_only: bool = False
+) -> typing.Iterator[str]:
+    with suppress(OSError):
+        for entry in os.scandir(path):
+            if entry.is_dir():
+                if packages_only and not os.path.isfile(
+                    os.path.join(entry.path, "__init__.py")
+                ):
+                    continue
+                name = entry.name
+            elif os.path.splitext(entry.name)[1] in {".py", ".so", ".pyd"}:
+                name = entry.name.split(".", 1)[0]
+            else:
+                continue
+            if name.isidentifier() and not name.startswith(
+                ("__pycache__", "__editable__")
+            ):
+                yield name
+
+
+class EnvironmentModuleClassifier(ModuleClassifier):
+    """
+    Classifier of modules installed in another python environment
+
+    Target interpreter is only asked once for its stdlib and site-packages
+    directories which are then scanned on disk to build index
+    of all top-level importable names. Modules are never imported
+    or found in the target environment hence ``static_stdlib`` is not
+    applicable as stdlib modules are indexed from the target stdlib.
+
+    ``ValueError`` is raised when target interpreter cannot be inspected
+    since otherwise all modules would silently be left unclassified.
+    """
+
+    def __init__(self, python: str) -> None:
+        self.python = python
+        super().__init__()
+
+    def clear(self) -> None:
+        super().clear()
+        self.environment_index: typing.Optional[typing.Dict[str, str]] = None
+        self.environment_error: typing.Optional[ValueError] = None
+
+    def get_environment_index(self) -> typing.Dict[str, str]:
+        if self.environment_index is not None:
+            return self.environment_index
+        # interpreter is not inspected again for every module
+        if self.environment_error is not None:
+            raise self.environment_error
+
+        try:
+            paths = _get_environment_paths(self.python)
+        except ValueError as e:
+            self.environment_error = e
+            raise
+        index: typing.Dict[str, str] = {}
+
+        for path in list_set(paths.get("site_packages", [])):
+            index.update((i, SITE_PACKAGES) for i in _iter_importable_names(path))
+
+        for path in list_set(paths.get("stdlib", [])):
+            for i in (path, os.path.join(path, "lib-dynload")):
+                index.update((j, STDLIB) for j in _iter_importable_names(i))
+        index.update(
+            (i, STDLIB)
+            for i in itertools.chain(
+                paths.get("builtin_module_names", []),
+                paths.get("stdlib_module_names", []),
+            )
+        )
+
+        self.environment_index = index
+        return index
+
+    def _classify(self, module_name: str, static_stdlib: bool) -> typing.Optional[str]:
+        return self.get_environment_index().get(module_name.partition(".")[0])
+
+
+@functools.lru_cache(maxsize=None)
+def get_module_classifier(python_env: str = None) -> ModuleClassifier:
+    """
+    Get classifier of either running interpreter or of given python environment
+    """
+    if not python_env:
+        return module_classifier
+    return EnvironmentModuleClassifier(python_env)
+
+
+def get_site_packages_index() -> typing.Dict[str, str]:
+    """
+    Get mapping of top-level importable names to installed distribution names
+
+    Only distributions installed in site-packages of this Python are indexed
+    hence for example editable installs of local projects are not included.
+    Index is built from distributions metadata without importing anything.
+    """
+    return module_classifier.get_site_packages_index()
+
+
+def classify_module(
+    module_name: str, static_stdlib: bool = True
+) -> typing.Optional[str]:
+    """
+    Classify module as either ``STDLIB`` or ``SITE_PACKAGES`` module
+
+    When ``static_stdlib`` is used, stdlib modules are looked up in static
+    table of stdlib module names without any I/O.
+    Site packages are looked up in index of installed distributions.
+    Only remaining modules are found on the filesystem.
+    """
+    return module_classifier.classify(module_name, static_stdlib)
+
+
+@functools.lru_cache(maxsize=None)
+def get_source_roots_index(
+    source_roots: typing.Tuple[str, ...]
+) -> typing.FrozenSet[str]:
+    """
+    Get top-level importable names of modules and packages within source roots
+
+    Each set of source roots is scanned only once per run
+    so classifying imports is a simple set lookup.
+    """
+    return frozenset(
+        itertools.chain.from_iterable(
+            _iter_importable_names(i, packages_only=True) for i in source_roots
+        )
+    )
+
+
+def is_std_lib(
+    module_name: str, static_stdlib: bool = True, python_env: str = None
+) -> bool:
+    classifier = get_module_classifier(python_env)
+    return classifier.classify(module_name, static_stdlib) == STDLIB
+
+
+def is_site_package(
+    module_name: str, static_stdlib: bool = True, python_env: str = None
+) -> bool:
+    classifier = get_module_classifier(python_env)
+    return classifier.classify(module_name, static_stdlib) == SITE_PACKAGES
 
 
 def force_text(data: typing.Union[bytes, str]) -> str:
@@ -112,11 +438,8 @@ def takeafter(
 
 
 def list_set(iterable: typing.Iterable[T]) -> typing.List[T]:
-    items: typing.List[T] = []
-    for i in iterable:
-        if i not in items:
-            items.append(i)
-    return items
+    # dict preserves insertion order hence it is an ordered set
+    return list(dict.fromkeys(iterable))
 
 
 class TextPrefixSpex(typing.NamedTuple):
@@ -293,6 +616,12 @@ class StdPath(BasePath):
             newline=newline,
         )
 
+    def __reduce__(self) -> typing.Tuple[typing.Any, ...]:
+        # preserve encoding and prefix detected while reading file
+        # so that it is written back the same way by another process
+        state = {k: v for k, v in vars(self).items() if k in ("encoding", "prefix")}
+        return (self.__class__, tuple(self.parts), state)
+
     def is_std_stream(self) -> bool:
         return self.name == "-"
 
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
+import ast
 import typing
 
 from importanize.contrib.unused_imports import (
@@ -7,12 +8,12 @@ from importanize.contrib.unused_imports import (
     UnusedImportsPlugin,
 )
 from importanize.groups import RemainderGroup
-from importanize.parser import Artifacts, parse_to_tree
+from importanize.parser import Artifacts
 from importanize.statements import ImportLeaf, ImportStatement
 
 
 class TestUnusedImportsPlugin:
-    def test_inject_tree_artifacts(self) -> None:
+    def test_inject_ast_artifacts(self) -> None:
         text = "\n".join(
             [
                 "import os",
@@ -21,8 +22,8 @@ class TestUnusedImportsPlugin:
                 "chain",
             ]
         )
-        artifacts = UnusedImportsPlugin().inject_tree_artifacts(
-            Artifacts.default(), parse_to_tree(text), text
+        artifacts = UnusedImportsPlugin().inject_ast_artifacts(
+            Artifacts.default(), ast.parse(text), text
         )
 
         assert typing.cast(UnsusedImportsArtifacts, artifacts).unused_imports == [
@@ -89,3 +90,41 @@ class TestUnusedImportsPlugin:
             ImportStatement("itertools", leafs=[ImportLeaf("chain", as_name="ichain")]),
             ImportLeaf("chain", as_name="ichain"),
         )
+
+    def test_filter_statements(self) -> None:
+        plugin = UnusedImportsPlugin()
+        artifacts = Artifacts.default()
+        typing.cast(UnsusedImportsArtifacts, artifacts).unused_imports = ["os"]
+
+        assert plugin.filter_statements(
+            RemainderGroup(artifacts=artifacts),
+            [
+                ImportStatement("os"),
+                ImportStatement("os", inline_comments=["noqa"]),
+                ImportStatement("sys"),
+            ],
+        ) == [False, True, True]
+
+    def test_filter_leafs(self) -> None:
+        plugin = UnusedImportsPlugin()
+        artifacts = Artifacts.default()
+        typing.cast(UnsusedImportsArtifacts, artifacts).unused_imports = [
+            "os.path",
+            "os.sep",
+        ]
+        leafs = [
+            ImportLeaf("path"),
+            ImportLeaf("sep", statement_comments=["noqa"]),
+            ImportLeaf("getcwd"),
+        ]
+
+        assert plugin.filter_leafs(
+            RemainderGroup(artifacts=artifacts),
+            ImportStatement("os", leafs=leafs),
+            leafs,
+        ) == [False, True, True]
+        assert plugin.filter_leafs(
+            RemainderGroup(artifacts=artifacts),
+            ImportStatement("os", leafs=leafs, inline_comments=["noqa"]),
+            leafs,
+        ) == [True, True, True]
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+import os
+import sys
+from pathlib import Path
+from unittest import mock
+
+from importanize.cache import (
+    ClassificationCache,
+    ParseCache,
+    get_default_cache_dir,
+    get_interpreter_fingerprint,
+)
+from importanize.parser import AstParser, HeaderParser, parse_imports
+from importanize.utils import SITE_PACKAGES, STDLIB, ModuleClassifier
+
+
+TEXT = "import a\nfrom b import c  # comment\n"
+
+
+def test_get_default_cache_dir() -> None:
+    with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": "/cache"}):
+        assert get_default_cache_dir() == Path("/cache/importanize")
+    with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": ""}):
+        assert get_default_cache_dir() == Path("~/.cache/importanize").expanduser()
+
+
+class TestParseCache:
+    def test_get_key(self) -> None:
+        cache = ParseCache()
+
+        assert cache.get_key(TEXT, HeaderParser) == cache.get_key(TEXT, HeaderParser)
+        assert cache.get_key(TEXT, HeaderParser) != cache.get_key(TEXT, AstParser)
+        assert cache.get_key(TEXT, HeaderParser) != cache.get_key("", HeaderParser)
+
+    def test_memory(self) -> None:
+        cache = ParseCache()
+        artifacts = HeaderParser(TEXT).get_artifacts()
+        imports = list(parse_imports(TEXT))
+
+        assert cache.get("key") is None
+
+        cache.set("key", artifacts, imports)
+        cached = cache.get("key")
+
+        assert cached == (artifacts, imports)
+        assert cached is not None and cached[1][0] is not imports[0]
+
+    def test_memory_eviction(self) -> None:
+        imports = list(parse_imports(TEXT))
+        cache = ParseCache()
+        cache.set("foo", HeaderParser(TEXT).get_artifacts(), imports)
+        cache.max_memory_size = cache.memory_size * 2
+        cache.set("bar", HeaderParser(TEXT).get_artifacts(), imports)
+
+        cache.get("foo")
+        cache.set("baz", HeaderParser(TEXT).get_artifacts(), imports)
+
+        assert list(cache.memory) == ["foo", "baz"]
+        assert cache.memory_size == cache.max_memory_size
+
+    def test_disk(self, tmp_path: Path) -> None:
+        artifacts = HeaderParser(TEXT).get_artifacts()
+        imports = list(parse_imports(TEXT))
+
+        ParseCache(path=tmp_path / "cache").set("key", artifacts, imports)
+
+        assert (tmp_path / "cache" / "key.pickle").exists()
+        assert ParseCache(path=tmp_path / "cache").get("key") == (artifacts, imports)
+        assert ParseCache(path=tmp_path / "cache").get("other") is None
+
+    def test_disk_invalid(self, tmp_path: Path) -> None:
+        (tmp_path / "key.pickle").write_bytes(b"invalid")
+
+        assert ParseCache(path=tmp_path).get("key") is None
+
+    def test_prune(self, tmp_path: Path) -> None:
+        cache = ParseCache(path=tmp_path)
+        for i, key in enumerate(["foo", "bar", "baz"]):
+            cache.set(key, HeaderParser(TEXT).get_artifacts(), [])
+            os.utime(str(tmp_path / f"{key}.pickle"), (i, i))
+        cache.max_disk_size = (tmp_path / "foo.pickle").stat().st_size * 2
+
+        cache.prune()
+
+        assert sorted(i.name for i in tmp_path.glob("*.pickle")) == [
+            "bar.pickle",
+            "baz.pickle",
+        ]
+
+    def test_prune_estimated_size(self, tmp_path: Path) -> None:
+        cache = ParseCache(path=tmp_path)
+        cache.set("foo", HeaderParser(TEXT).get_artifacts(), [])
+        size = (tmp_path / "foo.pickle").stat().st_size
+
+        cache.prune()
+        assert cache.load_size() == size
+
+        # under the limit cache directory is not scanned
+        cache.set("bar", HeaderParser(TEXT).get_artifacts(), [])
+        with mock.patch.object(Path, "glob") as glob:
+            cache.prune()
+        glob.assert_not_called()
+        assert cache.load_size() == size * 2
+
+        cache.max_disk_size = size * 2
+        cache.set("baz", HeaderParser(TEXT).get_artifacts(), [])
+        os.utime(str(tmp_path / "foo.pickle"), (0, 0))
+        cache.prune()
+
+        assert sorted(i.name for i in tmp_path.glob("*.pickle")) == [
+            "bar.pickle",
+            "baz.pickle",
+        ]
+        assert cache.load_size() == size * 2
+
+    def test_prune_nothing_written(self, tmp_path: Path) -> None:
+        (tmp_path / "foo.pickle").write_bytes(b"foo")
+
+        with mock.patch.object(Path, "glob") as glob:
+            ParseCache(path=tmp_path, max_disk_size=0).prune()
+        glob.assert_not_called()
+
+    def test_prune_no_path(self, tmp_path: Path) -> None:
+        ParseCache().prune()
+        ParseCache(path=tmp_path / "missing").prune()
+
+
+def test_get_interpreter_fingerprint(tmp_path: Path) -> None:
+    site_packages = tmp_path / "site-packages"
+    site_packages.mkdir()
+    os.utime(str(site_packages), (1, 1))
+
+    with mock.patch.object(sys, "path", [str(site_packages)]):
+        fingerprint = get_interpreter_fingerprint()
+        assert get_interpreter_fingerprint() == fingerprint
+
+        os.utime(str(site_packages), (2, 2))
+        assert get_interpreter_fingerprint() != fingerprint
+
+    assert get_interpreter_fingerprint() != fingerprint
+
+
+class TestClassificationCache:
+    def test_save_load(self, tmp_path: Path) -> None:
+        classifier = ModuleClassifier()
+        classifier.site_packages_index = {"foo": "foo-dist"}
+        assert classifier.classify("foo") == SITE_PACKAGES
+        assert classifier.classify("json", static_stdlib=False) == STDLIB
+
+        ClassificationCache(path=tmp_path / "cache", classifier=classifier).save()
+        assert not classifier.is_changed
+        assert len(list((tmp_path / "cache").glob("classify-*.json"))) == 1
+
+        loaded = ModuleClassifier()
+        ClassificationCache(path=tmp_path / "cache", classifier=loaded).load()
+        assert loaded.site_packages_index == {"foo": "foo-dist"}
+        assert loaded.modules == classifier.modules
+        assert not loaded.is_changed
+
+        with mock.patch(
+            "importanize.cache.get_interpreter_fingerprint", return_value="other"
+        ):
+            invalidated = ModuleClassifier()
+            ClassificationCache(path=tmp_path / "cache", classifier=invalidated).load()
+            assert invalidated.site_packages_index is None
+            assert invalidated.modules == {}
+
+    def test_save_not_changed(self, tmp_path: Path) -> None:
+        ClassificationCache(path=tmp_path, classifier=ModuleClassifier()).save()
+
+        assert list(tmp_path.iterdir()) == []
+
+    def test_load_invalid(self, tmp_path: Path) -> None:
+        classifier = ModuleClassifier()
+        cache = ClassificationCache(path=tmp_path, classifier=classifier)
+        cache.get_disk_path().write_text("invalid")
+
+        cache.load()
+
+        assert classifier.modules == {}
+
+    def test_prune(self, tmp_path: Path) -> None:
+        for i in range(3):
+            path = tmp_path / f"classify-{i}.json"
+            path.write_text("{}")
+            os.utime(str(path), (i, i))
+
+        ClassificationCache(path=tmp_path, max_files=2).prune()
+
+        assert sorted(i.name for i in tmp_path.iterdir()) == [
+            "classify-1.json",
+            "classify-2.json",
+        ]
+
+    def test_no_path(self) -> None:
+        ClassificationCache().load()
+        ClassificationCache().save()
+        ClassificationCache().prune()
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 import json
+import sys
 from pathlib import Path
 from unittest import mock
 
@@ -14,6 +15,7 @@ from importanize.config import (
     NoImportanizeConfig,
 )
 from importanize.formatters import LinesFormatter
+from importanize.parser import AstParser
 from importanize.statements import ImportStatement
 from importanize.utils import StdPath
 
@@ -22,6 +24,13 @@ class TestGroupConfig:
     def test_default(self) -> None:
         assert GroupConfig.default().type == "default"
 
+    def test_check_python_env(self, tmp_path: Path) -> None:
+        Config().check_python_env()
+        Config(python_env=sys.executable).check_python_env()
+
+        with pytest.raises(InvalidConfig):
+            Config(python_env=str(tmp_path / "missing")).check_python_env()
+
     def test_as_dict(self) -> None:
         assert GroupConfig.default().as_dict() == {"type": "default"}
         assert GroupConfig(type="packages", packages=["foo"]).as_dict() == {
@@ -51,6 +60,8 @@ class TestConfig:
                     "after_imports_new_lines": "5",
                     "length": "100",
                     "formatter": "lines",
+                    "parser": "ast",
+                    "static_stdlib": False,
                     "groups": [{"type": "remainder"}],
                     "exclude": ["exclude"],
                     "add_imports": ["import foo"],
@@ -61,6 +72,8 @@ class TestConfig:
             after_imports_new_lines=5,
             length=100,
             formatter=LinesFormatter,
+            parser=AstParser,
+            static_stdlib=False,
             groups=[GroupConfig(type="remainder")],
             exclude=["exclude"],
             add_imports=(ImportStatement("foo"),),
@@ -98,6 +111,13 @@ class TestConfig:
                 "\n".join(["[importanize]", "formatter=foo"]),
             )
 
+    def test_ini_invalid_parser(self) -> None:
+        with pytest.raises(InvalidConfig):
+            Config.from_ini(
+                StdPath("invalid.ini"),
+                "\n".join(["[importanize]", "parser=foo"]),
+            )
+
     def test_ini_invalid_length(self) -> None:
         with pytest.raises(InvalidConfig):
             Config.from_ini(
@@ -139,6 +159,7 @@ class TestConfig:
                     "after_imports_new_lines=5",
                     "length=100",
                     "formatter=lines",
+                    "static_stdlib=false",
                     "groups=",
                     "   stdlib",
                     "   packages:mypackage",
@@ -153,6 +174,7 @@ class TestConfig:
             after_imports_new_lines=5,
             length=100,
             formatter=LinesFormatter,
+            static_stdlib=False,
             groups=[
                 GroupConfig(type="stdlib"),
                 GroupConfig(type="packages", packages=["foo"]),
@@ -198,12 +220,38 @@ class TestConfig:
         assert not Config.find(Path(Path(__file__).root))
 
     def test_merge(self) -> None:
-        c = Config.default().merge(Config(length=100, formatter=LinesFormatter))
+        c = Config.default().merge(
+            Config(length=100, formatter=LinesFormatter, parser=AstParser)
+        )
         assert c.length == 100
         assert c.formatter is LinesFormatter
+        assert c.parser is AstParser
+
+    def test_parse_python_env(self, tmp_path: Path) -> None:
+        python = tmp_path / "venv" / "bin" / "python"
+        python.parent.mkdir(parents=True)
+        python.write_text("")
+        python.chmod(0o755)
+
+        assert Config._parse_python_env(None) is None
+        assert Config._parse_python_env("") is None
+        assert Config._parse_python_env(str(python)) == str(python)
+        assert Config._parse_python_env(str(tmp_path / "venv")) == str(python)
+        assert Config._parse_python_env("venv", tmp_path / "setup.cfg") == str(python)
+        assert Config.from_json(
+            tmp_path / "importanize.json", json.dumps({"python_env": "venv"})
+        ).python_env == str(python)
+        assert Config.from_ini(
+            tmp_path / "setup.cfg", "[importanize]\npython_env=venv/bin/python"
+        ).python_env == str(python)
+        with pytest.raises(InvalidConfig):
+            Config._parse_python_env(str(tmp_path / "missing"))
 
     def test_as_dict(self) -> None:
         assert Config.default().as_dict()["formatter"] == "grouped"
+        assert Config.default().as_dict()["parser"] == "header"
+        assert Config.default().as_dict()["static_stdlib"] is True
+        assert Config.default().as_dict()["python_env"] == ""
         assert Config.default().as_dict()["groups"][0] == {"type": "stdlib"}
 
     def test_as_json(self) -> None:
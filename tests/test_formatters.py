@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
+import io
 import typing
 
 from importanize.config import Config
 from importanize.formatters import (
+    FormattedMemo,
     Formatter,
     GroupedFormatter,
     GroupedInlineAlignedFormatter,
     LinesFormatter,
+    StatementView,
 )
 from importanize.parser import Artifacts
 from importanize.statements import ImportLeaf, ImportStatement
@@ -22,6 +25,34 @@ long_obj1 = obj1 * 13
 long_obj2 = obj2 * 13
 
 
+class TestStatementView:
+    def test_from_statement(self) -> None:
+        statement = ImportStatement(
+            "a",
+            leafs=[ImportLeaf("c"), ImportLeaf("b", statement_comments=["noqa"])],
+            standalone_comments=["comment"],
+        )
+        view = StatementView.from_statement(statement)
+
+        assert view.stem == "a"
+        assert view.leafs is statement.unique_leafs
+        assert view.standalone_comments == ("comment",)
+        assert view.inline_comments == ["noqa"]
+        assert view.as_string() == "from a import b, c"
+
+    def test_overwrites(self) -> None:
+        leaf = ImportLeaf("b", inline_comments=["leaf"])
+        statement = ImportStatement("a", leafs=[leaf, ImportLeaf("c")])
+        view = StatementView.from_statement(statement)._replace(
+            leafs=[leaf], leafs_inline_comments={leaf: ["view"]}
+        )
+
+        assert view.as_string() == "from a import b"
+        assert view.get_leaf_inline_comments(leaf) == ["view"]
+        assert view.get_leaf_inline_comments(ImportLeaf("c")) == ()
+        assert leaf.inline_comments == ("leaf",)
+
+
 class BaseTestFormatter:
     formatter: typing.Type[Formatter]
 
@@ -141,10 +172,49 @@ class TestGroupedFormatter(BaseTestFormatter):
             inline_comments=["noqa"],
         )
 
+    def test_write(self) -> None:
+        statement = ImportStatement(
+            long_module, leafs=[ImportLeaf(long_obj1), ImportLeaf(long_obj2)]
+        )
+        formatter = self.formatter(
+            statement, config=Config.default(), artifacts=Artifacts()
+        )
+        writer = io.StringIO()
+        writer.write("import a\n")
+
+        formatter.write(writer)
+
+        assert writer.getvalue() == "\n".join(
+            [
+                "import a",
+                f"from {long_module} import (",
+                f"    {long_obj1},",
+                f"    {long_obj2},",
+                ")",
+            ]
+        )
+        assert writer.getvalue() == "import a\n" + formatter.format()
+
 
 class TestGroupedInlineAlignedFormatter(BaseTestFormatter):
     formatter = GroupedInlineAlignedFormatter
 
+    def test_view(self) -> None:
+        statement = ImportStatement(
+            "a",
+            leafs=[ImportLeaf("c"), ImportLeaf("b"), ImportLeaf("c")],
+            inline_comments=["noqa", "noqa"],
+        )
+        formatter = GroupedInlineAlignedFormatter(
+            statement, config=Config.default(), artifacts=Artifacts()
+        )
+
+        assert formatter.view.inline_comments == ()
+        assert formatter.view.get_leaf_inline_comments(ImportLeaf("c")) == ["noqa"]
+        assert formatter.view.get_leaf_inline_comments(ImportLeaf("b")) == ()
+        assert statement.inline_comments == ("noqa", "noqa")
+        assert formatter.format() == "from a import b, c  # noqa"
+
     def test_formatted(self) -> None:
         # Test one-line imports
         self._test(module, [], [f"import {module}"])
@@ -242,6 +312,20 @@ class TestGroupedInlineAlignedFormatter(BaseTestFormatter):
 class TestLinesFormatter(BaseTestFormatter):
     formatter = LinesFormatter
 
+    def test_views(self) -> None:
+        statement = ImportStatement(
+            "a",
+            leafs=[ImportLeaf("b"), ImportLeaf("c")],
+            standalone_comments=["comment"],
+        )
+        views = LinesFormatter(
+            statement, config=Config.default(), artifacts=Artifacts()
+        ).views
+
+        assert [i.as_string() for i in views] == ["from a import b", "from a import c"]
+        assert [i.standalone_comments for i in views] == [("comment",), ()]
+        assert all(i.statement is statement for i in views)
+
     def test_formatted(self) -> None:
         # Test one-line imports
         self._test(module, [], [f"import {module}"])
@@ -324,3 +408,56 @@ class TestLinesFormatter(BaseTestFormatter):
             ],
             standalone_comments=["comment"],
         )
+
+
+class TestFormattedMemo:
+    def test_format(self) -> None:
+        memo = FormattedMemo()
+        config = Config.default()
+        artifacts = Artifacts()
+
+        def _format(statement: ImportStatement, **kwargs: typing.Any) -> str:
+            return memo.format(
+                kwargs.get("formatter", GroupedFormatter),
+                statement,
+                config=kwargs.get("config", config),
+                artifacts=kwargs.get("artifacts", artifacts),
+            )
+
+        statement = ImportStatement("a", leafs=[ImportLeaf("b")])
+        assert _format(statement) == "from a import b"
+        assert (
+            _format(ImportStatement("a", leafs=[ImportLeaf("b")])) == "from a import b"
+        )
+        assert (memo.hits, memo.misses) == (1, 1)
+
+        assert (
+            _format(
+                ImportStatement("a", leafs=[ImportLeaf("b", inline_comments=["noqa"])])
+            )
+            == "from a import b  # noqa"
+        )
+        assert (
+            _format(
+                ImportStatement("a", leafs=[ImportLeaf("b"), ImportLeaf("c")]),
+                formatter=LinesFormatter,
+                artifacts=Artifacts(sep="\r\n"),
+            )
+            == "from a import b\r\nfrom a import c"
+        )
+        assert (memo.hits, memo.misses) == (1, 3)
+
+        memo.clear()
+        assert (memo.hits, memo.misses) == (0, 0)
+        assert not memo.memo
+
+    def test_max_size(self) -> None:
+        memo = FormattedMemo(max_size=2)
+        config = Config.default()
+        artifacts = Artifacts()
+
+        for i in ["a", "b", "a", "c"]:
+            memo.format(GroupedFormatter, ImportStatement(i), config, artifacts)
+
+        assert [i[3] for i in memo.memo] == ["a", "c"]
+        assert (memo.hits, memo.misses) == (1, 3)
@@ -1,20 +1,31 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
+import io
+import typing
+from pathlib import Path
+from unittest import mock
 
 import pytest  # type: ignore
 
 from importanize.config import Config, GroupConfig
 from importanize.groups import (
     BaseImportGroup as _BaseImportGroup,
+    DispatchPlan,
+    FirstPartyGroup,
     ImportGroups,
     LocalGroup,
     PackagesGroup,
+    PackagesTrie,
+    PatternGroup,
+    PatternsMatcher,
     RemainderGroup,
     SitePackagesGroup,
     StdLibGroup,
 )
 from importanize.parser import Artifacts
+from importanize.plugins import hookimpl, plugin_manager
 from importanize.statements import ImportLeaf, ImportStatement
+from importanize.utils import SITE_PACKAGES
 
 
 class BaseImportGroup(_BaseImportGroup):
@@ -70,6 +81,88 @@ class TestBaseImportGroup:
             ImportStatement("b", leafs=[ImportLeaf("c")]),
         ]
 
+    def test_unique_statements_filtered_leafs(self) -> None:
+        statement = ImportStatement("a", leafs=[ImportLeaf("b"), ImportLeaf("c")])
+        group = BaseImportGroup(statements=[statement])
+
+        with mock.patch(
+            "importanize.groups.is_hook_implemented",
+            side_effect={"filter_leafs"}.__contains__,
+        ), mock.patch(
+            "importanize.groups.plugin_hooks.filter_leafs",
+            side_effect=lambda group, statement, leafs: [
+                [i.name != "c" for i in leafs]
+            ],
+        ):
+            assert group.unique_statements == [
+                ImportStatement("a", leafs=[ImportLeaf("b")])
+            ]
+
+        # original statement is not mutated
+        assert statement.leafs == (ImportLeaf("b"), ImportLeaf("c"))
+
+    def test_filter_statements(self) -> None:
+        group = BaseImportGroup()
+        statements = [ImportStatement("a"), ImportStatement("b"), ImportStatement("c")]
+
+        with mock.patch(
+            "importanize.groups.is_hook_implemented",
+            side_effect={"filter_statements"}.__contains__,
+        ), mock.patch(
+            "importanize.groups.plugin_hooks.filter_statements",
+            return_value=[[True, False, True], [True, True, False]],
+        ):
+            assert group.filter_statements(statements) == [ImportStatement("a")]
+
+    def test_filter_wrong_mask_length(self) -> None:
+        group = BaseImportGroup()
+        statements = [ImportStatement("a"), ImportStatement("b"), ImportStatement("c")]
+        statement = ImportStatement("a", leafs=[ImportLeaf("a"), ImportLeaf("b")])
+
+        with mock.patch(
+            "importanize.groups.is_hook_implemented",
+            side_effect={"filter_statements", "filter_leafs"}.__contains__,
+        ), mock.patch(
+            "importanize.groups.plugin_hooks.filter_statements",
+            return_value=[[True]],
+        ), mock.patch(
+            "importanize.groups.plugin_hooks.filter_leafs",
+            return_value=[[True, True, True]],
+        ):
+            with pytest.raises(ValueError, match="filter_statements"):
+                group.filter_statements(statements)
+            with pytest.raises(ValueError, match="filter_leafs"):
+                group.filter_leafs(statement, statement.leafs)
+
+    def test_filter_statements_compatibility(self) -> None:
+        class Plugin:
+            @hookimpl
+            def should_include_statement(
+                self, group: _BaseImportGroup, statement: ImportStatement
+            ) -> bool:
+                return statement.stem != "b"
+
+            @hookimpl
+            def should_include_leaf(
+                self,
+                group: _BaseImportGroup,
+                statement: ImportStatement,
+                leaf: ImportLeaf,
+            ) -> bool:
+                return leaf.name != "b"
+
+        group = BaseImportGroup()
+        statement = ImportStatement("a", leafs=[ImportLeaf("a"), ImportLeaf("b")])
+
+        plugin_manager.register(Plugin(), name="compatibility")
+        try:
+            assert group.filter_statements(
+                [ImportStatement("a"), ImportStatement("b")]
+            ) == [ImportStatement("a")]
+            assert group.filter_leafs(statement, statement.leafs) == [ImportLeaf("a")]
+        finally:
+            plugin_manager.unregister(name="compatibility")
+
     def test_all_line_numbers(self) -> None:
         s2 = ImportStatement("b", line_numbers=[2, 7])
         s1 = ImportStatement("a", line_numbers=[1, 2])
@@ -130,6 +223,37 @@ class TestBaseImportGroup:
             [f"import a", f"from {stem} import (", f"    c,", f"    d,", f")"]
         )
 
+    def test_write(self) -> None:
+        class Plugin:
+            @hookimpl
+            def group_prepend_to_statement(
+                self, group: _BaseImportGroup, index: int, statement: ImportStatement
+            ) -> typing.Optional[str]:
+                return f"# {statement.stem}" if index else None
+
+            @hookimpl
+            def group_append_to_statement(
+                self, group: _BaseImportGroup, index: int, statement: ImportStatement
+            ) -> typing.Optional[str]:
+                return "" if not index else None
+
+        group = BaseImportGroup(
+            statements=[ImportStatement("b"), ImportStatement("a")],
+            artifacts=Artifacts(sep="\r\n"),
+        )
+        writer = io.StringIO()
+        writer.write("# header\r\n")
+
+        plugin_manager.register(Plugin(), name="lines")
+        try:
+            group.write(writer)
+            assert writer.getvalue() == "\r\n".join(
+                ["# header", "import a", "", "# b", "import b"]
+            )
+            assert writer.getvalue() == "# header\r\n" + group.formatted()
+        finally:
+            plugin_manager.unregister(name="lines")
+
 
 class TestSitePackagesGroup:
     group = SitePackagesGroup
@@ -138,6 +262,15 @@ class TestSitePackagesGroup:
         assert self.group().should_add_statement(ImportStatement("pytest.test"))
         assert not self.group().should_add_statement(ImportStatement("os.path"))
 
+    def test_should_add_statement_python_env(self) -> None:
+        group = self.group(config=Config(python_env="python"))
+        with mock.patch(
+            "importanize.utils.EnvironmentModuleClassifier.get_environment_index",
+            return_value={"six": SITE_PACKAGES},
+        ):
+            assert group.should_add_statement(ImportStatement("six.moves"))
+            assert not group.should_add_statement(ImportStatement("pytest.test"))
+
 
 class TestStdLibGroup:
     group = StdLibGroup
@@ -147,6 +280,24 @@ class TestStdLibGroup:
         assert not self.group().should_add_statement(ImportStatement("pytest.test"))
 
 
+class TestPackagesTrie:
+    def test_match(self) -> None:
+        foo = GroupConfig(type="packages", packages=["foo", "bar"])
+        foo_bar = GroupConfig(type="packages", packages=[" foo.bar", "bar"])
+        trie = PackagesTrie.from_groups(
+            [GroupConfig(type="stdlib"), foo, foo_bar, GroupConfig(type="remainder")]
+        )
+
+        assert trie.match("foo") is foo
+        assert trie.match("foo.baz") is foo
+        assert trie.match("foo.bar") is foo_bar
+        assert trie.match("foo.bar.baz") is foo_bar
+        assert trie.match("bar") is foo
+        assert trie.match("foobar") is None
+        assert trie.match("baz.foo") is None
+        assert trie.match(".foo") is None
+
+
 class TestPackagesGroup:
     group = PackagesGroup
 
@@ -158,6 +309,24 @@ class TestPackagesGroup:
             group_config=GroupConfig(type="packages", packages=["foo"])
         ).should_add_statement(ImportStatement("os.path"))
 
+    def test_should_add_statement_longest_prefix(self) -> None:
+        foo = GroupConfig(type="packages", packages=["foo"])
+        foo_bar = GroupConfig(type="packages", packages=["foo.bar"])
+        config = Config(groups=[foo, foo_bar])
+
+        assert self.group(group_config=foo, config=config).should_add_statement(
+            ImportStatement("foo.baz")
+        )
+        assert not self.group(group_config=foo, config=config).should_add_statement(
+            ImportStatement("foo.bar.baz")
+        )
+        assert self.group(group_config=foo_bar, config=config).should_add_statement(
+            ImportStatement("foo.bar.baz")
+        )
+        assert not self.group(group_config=foo_bar, config=config).should_add_statement(
+            ImportStatement("foo")
+        )
+
     def test_validate_group_config(self) -> None:
         g = GroupConfig(type="packages", packages=["foo"])
         assert self.group.validate_group_config(g) is g
@@ -165,6 +334,123 @@ class TestPackagesGroup:
             self.group.validate_group_config(GroupConfig(type="packages"))
 
 
+class TestPatternsMatcher:
+    def test_match(self) -> None:
+        pb2 = GroupConfig(type="pattern", packages=["*_pb2", " tests.*"])
+        company = GroupConfig(type="pattern", packages=["company_*", "*_pb2"])
+        matcher = PatternsMatcher.from_groups(
+            [GroupConfig(type="packages", packages=["foo"]), pb2, company]
+        )
+
+        assert matcher.match("foo_pb2") is pb2
+        assert matcher.match("foo.bar_pb2") is pb2
+        assert matcher.match("tests.foo") is pb2
+        assert matcher.match("company_foo.bar") is company
+        assert matcher.match("tests") is None
+        assert matcher.match("foo") is None
+        assert PatternsMatcher.from_groups([]).match("foo") is None
+
+
+class TestPatternGroup:
+    group = PatternGroup
+
+    def test_should_add_statement(self) -> None:
+        group_config = GroupConfig(type="pattern", packages=["*_pb2"])
+
+        assert self.group(group_config=group_config).should_add_statement(
+            ImportStatement("foo.bar_pb2")
+        )
+        assert not self.group(group_config=group_config).should_add_statement(
+            ImportStatement("foo.bar")
+        )
+
+    def test_should_add_statement_first_group(self) -> None:
+        pb2 = GroupConfig(type="pattern", packages=["*_pb2"])
+        foo = GroupConfig(type="pattern", packages=["foo.*"])
+        config = Config(groups=[pb2, foo])
+
+        assert self.group(group_config=pb2, config=config).should_add_statement(
+            ImportStatement("foo.bar_pb2")
+        )
+        assert not self.group(group_config=foo, config=config).should_add_statement(
+            ImportStatement("foo.bar_pb2")
+        )
+        assert self.group(group_config=foo, config=config).should_add_statement(
+            ImportStatement("foo.bar")
+        )
+
+    def test_validate_group_config(self) -> None:
+        g = GroupConfig(type="pattern", packages=["*_pb2"])
+        assert self.group.validate_group_config(g) is g
+
+        with pytest.raises(ValueError):
+            self.group.validate_group_config(GroupConfig(type="pattern"))
+
+
+class TestFirstPartyGroup:
+    group = FirstPartyGroup
+
+    def test_source_roots(self, tmp_path: Path) -> None:
+        config = Config(path=tmp_path / "setup.cfg")
+
+        assert self.group(config=config).source_roots == (str(tmp_path / "src"),)
+        assert self.group(
+            config=config,
+            group_config=GroupConfig(type="firstparty", packages=["src", " lib"]),
+        ).source_roots == (str(tmp_path / "src"), str(tmp_path / "lib"))
+        assert self.group().source_roots == (str(Path.cwd() / "src"),)
+
+    def test_should_add_statement(self, tmp_path: Path) -> None:
+        (tmp_path / "src" / "mypackage").mkdir(parents=True)
+        (tmp_path / "src" / "mypackage" / "__init__.py").write_text("")
+        (tmp_path / "src" / "mymodule.py").write_text("")
+        group = self.group(
+            config=Config(path=tmp_path / "setup.cfg"),
+            group_config=GroupConfig(type="firstparty", packages=["src"]),
+        )
+
+        assert group.should_add_statement(ImportStatement("mypackage.foo"))
+        assert group.should_add_statement(ImportStatement("mymodule"))
+        assert not group.should_add_statement(ImportStatement("src"))
+        assert not group.should_add_statement(ImportStatement("os.path"))
+
+    def test_installed_distribution(self, tmp_path: Path) -> None:
+        (tmp_path / "src" / "pluggy").mkdir(parents=True)
+        (tmp_path / "src" / "pluggy" / "__init__.py").write_text("")
+        (tmp_path / "pytest.py").write_text("")
+        (tmp_path / "setup.py").write_text("")
+
+        def get_group(packages: typing.List[str]) -> str:
+            groups = ImportGroups.from_config(
+                config=Config(
+                    path=tmp_path / "setup.cfg",
+                    groups=[
+                        GroupConfig(type="stdlib"),
+                        GroupConfig(type="sitepackages"),
+                        GroupConfig(type="firstparty", packages=packages),
+                        GroupConfig(type="remainder"),
+                    ],
+                ),
+                statements=[
+                    ImportStatement("pluggy"),
+                    ImportStatement("pytest"),
+                    ImportStatement("setup"),
+                ],
+            )
+            return ", ".join(
+                f"{g.name}:{i.stem}" for g in groups.groups for i in g.statements
+            )
+
+        # modules in project folder do not shadow installed distributions
+        assert get_group([]) == (
+            "sitepackages:pytest, firstparty:pluggy, remainder:setup"
+        )
+        # explicitly configured source roots win over installed distributions
+        assert get_group(["src", "."]) == (
+            "firstparty:pluggy, firstparty:pytest, firstparty:setup"
+        )
+
+
 class TestLocalGroup:
     group = LocalGroup
 
@@ -182,6 +468,68 @@ class TestRemainderGroup:
         assert self.group().should_add_statement(ImportStatement(".foo.bar"))
 
 
+class TestDispatchPlan:
+    def test_order(self) -> None:
+        plan = DispatchPlan([RemainderGroup, LocalGroup, StdLibGroup, BaseImportGroup])
+
+        assert plan.order == (2, 1, 0, 3)
+        assert plan.memoizable == (True, True, True, False)
+        assert plan.is_memoizable_before == (True, True, True, True)
+
+    def test_add_statement(self) -> None:
+        with mock.patch.object(StdLibGroup, "is_dispatch_memoizable", False):
+            plan = DispatchPlan([RemainderGroup, LocalGroup, StdLibGroup])
+        groups = [RemainderGroup(), LocalGroup(), StdLibGroup()]
+
+        assert plan.is_memoizable_before == (True, False, False)
+        assert plan.add_statement(groups, ImportStatement("os")) is groups[2]
+        assert plan.add_statement(groups, ImportStatement(".a")) is groups[1]
+        assert plan.add_statement(groups, ImportStatement("a")) is groups[0]
+        assert plan.memo == {".a": 1, "a": 2}
+
+        with mock.patch.object(
+            LocalGroup, "should_add_statement"
+        ) as mock_local, mock.patch.object(
+            StdLibGroup, "should_add_statement", return_value=False
+        ) as mock_stdlib:
+            assert plan.add_statement(groups, ImportStatement(".a")) is groups[1]
+            assert plan.add_statement(groups, ImportStatement("a")) is groups[0]
+
+        assert groups[0].statements == [ImportStatement("a")] * 2
+        mock_local.assert_not_called()
+        # non-memoizable group is always asked when it is before memoized group
+        assert mock_stdlib.call_args_list == [
+            mock.call(ImportStatement(".a")),
+            mock.call(ImportStatement("a")),
+        ]
+
+    def test_add_statement_none(self) -> None:
+        plan = DispatchPlan([LocalGroup])
+
+        assert plan.add_statement([LocalGroup()], ImportStatement("a")) is None
+
+    def test_add_statement_overridden(self) -> None:
+        added: typing.List[ImportStatement] = []
+
+        class RecordingGroup(RemainderGroup):
+            def add_statement(self, statement: ImportStatement) -> bool:
+                added.append(statement)
+                return super().add_statement(statement)
+
+        plan = DispatchPlan([LocalGroup, RecordingGroup])
+        groups = [LocalGroup(), RecordingGroup()]
+
+        assert plan.memoizable == (True, False)
+        for _ in range(2):
+            assert plan.add_statement(groups, ImportStatement("a")) is groups[1]
+            assert plan.add_statement(groups, ImportStatement(".a")) is groups[0]
+
+        # overridden add_statement is called for every statement
+        assert added == [ImportStatement("a")] * 2
+        assert groups[1].statements == [ImportStatement("a")] * 2
+        assert groups[0].statements == [ImportStatement(".a")] * 2
+
+
 class TestImportGroups:
     def test_all_line_numbers(self) -> None:
         assert ImportGroups().all_line_numbers() == []
@@ -214,6 +562,14 @@ class TestImportGroups:
 
         assert groups.groups[0].statements == [ImportStatement(".a")]
 
+    def test_from_config_dispatch_plan(self) -> None:
+        config = Config()
+
+        assert (
+            ImportGroups.from_config(config).plan
+            is ImportGroups.from_config(config).plan
+        )
+
     def test_add_statement_priority(self) -> None:
         groups = ImportGroups([RemainderGroup(), LocalGroup()])
         groups.add_statement(ImportStatement(".a"))
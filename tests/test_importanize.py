@@ -2,12 +2,18 @@
 from __future__ import absolute_import, print_function, unicode_literals
 import copy
 import io
+import multiprocessing
+import sys
 from pathlib import Path
+from unittest import mock
 
 from cached_property import cached_property  # type: ignore
 
+from importanize.cache import ParseCache
 from importanize.config import IMPORTANIZE_SETUP_CONFIG, Config, GroupConfig
 from importanize.formatters import GroupedFormatter, LinesFormatter
+from importanize.groups import BaseImportGroup
+from importanize.parser import AstParser, HeaderParser, ParseSession
 from importanize.importanize import (
     Aggregator,
     CIAggregator,
@@ -15,9 +21,13 @@ from importanize.importanize import (
     PrintAggregator,
     Result,
     RuntimeConfig,
+    find_sources,
+    run_importanize_in_parallel,
+    run_importanize_on_file,
     run_importanize_on_source,
     run_importanize_on_text,
 )
+from importanize.plugins import hookimpl, plugin_manager
 from importanize.statements import ImportLeaf, ImportStatement
 from importanize.utils import OpenBytesIO, OpenStringIO, StdPath
 
@@ -41,6 +51,14 @@ CONFIG = Config(
 )
 
 
+class AppendPlugin:
+    @hookimpl
+    def group_append_to_statement(
+        self, group: BaseImportGroup, index: int, statement: ImportStatement
+    ) -> str:
+        return "# appended"
+
+
 class TestRuntimeConfig:
     config_path = str(
         (Path(__file__).parent.parent / IMPORTANIZE_SETUP_CONFIG).resolve()
@@ -64,6 +82,20 @@ class TestRuntimeConfig:
             is LinesFormatter
         )
 
+    def test_parser(self) -> None:
+        assert RuntimeConfig(_config=Config()).parser is HeaderParser
+        assert (
+            RuntimeConfig(parser_name="ast", _config=Config(parser=HeaderParser)).parser
+            is AstParser
+        )
+
+    def test_parse_cache(self) -> None:
+        runtime_config = RuntimeConfig(cache_dir=Path("cache"))
+        assert isinstance(runtime_config.parse_cache, ParseCache)
+        assert runtime_config.parse_cache.path == Path("cache")
+        assert runtime_config.parse_cache is runtime_config.parse_cache
+        assert RuntimeConfig(is_cache_enabled=False).parse_cache is None
+
     def test_add_imports(self) -> None:
         assert RuntimeConfig(
             _config=Config(add_imports=[ImportStatement("foo")])
@@ -84,6 +116,16 @@ class TestRuntimeConfig:
         assert r.merged_config.formatter is LinesFormatter
         assert not r.merged_config.add_imports
 
+    def test_config_python_env(self) -> None:
+        assert RuntimeConfig(_config=Config()).config_python_env is None
+        assert (
+            RuntimeConfig(_config=Config(python_env="python")).config_python_env
+            == "python"
+        )
+        assert RuntimeConfig(
+            python_env=sys.executable, _config=Config(python_env="python")
+        ).merged_config.python_env == str(Path(sys.executable).absolute())
+
     def test_normalize(self) -> None:
         r = RuntimeConfig(
             is_in_piped=True,
@@ -114,6 +156,14 @@ class TestRuntimeConfig:
         assert not r.show_header
         assert r.should_add_last_line
 
+    def test_is_parallel(self) -> None:
+        assert not RuntimeConfig(path_names=["foo"]).is_parallel
+        assert RuntimeConfig(path_names=["foo"], jobs=2).is_parallel
+        assert not RuntimeConfig(path_names=["foo", "-"], jobs=2).is_parallel
+        assert not RuntimeConfig(
+            path_names=["foo"], jobs=2, parse_session=ParseSession()
+        ).is_parallel
+
     def test_aggregator(self) -> None:
         assert isinstance(RuntimeConfig(is_ci_mode=True).aggregator, CIAggregator)
         assert isinstance(RuntimeConfig(is_list_mode=True).aggregator, ListAggregator)
@@ -270,6 +320,47 @@ class TestImportanize:
         )
         assert result.organized.splitlines(True)[0].endswith("\r\n")
 
+    def test_importanize_ast_parser(self) -> None:
+        result = next(
+            run_importanize_on_source(
+                self.input_text,
+                RuntimeConfig(parser_name="ast", _config=self.config),
+            )
+        )
+        expected = next(
+            run_importanize_on_source(
+                self.input_text,
+                RuntimeConfig(parser_name="lib2to3", _config=self.config),
+            )
+        )
+
+        assert result.organized == expected.organized
+        assert result.is_success
+
+    def test_importanize_cached(self) -> None:
+        runtime_config = RuntimeConfig(_config=self.config)
+        expected = next(run_importanize_on_source(self.input_text, runtime_config))
+
+        with mock.patch.object(
+            HeaderParser, "get_artifacts", side_effect=AssertionError
+        ):
+            result = next(run_importanize_on_source(self.input_text, runtime_config))
+
+        assert result.organized == expected.organized
+        assert result.is_success
+
+    def test_importanize_parse_session(self) -> None:
+        runtime_config = RuntimeConfig(
+            _config=self.config, is_cache_enabled=False, parse_session=ParseSession()
+        )
+        expected = next(run_importanize_on_source(self.input_text, runtime_config))
+        result = next(run_importanize_on_source(self.input_text, runtime_config))
+
+        assert runtime_config.parse_session is not None
+        assert self.input_text in runtime_config.parse_session.parsers
+        assert result.organized == expected.organized
+        assert result.is_success
+
     def test_importanize_grouped_no_add_lines(self) -> None:
         self.config.after_imports_normalize_new_lines = False
         result = next(
@@ -325,6 +416,60 @@ class TestImportanize:
 
         assert self.input_few_imports in (i.path for i in result)
 
+    def test_importanize_file_excluded(self) -> None:
+        runtime_config = RuntimeConfig(_config=self.config)
+        assert list(
+            run_importanize_on_file(
+                self.input_text, config=self.config, runtime_config=runtime_config
+            )
+        )
+
+        self.config.exclude = ["*/input.py"]
+        assert not list(
+            run_importanize_on_file(
+                self.input_text, config=self.config, runtime_config=runtime_config
+            )
+        )
+
+    def test_importanize_parallel(self) -> None:
+        runtime_config = RuntimeConfig(
+            _config=self.config, is_cache_enabled=False, is_subconfig_allowed=False
+        )
+        sources = list(find_sources(self.test_data, runtime_config=runtime_config))
+        expected = list(run_importanize_on_source(self.test_data, runtime_config))
+
+        result = list(
+            run_importanize_in_parallel(sources, runtime_config=runtime_config, jobs=2)
+        )
+
+        assert [i.path for i in result] == [i.path for i in expected]
+        assert [i.organized for i in result] == [i.organized for i in expected]
+        assert self.invalid in (i.path for i in result if not i.is_success)
+
+    def test_importanize_parallel_registered_plugin(self) -> None:
+        runtime_config = RuntimeConfig(
+            _config=self.config, is_cache_enabled=False, is_subconfig_allowed=False
+        )
+        sources = [(self.input_text, self.config)]
+
+        plugin = AppendPlugin()
+        plugin_manager.register(plugin, name="append")
+        try:
+            expected = list(run_importanize_on_source(self.input_text, runtime_config))
+            result = list(
+                run_importanize_in_parallel(
+                    sources,
+                    runtime_config=runtime_config,
+                    jobs=2,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            )
+        finally:
+            plugin_manager.unregister(plugin)
+
+        assert "# appended" in expected[0].organized
+        assert [i.organized for i in result] == [i.organized for i in expected]
+
 
 class TestCIAggregator:
     def test_ci_aggregator_changes(self) -> None:
@@ -340,6 +485,19 @@ class TestCIAggregator:
         assert result == 1
         assert str(TEST_DATA) in out.read()
 
+    def test_ci_aggregator_parallel(self) -> None:
+        paths = [TEST_DATA / "output_no_imports.py"]
+
+        assert CIAggregator(RuntimeConfig(_config=CONFIG, _paths=paths, jobs=2))() == 0
+        assert (
+            CIAggregator(
+                RuntimeConfig(
+                    _config=CONFIG, _paths=paths + [TEST_DATA / "invalid.py"], jobs=2
+                )
+            )()
+            == 1
+        )
+
     def test_ci_aggregator_no_changes(self) -> None:
         out = OpenStringIO()
         result = CIAggregator(
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
+import os
 from pathlib import Path
+from unittest import mock
 
 from click.testing import CliRunner
 
@@ -21,6 +23,27 @@ def test_version() -> None:
     assert "installed plugins" in result.output
 
 
+def test_jobs() -> None:
+    runner = CliRunner()
+    result = runner.invoke(cli, ["--jobs", "0", str(TEST_DATA / "input.py")])
+    assert result.exit_code == 2
+    assert "'0' is neither a positive number nor 'auto'" in result.output
+
+
+def test_cache_dir(tmp_path: Path) -> None:
+    (tmp_path / "foo.py").write_text("import os\nimport sys\n\nos, sys\n")
+    runner = CliRunner()
+    args = ["--ci", str(tmp_path / "foo.py")]
+
+    # disk cache is opt-in
+    with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path / "xdg")}):
+        runner.invoke(cli, args)
+    assert not (tmp_path / "xdg").exists()
+
+    runner.invoke(cli, ["--cache-dir", str(tmp_path / "cache")] + args)
+    assert list((tmp_path / "cache").glob("*.pickle"))
+
+
 def test_ci() -> None:
     assert (
         main(
@@ -33,3 +56,23 @@ def test_ci() -> None:
         )
         == 1
     )
+
+
+def test_broken_python_env(tmp_path: Path) -> None:
+    (tmp_path / "foo.py").write_text("import os\n\n\nos\n")
+    python = tmp_path / "python"
+    python.write_text("#!/bin/sh\nexit 1\n")
+    python.chmod(0o755)
+
+    def run(**kwargs: str) -> int:
+        return main(
+            RuntimeConfig(
+                path_names=[str(tmp_path / "foo.py")],
+                is_ci_mode=True,
+                is_subconfig_allowed=False,
+                **kwargs,
+            )
+        )
+
+    assert run() == 0
+    assert run(python_env=str(python)) == 1
@@ -1,14 +1,36 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
+import ast
 import lib2to3
+import lib2to3.pytree
+import typing
+from unittest import mock
+
+import pytest  # type: ignore
 
 from importanize.parser import (
+    DRIVERS,
+    PARSERS,
+    PREFERRED_GRAMMARS,
     Artifacts,
+    AstParser,
+    HeaderParser,
     Leaf,
+    Lib2to3Parser,
+    ParseError,
+    ParseSession,
+    get_code_statement_sep,
+    get_header_text,
+    get_incremental_header_text,
     get_text_artifacts,
+    get_tree_artifacts,
     normalize_comment,
+    parse_header_to_tree,
     parse_imports,
+    parse_imports_from_tree,
+    parse_to_tree,
 )
+from importanize.plugins import hookimpl, plugin_manager
 from importanize.statements import ImportLeaf, ImportStatement
 
 
@@ -26,6 +48,158 @@ def test_comment() -> None:
 def test_leaf() -> None:
     leaf = Leaf(lib2to3.pytree.Leaf(lib2to3.pgen2.token.NEWLINE, "\n"))
     assert repr(leaf) == "Leaf(4, '\\n')"
+    assert leaf.comments == []
+    assert not hasattr(leaf, "__dict__")
+
+
+def test_leaf_comments() -> None:
+    leaf = Leaf(
+        lib2to3.pytree.Leaf(
+            lib2to3.pgen2.token.NAME,
+            "import",
+            prefix="# -*- coding: utf-8 -*-\n# foo\n\n# bar\n# baz\n",
+        )
+    )
+    assert leaf.relevant_prefix_lines == ["# foo", "", "# bar", "# baz"]
+    assert leaf.immediate_comments == ["bar", "baz"]
+    assert leaf.enumerated_comments == [(0, "foo"), (2, "bar"), (3, "baz")]
+    assert leaf.comments == ["foo", "bar", "baz"]
+
+
+def test_get_header_text() -> None:
+    assert get_header_text("") == ""
+    assert get_header_text("'''doc'''\nimport a\n") == "'''doc'''\nimport a\n"
+    assert get_header_text("import a\n\n# comment\nfoo = bar\nbaz = 1\n") == (
+        "import a\n\n# comment\npass\n"
+    )
+    assert get_header_text("import a\r\nfoo = bar\r\n") == "import a\r\npass\r\n"
+    assert get_header_text("class A:\n    import b\n") == "pass\n"
+
+    # cannot be determined
+    assert get_header_text("invalid syntax") is None
+    assert get_header_text("import a\rfoo = bar") is None
+    assert get_header_text("import a; foo = bar") is None
+    assert get_header_text("'''doc'''.strip()\nimport a") is None
+    assert get_header_text("import a\nfoo = bar\nimport b\n") is None
+
+
+def test_parse_to_tree_preferred_grammar() -> None:
+    PREFERRED_GRAMMARS.pop("project", None)
+
+    parse_to_tree("print 'hello'", project="project")
+    assert PREFERRED_GRAMMARS["project"] == 1
+
+    with mock.patch.object(
+        DRIVERS[0], "parse_string", wraps=DRIVERS[0].parse_string
+    ) as mock_parse_string:
+        parse_to_tree("print 'world'", project="project")
+        assert not mock_parse_string.called
+
+    parse_to_tree("print('hello')", project="project")
+    assert PREFERRED_GRAMMARS["project"] == 1
+
+    PREFERRED_GRAMMARS.pop("project")
+
+
+def test_parse_to_tree_invalid() -> None:
+    with mock.patch.object(
+        DRIVERS[1], "parse_string", wraps=DRIVERS[1].parse_string
+    ) as mock_parse_string:
+        with pytest.raises(ParseError):
+            parse_to_tree("import a\nfoo bar\nprint 'a'")
+        with pytest.raises(ParseError):
+            parse_to_tree("foo = (")
+        with pytest.raises(ParseError):
+            parse_to_tree("if a:\n        b\n    c")
+        assert not mock_parse_string.called
+
+        with pytest.raises(ParseError):
+            parse_to_tree("print 'a'\nfoo bar")
+        assert mock_parse_string.called
+
+
+def test_get_code_statement_sep() -> None:
+    assert get_code_statement_sep("import a\nfoo = bar\n", 9) == "\n"
+    assert get_code_statement_sep("import a\r\n@foo\r\ndef a(): pass", 10) == "\r\n"
+    assert get_code_statement_sep("(\n    a\n)\n", 0) == "\n"
+
+    assert get_code_statement_sep("import a\nimport b\n", 9) is None
+    assert get_code_statement_sep("'''doc'''\n", 0) is None
+    assert get_code_statement_sep("# comment\nfoo\n", 0) is None
+    assert get_code_statement_sep("  foo\n", 0) is None
+    assert get_code_statement_sep("foo = (\n", 0) is None
+    assert get_code_statement_sep("", 0) is None
+
+
+def test_get_incremental_header_text() -> None:
+    previous = "import a\n\nfoo = bar\n"
+    header = "import a\n\npass\n"
+
+    def incremental(text: str) -> typing.Optional[str]:
+        return get_incremental_header_text(text, previous, header)
+
+    # only code changed
+    assert incremental("import a\n\nfoo = 1\n") == header
+    assert incremental("import a\n\nfoo = (\n") is None
+    assert incremental("import a\n\n'''doc'''\n") is None
+    assert incremental("import a\n\nfoo\nimport b\n") is None
+    assert incremental("import a\n\nfoo\rbar") is None
+
+    # only header changed
+    assert incremental("import b\nimport a\n\nfoo = bar\n") == (
+        "import b\nimport a\n\npass\n"
+    )
+    assert incremental("foo = bar\n") == "pass\n"
+    assert incremental("bar()\nfoo = bar\n") is None
+    assert incremental("import (\nfoo = bar\n") is None
+    assert incremental("import afoo = bar\n") is None
+
+    # everything changed
+    assert incremental("import b\n") is None
+
+    # previous header cannot be reused
+    assert get_incremental_header_text(previous, previous, None) is None
+    assert get_incremental_header_text(previous, "import a\n", "import a\n") is None
+
+
+def test_parse_session() -> None:
+    session = ParseSession()
+
+    first = session.get_parser("foo.py", "import a\n\nfoo = bar\n", HeaderParser)
+    first_imports = list(first.parse_imports())
+
+    second = session.get_parser("foo.py", "import a\n\nfoo = baz\n", HeaderParser)
+    assert second.previous is first
+    assert second.tree is first.tree
+    assert list(second.parse_imports()) == first_imports
+
+    third = session.get_parser("foo.py", "import b\n\nfoo = baz\n", HeaderParser)
+    assert second.previous is None
+    assert third.tree is not second.tree
+    assert [str(i) for i in third.parse_imports()] == ["import b"]
+
+    assert session.get_parser("bar.py", "", HeaderParser).previous is None
+
+    ast_parser = session.get_parser("foo.py", "import c\n", AstParser)
+    assert [str(i) for i in ast_parser.parse_imports()] == ["import c"]
+
+
+def test_parse_header_to_tree() -> None:
+    for text in (
+        "",
+        "foo = bar",
+        "#!/bin/python\n# -*- coding: utf-8 -*-\n'''doc'''\n\n# comment\nfoo = 1",
+        "import a  # noqa\nfrom b import (\n    c,  # comment\n    d,\n)\n\nfoo = 1",
+        "import a\r\n\r\n\r\nclass A:\r\n    pass\r\n",
+        "import a\nfoo = bar\nimport b\n",
+    ):
+        tree = parse_to_tree(text)
+        header_tree = parse_header_to_tree(text)
+
+        assert get_tree_artifacts(header_tree, text) == get_tree_artifacts(tree, text)
+        assert list(parse_imports_from_tree(header_tree, strict=True)) == list(
+            parse_imports_from_tree(tree, strict=True)
+        )
 
 
 def test_get_text_artifacts_sep() -> None:
@@ -499,3 +673,80 @@ def test_parse_imports_from_import() -> None:
             strict=True,
         )
     ]
+
+
+def test_parsers() -> None:
+    assert set(PARSERS) == {"ast", "header", "lib2to3"}
+
+    for text in (
+        "",
+        "if",
+        "foo = bar",
+        "#!/bin/python\n# -*- coding: utf-8 -*-\n'''doc'''\n\n# comment\nfoo = 1",
+        "import a  # noqa\nfrom b import (\n    c,  # comment\n    d,\n)\n\nfoo = 1",
+        "import a\r\n\r\n\r\nclass A:\r\n    pass\r\n",
+        "import a\nfoo = bar\n# comment\nimport b\n",
+        "if a:\n    b\n# comment\nimport c\n",
+        "foo = bar; import a\nimport b.c as d  # comment\n",
+        "from ... import a\nfrom .... b import (c as d, e)#noqa\n",
+        "from a.b import (#generic\n#comment\nc,#noqa\nd,#foo\n#statement\n)#end",
+    ):
+        expected: typing.Any = ParseError
+        try:
+            parser = Lib2to3Parser(text, strict=True)
+            expected = (parser.get_artifacts(), list(parser.parse_imports()))
+        except ParseError:
+            pass
+
+        for name in ("ast", "header"):
+            actual: typing.Any = ParseError
+            try:
+                parser = PARSERS[name](text, strict=True)
+                actual = (parser.get_artifacts(), list(parser.parse_imports()))
+            except ParseError:
+                pass
+
+            assert actual == expected, (name, text)
+
+
+def test_parsers_inject_plugin_artifacts() -> None:
+    trees: typing.List[typing.Any] = []
+
+    class Plugin:
+        @hookimpl
+        def inject_tree_artifacts(
+            self, artifacts: Artifacts, tree: lib2to3.pytree.Node, text: str
+        ) -> Artifacts:
+            trees.append(tree)
+            return artifacts
+
+        @hookimpl
+        def inject_ast_artifacts(
+            self, artifacts: Artifacts, tree: ast.Module, text: str
+        ) -> Artifacts:
+            trees.append(tree)
+            return artifacts
+
+    text = "import a\nfoo = bar\n"
+    plugin = Plugin()
+    plugin_manager.register(plugin)
+    try:
+        for name in PARSERS:
+            trees.clear()
+            PARSERS[name](text).get_artifacts()
+
+            # plugins get trees of complete file for all engines
+            tree, ast_tree = trees
+            assert isinstance(tree, lib2to3.pytree.Node), name
+            assert str(tree) == text, name
+            assert isinstance(ast_tree, ast.Module), name
+            assert len(ast_tree.body) == 2, name
+    finally:
+        plugin_manager.unregister(plugin)
+
+
+def test_ast_parser_invalid() -> None:
+    with pytest.raises(ParseError):
+        AstParser("print 'hello'").get_artifacts()
+    with pytest.raises(ParseError):
+        AstParser("import a\rimport b").get_artifacts()
@@ -5,6 +5,10 @@ from importanize.plugins import (
     activate_plugin,
     deactivate_all_plugins,
     deactivate_piped_plugins,
+    ensure_activated_plugins,
+    hookimpl,
+    ImportanizeSpec,
+    is_hook_implemented,
     plugin_manager,
 )
 
@@ -22,3 +26,53 @@ def test_plugins() -> None:
     deactivate_all_plugins()
 
     assert not plugin_manager.list_name_plugin()
+
+
+def test_is_hook_implemented() -> None:
+    deactivate_all_plugins()
+    assert not is_hook_implemented("statement_sort_key")
+
+    activate_plugin("separate_libs")
+    try:
+        assert is_hook_implemented("statement_sort_key")
+        assert not is_hook_implemented("statement_gt_overwrite")
+    finally:
+        deactivate_all_plugins()
+
+
+def test_implemented_hooks() -> None:
+    ensure_activated_plugins(["unused_imports"])
+    try:
+        assert {
+            i
+            for i in vars(ImportanizeSpec)
+            if not i.startswith("_") and is_hook_implemented(i)
+        } == {
+            "inject_ast_artifacts",
+            "filter_statements",
+            "filter_leafs",
+        }
+    finally:
+        deactivate_all_plugins()
+
+    assert not any(
+        is_hook_implemented(i) for i in vars(ImportanizeSpec) if not i.startswith("_")
+    )
+
+
+def test_implemented_hooks_registered_directly() -> None:
+    class Plugin:
+        @hookimpl
+        def group_append_to_statement(self) -> str:
+            return ""
+
+    deactivate_all_plugins()
+    plugin = Plugin()
+
+    plugin_manager.register(plugin)
+    try:
+        assert is_hook_implemented("group_append_to_statement")
+    finally:
+        plugin_manager.unregister(plugin)
+
+    assert not is_hook_implemented("group_append_to_statement")
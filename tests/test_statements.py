@@ -1,10 +1,31 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
+import pickle
 import typing
 
 import pytest  # type: ignore
 
-from importanize.statements import ImportLeaf, ImportStatement
+from importanize.plugins import hookimpl, plugin_manager
+from importanize.statements import (
+    ImportLeaf,
+    ImportStatement,
+    merge_statements,
+    sort_statements,
+)
+
+
+class ReverseSortKeyPlugin:
+    @hookimpl
+    def statement_sort_key(self, statement: ImportStatement) -> int:
+        return -len(statement.stem)
+
+
+class ReverseGtPlugin:
+    @hookimpl
+    def statement_gt_overwrite(
+        self, a: ImportStatement, b: ImportStatement, result: bool
+    ) -> bool:
+        return not result
 
 
 class TestImportLeaf:
@@ -34,6 +55,12 @@ class TestImportLeaf:
         assert ImportLeaf("KlassName") > ImportLeaf("CONSTANT")
         assert ImportLeaf("aKlassName") > ImportLeaf("CONSTANT")
 
+    def test_sort_key(self) -> None:
+        assert ImportLeaf("A").sort_key < ImportLeaf("Ab").sort_key
+        assert ImportLeaf("Ab").sort_key < ImportLeaf("a").sort_key
+        assert ImportLeaf("a").sort_key < ImportLeaf("a", "b").sort_key
+        assert ImportLeaf("a") < ImportLeaf("b")
+
     def test_repr(self) -> None:
         assert repr(ImportLeaf("a")) == "<ImportLeaf 'a'>"
 
@@ -41,6 +68,42 @@ class TestImportLeaf:
         assert hash(ImportLeaf("a")) == hash("a")
         assert hash(ImportLeaf("a", "b")) == hash("a as b")
 
+    def test_slots(self) -> None:
+        assert not hasattr(ImportLeaf("a"), "__dict__")
+
+    def test_replace(self) -> None:
+        leaf = ImportLeaf("a", inline_comments=["comment"])
+        replaced = leaf.replace(as_name="b")
+
+        assert replaced is not leaf
+        assert replaced.as_string() == "a as b"
+        assert replaced.inline_comments == ("comment",)
+        assert leaf.as_string() == "a"
+
+    def test_immutable(self) -> None:
+        leaf = ImportLeaf("a")
+        assert leaf.as_string() == "a"
+
+        with pytest.raises(AttributeError, match="replace"):
+            leaf.name = "b"
+        with pytest.raises(AttributeError, match="replace"):
+            del leaf.name
+
+        with pytest.raises(AttributeError):
+            leaf.statement_comments.append("comment")  # type: ignore
+
+        assert leaf.name == "a"
+        assert leaf.as_string() == "a"
+
+    def test_pickle(self) -> None:
+        leaf = ImportLeaf("a", "b", inline_comments=["comment"], strict=True)
+        hash(leaf)
+
+        state = leaf.__getstate__()
+        assert "_hash" not in state
+        assert "_string" not in state
+        assert pickle.loads(pickle.dumps(leaf)) == leaf
+
 
 class TestImportStatement:
     def test_all_inline_comments(self) -> None:
@@ -51,9 +114,49 @@ class TestImportStatement:
         ).all_inline_comments == ["leaf", "statement"]
 
     def test_with_line_numbers(self) -> None:
-        assert ImportStatement("a", line_numbers=[1, 2]).with_line_numbers(
-            [3, 4]
-        ).line_numbers == [3, 4]
+        statement = ImportStatement("a", line_numbers=[1, 2])
+
+        assert statement.with_line_numbers([3, 4]).line_numbers == [3, 4]
+        assert statement.line_numbers == [1, 2]
+
+    def test_unique_leafs_cached(self) -> None:
+        statement = ImportStatement("a", leafs=[ImportLeaf("c"), ImportLeaf("b")])
+
+        assert statement.unique_leafs == [ImportLeaf("b"), ImportLeaf("c")]
+        assert statement.unique_leafs is statement.unique_leafs
+
+    def test_replace(self) -> None:
+        statement = ImportStatement("a", leafs=[ImportLeaf("b")], line_numbers=[1])
+        assert str(statement) == "from a import b"
+
+        replaced = statement.replace(leafs=[ImportLeaf("c")])
+
+        assert str(replaced) == "from a import c"
+        assert replaced.line_numbers == [1]
+        assert str(statement) == "from a import b"
+
+    def test_immutable(self) -> None:
+        statement = ImportStatement("a", leafs=[ImportLeaf("b")])
+        assert statement in {ImportStatement("a", leafs=[ImportLeaf("b")])}
+
+        with pytest.raises(AttributeError, match="replace"):
+            statement.leafs = [ImportLeaf("c")]  # type: ignore
+        with pytest.raises(AttributeError):
+            statement.leafs.append(ImportLeaf("c"))  # type: ignore
+        with pytest.raises(AttributeError):
+            statement.inline_comments.append("comment")  # type: ignore
+
+        assert str(statement) == "from a import b"
+
+    def test_pickle(self) -> None:
+        statement = ImportStatement(
+            "a", leafs=[ImportLeaf("b")], standalone_comments=["comment"], strict=True
+        )
+        hash(statement)
+
+        assert not hasattr(statement, "__dict__")
+        assert set(statement.__getstate__()) == set(ImportStatement._fields)
+        assert pickle.loads(pickle.dumps(statement)) == statement
 
     def test_root_module(self) -> None:
         assert ImportStatement("a").root_module == "a"
@@ -141,3 +244,93 @@ class TestImportStatement:
         assert hash(ImportStatement("a", leafs=[ImportLeaf("b")])) == hash(
             "from a import b"
         )
+
+    def test_sort_key(self) -> None:
+        assert ImportStatement("a").sort_key == ImportStatement("a").default_sort_key
+        assert (
+            ImportStatement("a", leafs=[ImportLeaf("c"), ImportLeaf("b")]).sort_key[-1]
+            == ImportLeaf("b").sort_key
+        )
+
+    def test_sort_key_plugin(self) -> None:
+        statements = [
+            ImportStatement("a"),
+            ImportStatement("bb"),
+            ImportStatement("__future__", leafs=[ImportLeaf("annotations")]),
+        ]
+
+        plugin_manager.register(ReverseSortKeyPlugin(), name="reverse")
+        try:
+            assert ImportStatement("a").sort_key[3] == (-1,)
+            assert sort_statements(statements) == [
+                ImportStatement("__future__", leafs=[ImportLeaf("annotations")]),
+                ImportStatement("bb"),
+                ImportStatement("a"),
+            ]
+        finally:
+            plugin_manager.unregister(name="reverse")
+
+        assert sort_statements(statements) == [
+            ImportStatement("__future__", leafs=[ImportLeaf("annotations")]),
+            ImportStatement("a"),
+            ImportStatement("bb"),
+        ]
+
+    def test_sort_statements_gt_overwrite(self) -> None:
+        statements = [ImportStatement("a"), ImportStatement("c"), ImportStatement("b")]
+
+        plugin_manager.register(ReverseGtPlugin(), name="reverse")
+        try:
+            assert ImportStatement("a") > ImportStatement("b")
+            assert sort_statements(statements) == [
+                ImportStatement("c"),
+                ImportStatement("b"),
+                ImportStatement("a"),
+            ]
+        finally:
+            plugin_manager.unregister(name="reverse")
+
+
+def test_merge_statements() -> None:
+    statement = ImportStatement("a", leafs=[ImportLeaf("b")])
+    assert merge_statements([statement]) is statement
+
+    merged = merge_statements(
+        [
+            ImportStatement(
+                "a",
+                leafs=[ImportLeaf("c", inline_comments=["c"]), ImportLeaf("b")],
+                line_numbers=[1],
+                standalone_comments=["first"],
+            ),
+            ImportStatement(
+                "a",
+                leafs=[
+                    ImportLeaf("c", inline_comments=["c", "cc"]),
+                    ImportLeaf("b", "d", statement_comments=["noqa"]),
+                ],
+                line_numbers=[2],
+                inline_comments=["second"],
+            ),
+        ]
+    )
+
+    assert (
+        ImportStatement(
+            "a",
+            leafs=[
+                ImportLeaf("c", inline_comments=["c", "cc"]),
+                ImportLeaf("b"),
+                ImportLeaf("b", "d", statement_comments=["noqa"]),
+            ],
+            line_numbers=[1, 2],
+            standalone_comments=["first"],
+            inline_comments=["second"],
+            strict=True,
+        )
+        == merged
+    )
+    assert merged.line_numbers == [1, 2]
+    assert [i.inline_comments for i in merged.leafs] == [("c", "cc"), (), ()]
+    with pytest.raises(AssertionError):
+        merge_statements([ImportStatement("a"), ImportStatement("b")])
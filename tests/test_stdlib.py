@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, print_function, unicode_literals
+import sys
+
+from importanize.stdlib import (
+    ADDED_STDLIB_MODULE_NAMES,
+    BUNDLED_STDLIB_MODULE_NAMES,
+    REMOVED_STDLIB_MODULE_NAMES,
+    STDLIB_MODULE_NAMES,
+    get_bundled_stdlib_module_names,
+)
+
+
+def test_get_bundled_stdlib_module_names() -> None:
+    assert set(ADDED_STDLIB_MODULE_NAMES) <= BUNDLED_STDLIB_MODULE_NAMES
+    assert set(REMOVED_STDLIB_MODULE_NAMES) <= BUNDLED_STDLIB_MODULE_NAMES
+
+    py36 = get_bundled_stdlib_module_names((3, 6))
+    assert {"os", "typing", "enum", "macpath", "dummy_threading"} <= py36
+    # PyPI backports in Python 3.6
+    assert not {"dataclasses", "contextvars", "zoneinfo", "graphlib"} & py36
+
+    py39 = get_bundled_stdlib_module_names((3, 9))
+    assert {"dataclasses", "contextvars", "zoneinfo", "graphlib"} <= py39
+    assert not {"macpath", "dummy_threading", "tomllib"} & py39
+
+    assert get_bundled_stdlib_module_names((3, 11)) == BUNDLED_STDLIB_MODULE_NAMES - {
+        "macpath",
+        "_dummy_thread",
+        "dummy_threading",
+    }
+
+
+def test_stdlib_module_names() -> None:
+    if sys.version_info >= (3, 10):
+        assert STDLIB_MODULE_NAMES == getattr(sys, "stdlib_module_names")
+    else:
+        assert STDLIB_MODULE_NAMES == get_bundled_stdlib_module_names(
+            sys.version_info[:2]
+        )
@@ -1,27 +1,226 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, print_function, unicode_literals
 import io
+import pickle
+import sys
+from pathlib import Path
+from unittest import mock
 
 import pytest  # type: ignore
 
 from importanize.utils import (
     OpenBytesIO,
     OpenStringIO,
+    SITE_PACKAGES,
+    STDLIB,
     StdPath,
     add_prefix_to_text,
+    EnvironmentModuleClassifier,
+    ModuleClassifier,
+    classify_module,
     force_bytes,
     force_text,
     generate_diff,
+    get_module_classifier,
+    get_python_executable,
+    get_source_roots_index,
+    get_site_packages_index,
     is_piped,
     is_site_package,
     is_std_lib,
     largest_prefix,
+    module_classifier,
     list_set,
     remove_largest_whitespace_prefix,
     takeafter,
 )
 
 
+def test_classify_module() -> None:
+    assert classify_module("") is None
+    assert classify_module("foo") is None
+    assert classify_module("sys") == STDLIB
+    assert classify_module("pytest") == SITE_PACKAGES
+    assert classify_module("os.path") == STDLIB
+
+    module_classifier.clear()
+    with mock.patch(
+        "importanize.utils._get_module_path", return_value=""
+    ) as mock_get_module_path:
+        assert classify_module("foo") is None
+        assert classify_module("foo") is None
+        assert classify_module("asyncio") == STDLIB
+        assert classify_module("asyncio", static_stdlib=False) is None
+    assert mock_get_module_path.call_args_list == [
+        mock.call("foo"),
+        mock.call("asyncio"),
+    ]
+    module_classifier.clear()
+
+
+def test_get_site_packages_index() -> None:
+    index = get_site_packages_index()
+
+    # these packages come from requirements-dev.txt
+    assert index["pytest"] == "pytest"
+    assert index["_pytest"] == "pytest"
+    assert index["pluggy"] == "pluggy"
+    assert "importanize" not in index
+    assert "os" not in index
+
+    module_classifier.clear()
+    with mock.patch("importanize.utils._get_module_path") as mock_get_module_path:
+        assert classify_module("pytest") == SITE_PACKAGES
+        assert classify_module("_pytest.config") == SITE_PACKAGES
+    mock_get_module_path.assert_not_called()
+    module_classifier.clear()
+
+
+def test_module_classifier_shadowed_stdlib() -> None:
+    classifier = ModuleClassifier()
+    # backports installed from PyPI shadow stdlib names
+    classifier.site_packages_index = {
+        "dataclasses": "dataclasses",
+        "typing": "typing",
+        "foo": "foo-dist",
+    }
+
+    assert classifier.classify("dataclasses", static_stdlib=False) == STDLIB
+    assert classifier.classify("typing", static_stdlib=False) == STDLIB
+    assert classifier.classify("foo", static_stdlib=False) == SITE_PACKAGES
+
+    with mock.patch(
+        "importanize.utils._get_module_path",
+        return_value="/venv/lib/python3.6/site-packages/dataclasses.py",
+    ):
+        classifier.clear()
+        classifier.site_packages_index = {"dataclasses": "dataclasses"}
+        assert classifier.classify("dataclasses", static_stdlib=False) == (
+            SITE_PACKAGES
+        )
+
+
+def test_module_classifier_dump_update() -> None:
+    classifier = ModuleClassifier()
+    classifier.site_packages_index = {"foo": "foo-dist"}
+    assert classifier.classify("foo") == SITE_PACKAGES
+    assert classifier.classify("sys") == STDLIB
+
+    assert classifier.dump(start=1) == {
+        "site_packages_index": {"foo": "foo-dist"},
+        "modules": [["sys", True, STDLIB]],
+    }
+
+    merged = ModuleClassifier()
+    merged.update(classifier.dump())
+    assert merged.site_packages_index == {"foo": "foo-dist"}
+    assert merged.modules == classifier.modules
+    assert merged.is_changed
+
+    merged.is_changed = False
+    merged.update(classifier.dump(start=1))
+    assert not merged.is_changed
+
+
+def test_get_python_executable(tmp_path: Path) -> None:
+    python = tmp_path / "bin" / "python"
+    python.parent.mkdir()
+    python.write_text("")
+
+    with pytest.raises(ValueError):
+        get_python_executable(str(tmp_path))
+
+    python.chmod(0o755)
+    assert get_python_executable(str(tmp_path)) == str(python)
+    assert get_python_executable(str(python)) == str(python)
+
+    with pytest.raises(ValueError):
+        get_python_executable(str(tmp_path / "missing"))
+
+
+def test_get_module_classifier() -> None:
+    assert get_module_classifier() is module_classifier
+    assert get_module_classifier("python") is get_module_classifier("python")
+    assert isinstance(get_module_classifier("python"), EnvironmentModuleClassifier)
+
+
+def test_environment_module_classifier(tmp_path: Path) -> None:
+    stdlib = tmp_path / "lib"
+    site_packages = stdlib / "site-packages"
+    site_packages.mkdir(parents=True)
+    (stdlib / "lib-dynload").mkdir()
+    for i in (
+        stdlib / "json",
+        stdlib / "__pycache__",
+        site_packages / "requests",
+        site_packages / "requests-2.0.dist-info",
+    ):
+        i.mkdir()
+    for i in (
+        stdlib / "abc.py",
+        stdlib / "README.txt",
+        stdlib / "lib-dynload" / "_ssl.cpython-38-x86_64-linux-gnu.so",
+        site_packages / "six.py",
+        site_packages / "__editable___foo_finder.py",
+    ):
+        i.write_text("")
+
+    classifier = EnvironmentModuleClassifier(sys.executable)
+    with mock.patch(
+        "importanize.utils._get_environment_paths",
+        return_value={
+            "stdlib": [str(stdlib), str(stdlib)],
+            "site_packages": [str(site_packages)],
+            "builtin_module_names": ["sys"],
+            "stdlib_module_names": ["asyncio"],
+        },
+    ) as mock_get_environment_paths:
+        assert classifier.get_environment_index() == {
+            "abc": STDLIB,
+            "asyncio": STDLIB,
+            "json": STDLIB,
+            "_ssl": STDLIB,
+            "sys": STDLIB,
+            "requests": SITE_PACKAGES,
+            "six": SITE_PACKAGES,
+        }
+        assert classifier.classify("json.decoder") == STDLIB
+        assert classifier.classify("requests.adapters") == SITE_PACKAGES
+        assert classifier.classify("pytest") is None
+        assert classifier.classify("README") is None
+    mock_get_environment_paths.assert_called_once_with(sys.executable)
+
+
+def test_environment_module_classifier_current_python() -> None:
+    classifier = EnvironmentModuleClassifier(sys.executable)
+
+    assert classifier.classify("os") == STDLIB
+    assert classifier.classify("pytest") == SITE_PACKAGES
+    assert classifier.classify("foo") is None
+
+
+def test_environment_module_classifier_invalid_python(tmp_path: Path) -> None:
+    classifier = EnvironmentModuleClassifier(str(tmp_path / "python"))
+
+    with pytest.raises(ValueError):
+        classifier.get_environment_index()
+    with mock.patch("importanize.utils._get_environment_paths") as mock_get_paths:
+        with pytest.raises(ValueError):
+            classifier.classify("os")
+    mock_get_paths.assert_not_called()
+
+
+def test_get_source_roots_index(tmp_path: Path) -> None:
+    for i in ("package", "namespace", "not-package", "__pycache__"):
+        (tmp_path / i).mkdir()
+    for i in ("package/__init__.py", "namespace/module.py", "module.py", "data.txt"):
+        (tmp_path / i).write_text("")
+
+    assert get_source_roots_index((str(tmp_path),)) == {"package", "module"}
+    assert get_source_roots_index((str(tmp_path / "namespace"),)) == {"module"}
+    assert get_source_roots_index((str(tmp_path / "missing"),)) == set()
+
+
 def test_is_std_lib() -> None:
     assert not is_std_lib("")
     assert not is_std_lib("foo")
@@ -197,6 +396,18 @@ class TestStdPath:
 
         assert p.fileout.read() == b"hello mars"
 
+    def test_pickle(self) -> None:
+        p = StdPath("test").with_streams(filein=OpenBytesIO(b"hello world"))
+        p.read_text()
+        p.encoding = "latin-1"
+
+        unpickled = pickle.loads(pickle.dumps(p))
+
+        assert unpickled == p
+        assert isinstance(unpickled, StdPath)
+        assert unpickled.encoding == "latin-1"
+        assert unpickled.filein is None
+
     def test_pep263(self) -> None:
         p = StdPath("-").with_streams(
             stdin=io.BytesIO("# -*- coding: ascii -*-\nпривет".encode("utf-8")),